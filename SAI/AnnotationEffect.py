@@ -9,6 +9,7 @@ Created on Apr 27, 2016
 
 import inkex
 from gui import PickerGUI
+from ElementSet import ElementSet
 from Tkinter import Tk
 import tkMessageBox
 import tkSimpleDialog
@@ -26,6 +27,10 @@ class AnnotationEffect(inkex.Effect):
     def __init__(self):
         inkex.Effect.__init__(self)
         self.gui = None
+        # Key: id; Value: SVG element of the document with that id
+        self.elementsById = None
+        # Document that elementsById was built from
+        self.elementsByIdDocument = None
 
     def numSelectedItems(self):
         """ Method returns the number of selected elements
@@ -34,6 +39,34 @@ class AnnotationEffect(inkex.Effect):
 
         return len(self.selected)
 
+    def getElementById(self, elementId):
+        """ Returns the SVG element of the document with the given id, or
+            None. The id -> element dictionary is built with one pass over
+            the document on first use. It is rebuilt when the document is
+            replaced, and when a lookup misses or finds an element that no
+            longer has that id or is no longer in the document, so changes
+            to the document never return a stale element.
+        :param elementId: id of the SVG element.
+        :return: SVG element or None.
+        """
+
+        if self.elementsByIdDocument is self.document:
+            element = self.elementsById.get(elementId)
+            if element is not None and element.get("id") == elementId:
+                # A removed element keeps its lxml document, so the chain of
+                # its ancestors must lead to the root
+                top = element
+                for top in element.iterancestors():
+                    pass
+                if top is self.document.getroot():
+                    return element
+        self.elementsById = {}
+        # The first element wins if ids are duplicated, as in XPath
+        for element in self.document.xpath("//*[@id]"):
+            self.elementsById.setdefault(element.get("id"), element)
+        self.elementsByIdDocument = self.document
+        return self.elementsById.get(elementId)
+
     def effect(self):
         """ Method prepares the TkInter GUI """
         root = Tk()
@@ -107,11 +140,14 @@ class AnnotationEffect(inkex.Effect):
         for (entity, instance) in tempAnnot:
             undoElems = []
             if instance not in self.gui.instancesbyClass[entity]:
-                self.gui.instancesbyClass[entity][instance] = []
+                self.gui.instancesbyClass[entity][instance] = ElementSet()
 
+            elements = self.gui.instancesbyClass[entity][instance]
             for element in selected:
-                if element not in self.gui.instancesbyClass[entity][instance]:
-                    self.gui.instancesbyClass[entity][instance].append(element)
+                if element not in elements:
+                    elements.append(element)
+                    self.gui.annotationsByElement.add(element, entity,
+                                                      instance)
                     triple = [instance, c.HAS_SVG_PROPERTY, element]
                     self.addPropertyTriple(triple, c.DATATYPE_PROP, undoList)
                     undoElems.append(element)
@@ -158,8 +194,10 @@ class AnnotationEffect(inkex.Effect):
 
             self.gui.lastId += 1
             self.gui.defaultName = finalName
-            self.gui.instancesbyClass[tagName][finalName] = {}
-            self.gui.instancesbyClass[tagName][finalName] = outputList
+            self.gui.instancesbyClass[tagName][finalName] = \
+                ElementSet(outputList)
+            self.gui.annotationsByElement.addElements(tagName, finalName,
+                                                      outputList)
             undoList.append({"type": "add", "instanceId": finalName,
                              "entityName": tagName, "SVGElements": outputList})
             for element in outputList:
@@ -184,10 +222,9 @@ class AnnotationEffect(inkex.Effect):
                 self.gui.lastId += 1
                 annotationName = self.getAnnotationName(element)
                 finalName = annotationName + str(self.gui.lastId)
-                if self.gui.lastId not in self.gui.instancesbyClass[tagName]:
-                    self.gui.instancesbyClass[tagName][finalName] = {}
-
-                self.gui.instancesbyClass[tagName][finalName] = [element]
+                self.gui.instancesbyClass[tagName][finalName] = \
+                    ElementSet([element])
+                self.gui.annotationsByElement.add(element, tagName, finalName)
                 undoList.append({"type": "add", "instanceId": finalName,
                                  "entityName": tagName,
                                  "SVGElements": [element]})
@@ -203,15 +240,14 @@ class AnnotationEffect(inkex.Effect):
         :return: Name of the element.
         """
 
-        groupElementList = self.document.xpath("//*[@id = '" + tagId + "']",
-                                               namespaces=inkex.NSS)
-        if groupElementList[0] is not None:
-            tag = self.removeSVGPrefix(groupElementList[0].tag)
+        element = self.getElementById(tagId)
+        if element is not None:
+            tag = self.removeSVGPrefix(element.tag)
             if tag in c.SVG_NAMED_ELEMENTS:
                 if tag == "text":
-                    return self.resolveText(groupElementList[0])
+                    return self.resolveText(element)
                 if tag == "path":
-                    return self.resolvePath(groupElementList[0].attrib)
+                    return self.resolvePath(element.attrib)
                 else:
                     return tag
 
@@ -330,8 +366,10 @@ class AnnotationEffect(inkex.Effect):
                 if tmpSVGElem != selSVGElements:
                     undoList.append({"type": "remove", "instanceId": instance,
                                      "entityName": entity,
-                                     "SVGElements": tmpSVGElem})
-                    self.gui.instancesbyClass[entity][instance] = []
+                                     "SVGElements": list(tmpSVGElem)})
+                    self.gui.instancesbyClass[entity][instance] = ElementSet()
+                    self.gui.annotationsByElement.removeElements(
+                        entity, instance, tmpSVGElem)
                     for elem in tmpSVGElem:
                         triple = [instance, c.HAS_SVG_PROPERTY, elem]
                         self.removePropertyTriple(triple, c.DATATYPE_PROP,
@@ -339,6 +377,8 @@ class AnnotationEffect(inkex.Effect):
                     undoElements = []
                     for element in self.selected:
                         self.gui.instancesbyClass[entity][instance].append(element)
+                        self.gui.annotationsByElement.add(element, entity,
+                                                          instance)
                         undoElements.append(element)
                         triple = [instance, c.HAS_SVG_PROPERTY, element]
                         self.addPropertyTriple(triple, c.DATATYPE_PROP, undoList)
@@ -378,12 +418,14 @@ class AnnotationEffect(inkex.Effect):
                     tmpSVGElem = self.gui.instancesbyClass[entity][instance]
                     undoList.append({"type": "remove", "instanceId": instance,
                                      "entityName": entity,
-                                     "SVGElements": tmpSVGElem})
+                                     "SVGElements": list(tmpSVGElem)})
                     for element in tmpSVGElem:
                         triple = [instance, c.HAS_SVG_PROPERTY, element]
                         self.removePropertyTriple(triple, c.DATATYPE_PROP,
                                                   False, undoList)
                     del self.gui.instancesbyClass[entity][instance]
+                    self.gui.annotationsByElement.removeElements(
+                        entity, instance, tmpSVGElem)
                     self.removePropertiesOfAnnotation(instance, undoList)
                     # Append parent Entity of instance in order to
                     # automatically expand the tree to it later on
@@ -405,20 +447,16 @@ class AnnotationEffect(inkex.Effect):
         """ Removes all the properties that an instance (annotation) is
             involved in. This needs to be done after deleting an instance.
         :param instance: Instance whose properties should be removed.
+        :param undoList: the partial list of undo operations
         """
-        # TODO: improve efficiency
-        for property in self.gui.objectProperties:
-            triples = self.gui.objectProperties[property]
-            for triple in triples:
-                if instance in triple:
-                    self.gui.removePropertyTriple(triple, 'object_property', 
-                                                  False, undoList)
-        for property in self.gui.dataTypeProperties:
-            triples = self.gui.dataTypeProperties[property]
-            for triple in triples:
-                if instance in triple:
-                    self.gui.removePropertyTriple(triple, 'datatype_property', 
-                                                  False, undoList)
+
+        # Only the triples with the instance as subject or object are
+        # visited, through the indexes of the triple tables
+        for triple in self.gui.objectProperties.triplesOf(instance):
+            self.removePropertyTriple(triple, c.OBJECT_PROP, False, undoList)
+        for triple in self.gui.dataTypeProperties.triplesOf(instance):
+            self.removePropertyTriple(triple, c.DATATYPE_PROP, False,
+                                      undoList)
 
     def removeElements(self, tempInstance, undoDataDict, fromUndo):
         """ Subsidiary function to remove annotation.
@@ -436,21 +474,16 @@ class AnnotationEffect(inkex.Effect):
 
         undoList = []  # undo function
         for (entity, instance) in tempInstance:
-            tempList = self.gui.instancesbyClass[entity][instance]
-            self.gui.instancesbyClass[entity][instance] = []
-
-            removedElements = []
-            for tempListElement in tempList:
-                if tempListElement not in selected:
-                    self.gui.instancesbyClass[entity][instance]\
-                        .append(tempListElement)
-                else:
-                    removedElements.append(tempListElement)
-                    # Add entity to selected in order to automatically
-                    # expand the tree to it later on
-                    self.gui.selectedEntities.append(entity)
-                    removed = True
-
+            removedElements = \
+                self.gui.instancesbyClass[entity][instance].removeAll(selected)
+            if removedElements:
+                # Add entity to selected in order to automatically
+                # expand the tree to it later on
+                self.gui.selectedEntities.append(entity)
+                removed = True
+
+            self.gui.annotationsByElement.removeElements(entity, instance,
+                                                         removedElements)
             for element in removedElements:
                 triple = [instance, c.HAS_SVG_PROPERTY, element]
                 self.removePropertyTriple(triple, c.DATATYPE_PROP, 
@@ -567,17 +600,18 @@ class AnnotationEffect(inkex.Effect):
                 # are within the domain and range of the property
                 if c.TREE_TAG_OBJECT_PROPERTY in tags and \
                         self.validateSelectedRange():
-                    for subject in subjects:
-                        for obj in self.gui.selectedRange:
-                            newTriple = [subject, selectedProperty, obj]
-                            if not self.propertyTripleExists(newTriple,
-                                                             c.OBJECT_PROP):
-                                self.addPropertyTriple(newTriple, c.OBJECT_PROP, 
-                                                       undoList)
-                                countNew += 1
-                                isPropertyAdded = True
-                            else:
-                                countExisting += 1
+                    # The new triples of subjects x range are found at once
+                    candidates = [[subject, selectedProperty, obj]
+                                  for subject in subjects
+                                  for obj in self.gui.selectedRange]
+                    newTriples = \
+                        self.gui.objectProperties.missing(candidates)
+                    for newTriple in newTriples:
+                        self.addPropertyTriple(newTriple, c.OBJECT_PROP,
+                                               undoList)
+                    countNew = len(newTriples)
+                    countExisting = len(candidates) - countNew
+                    isPropertyAdded = countNew > 0
                 elif c.TREE_TAG_DATATYPE_PROPERTY in tags:
                     for subject in subjects:
                         value = self.dataTypeInputPrompt(subject, selectedProperty)
@@ -664,14 +698,10 @@ class AnnotationEffect(inkex.Effect):
         """
 
         exists = False
-        if len(triple) == 3:
-            p = triple[c.PROPERTY_INDEX]
-            if type == c.OBJECT_PROP:
-                if triple in self.gui.objectProperties[p]:
-                    exists = True
-            elif type == c.DATATYPE_PROP:
-                if triple in self.gui.dataTypeProperties[p]:
-                    exists = True
+        if type == c.OBJECT_PROP:
+            exists = triple in self.gui.objectProperties
+        elif type == c.DATATYPE_PROP:
+            exists = triple in self.gui.dataTypeProperties
         return exists
 
     def addPropertyTriple(self, triple, type, undoList=None):
@@ -682,19 +712,14 @@ class AnnotationEffect(inkex.Effect):
         :param undoList: the partial list of undo operations
         """
 
-        p = triple[c.PROPERTY_INDEX]
         self.gui.selectedProperties = ["%s -> %s" % (triple[c.SUBJECT_INDEX],
                                                      triple[c.OBJECT_INDEX])]
         if type == c.OBJECT_PROP:
-            self.gui.objectPropertiesToAdd.append(triple)
-            if p not in self.gui.objectProperties:
-                self.gui.objectProperties[p] = []
-            self.gui.objectProperties[p].append(triple)
+            self.gui.objectPropertiesToAdd.add(triple)
+            self.gui.objectProperties.add(triple)
         elif type == c.DATATYPE_PROP:
-            self.gui.dataTypePropertiesToAdd.append(triple)
-            if p not in self.gui.dataTypeProperties:
-                self.gui.dataTypeProperties[p] = []
-            self.gui.dataTypeProperties[p].append(triple)
+            self.gui.dataTypePropertiesToAdd.add(triple)
+            self.gui.dataTypeProperties.add(triple)
         if undoList is not None:
             undoList.append({"type": "add_property",
                             "triple": triple,
@@ -716,17 +741,13 @@ class AnnotationEffect(inkex.Effect):
         if not fromEdit:
             self.gui.selectedProperties = [property]
         if type == c.OBJECT_PROP:
-            if triple in self.gui.objectPropertiesToAdd:
-                self.gui.objectPropertiesToAdd.remove(triple)
-            if triple in self.gui.objectProperties[property]:
-                self.gui.objectProperties[property].remove(triple)
-                self.gui.objectPropertiesToRemove.append(triple)
+            self.gui.objectPropertiesToAdd.remove(triple)
+            if self.gui.objectProperties.remove(triple):
+                self.gui.objectPropertiesToRemove.add(triple)
         elif type == c.DATATYPE_PROP:
-            if triple in self.gui.dataTypePropertiesToAdd:
-                self.gui.dataTypePropertiesToAdd.remove(triple)
-            if triple in self.gui.dataTypeProperties[property]:
-                self.gui.dataTypeProperties[property].remove(triple)
-                self.gui.objectPropertiesToRemove.append(triple)
+            self.gui.dataTypePropertiesToAdd.remove(triple)
+            if self.gui.dataTypeProperties.remove(triple):
+                self.gui.dataTypePropertiesToRemove.add(triple)
         if undoList is not None:
             undoList.append({"type": "remove_property",
                             "triple": triple,
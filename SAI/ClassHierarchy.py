@@ -0,0 +1,93 @@
+"""
+ClassHierarchy indexes the subclass hierarchy of an ontology by class URI.
+"""
+
+
+class ClassHierarchy(object):
+    """ This class indexes the class hierarchy (rdfs:subClassOf) of an
+        ontology by class URI, so that classes of different namespaces
+        with the same local name are kept apart. It is built once from the
+        subclass pairs and answers children and parents queries with
+        dictionary lookups. It has no dependency on the GUI, so it can be
+        cached and used without a TreeView. """
+
+    def __init__(self, subclassPairs=()):
+        # Key: Class URI; Value: List of direct subclasses
+        self.children = {}
+        # Key: Class URI; Value: List of direct superclasses
+        self.parents = {}
+        for child, parent in subclassPairs:
+            self.addSubclass(child, parent)
+
+    def addSubclass(self, child, parent):
+        """ Adds a direct child - parent relation to the hierarchy.
+        :param child: URI of the subclass.
+        :param parent: URI of the superclass.
+        """
+
+        if child == parent:
+            return
+        if parent not in self.children:
+            self.children[parent] = []
+        if child not in self.children[parent]:
+            self.children[parent].append(child)
+        if child not in self.parents:
+            self.parents[child] = []
+        if parent not in self.parents[child]:
+            self.parents[child].append(parent)
+
+    def entities(self):
+        """ Returns the set of all the entities of the hierarchy. """
+        return set(self.children) | set(self.parents)
+
+    def reachable(self, entity, edges):
+        """ Returns the set of entities reachable from the given one.
+        :param entity: Starting entity.
+        :param edges: Adjacency dict (children or parents).
+        :return: Set of reachable entities, without the given entity.
+        """
+
+        found = set()
+        stack = list(edges.get(entity, []))
+        while stack:
+            current = stack.pop()
+            if current not in found and current != entity:
+                found.add(current)
+                stack.extend(edges.get(current, []))
+        return found
+
+    def getSubclasses(self, entity):
+        """ Returns the direct subclasses of the given entity. """
+        return list(self.children.get(entity, []))
+
+    def getParentclasses(self, entity):
+        """ Returns the direct superclasses of the given entity. """
+        return list(self.parents.get(entity, []))
+
+    def isSubclassOf(self, entity, ancestor):
+        """ Returns whether entity is ancestor or one of its (transitive)
+            subclasses.
+        """
+
+        return entity == ancestor or \
+            ancestor in self.reachable(entity, self.parents)
+
+    def subTree(self, rootEntity, name=None, path=None):
+        """ Returns the subtree with the given entity as the root, as nested
+            lists: [rootEntity, [child1, ...], [child2, ...]].
+        :param rootEntity: Root of the subtree.
+        :param name: Function applied to the entities put in the subtree,
+            e.g. to get their local names; None keeps the URIs.
+        :param path: Entities between the root of the whole tree and this
+            one; used to break cycles.
+        :return: Nested list with the subtree.
+        """
+
+        path = set() if path is None else path
+        path.add(rootEntity)
+        subtree = [rootEntity if name is None else name(rootEntity)]
+        for child in self.children.get(rootEntity, []):
+            if child not in path:
+                subtree.append(self.subTree(child, name, path))
+        path.discard(rootEntity)
+        return subtree
@@ -0,0 +1,91 @@
+"""
+ElementIndex maps annotated SVG elements back to the annotations that
+contain them.
+"""
+
+
+class ElementIndex(object):
+    """ This class is the reverse index of the annotations: it maps the id
+        of every annotated SVG element to the annotations that contain it,
+        so that the annotations of a selection are found without scanning
+        every annotation. An annotation is identified by its (entity,
+        instance) pair, as in instancesbyClass, so the same instance name
+        under two entities makes two annotations. The index is kept up to
+        date by AnnotationEffect when SVG elements are added to or removed
+        from annotations, and saved into the JSON file with the other data.
+    """
+
+    def __init__(self, instancesbyClass=None):
+        # Key: SVG element id; Value: set of (entity, instance) pairs of the
+        # annotations containing it
+        self.annotations = {}
+        if instancesbyClass:
+            for entity, instances in instancesbyClass.iteritems():
+                for instance, elements in instances.iteritems():
+                    self.addElements(entity, instance, elements)
+
+    def add(self, element, entity, instance):
+        """ Records that an annotation contains an SVG element. """
+        annotations = self.annotations.get(element)
+        if annotations is None:
+            annotations = self.annotations[element] = set()
+        annotations.add((entity, instance))
+
+    def remove(self, element, entity, instance):
+        """ Records that an annotation no longer contains an SVG element. """
+        annotations = self.annotations.get(element)
+        if annotations is not None:
+            annotations.discard((entity, instance))
+            if not annotations:
+                del self.annotations[element]
+
+    def addElements(self, entity, instance, elements):
+        """ Records that an annotation contains the given SVG elements. """
+        for element in elements:
+            self.add(element, entity, instance)
+
+    def removeElements(self, entity, instance, elements):
+        """ Records that an annotation no longer contains the given SVG
+            elements.
+        """
+
+        for element in elements:
+            self.remove(element, entity, instance)
+
+    def annotationsOf(self, elements):
+        """ Returns the annotations that contain any of the given SVG
+            elements.
+        :param elements: Iterable of SVG element ids, e.g. the selection.
+        :return: Set of (entity, instance) pairs.
+        """
+
+        found = set()
+        for element in elements:
+            found.update(self.annotations.get(element, ()))
+        return found
+
+    def toJSON(self):
+        """ Returns the index as a JSON-serializable dict from SVG element
+            ids to lists of [entity, instance] pairs.
+        """
+
+        return dict((element, sorted([entity, instance]
+                                     for entity, instance in annotations))
+                    for element, annotations in self.annotations.iteritems())
+
+    @classmethod
+    def fromJSON(cls, data, instancesbyClass=None):
+        """ Builds the index from the output of toJSON or, for JSON files
+            written before the index existed (data is None) or when it held
+            bare instance names, from the annotations themselves.
+        """
+
+        if data is None or any(isinstance(annotation, basestring)
+                               for annotations in data.itervalues()
+                               for annotation in annotations):
+            return cls(instancesbyClass)
+        index = cls()
+        for element, annotations in data.iteritems():
+            index.annotations[element] = set(
+                (entity, instance) for entity, instance in annotations)
+        return index
@@ -0,0 +1,120 @@
+"""
+ElementSet keeps the SVG element ids of an annotation in insertion
+order, without duplicates.
+"""
+
+
+def toElementSets(instancesbyClass):
+    """ Returns a copy of instancesbyClass whose annotations are ElementSets.
+    :param instancesbyClass: Key: class name; Value: dict from instance
+        names to lists of SVG element ids.
+    :return: The same structure with ElementSet values.
+    """
+
+    return dict((entity, dict((instance, ElementSet(elements))
+                              for instance, elements in instances.iteritems()))
+                for entity, instances in instancesbyClass.iteritems())
+
+
+def instancesToJSON(instancesbyClass):
+    """ Returns a copy of instancesbyClass whose annotations are lists, to
+        be serialized into JSON; the inverse of toElementSets.
+    :param instancesbyClass: Key: class name; Value: dict from instance
+        names to ElementSets (or lists) of SVG element ids.
+    :return: The same structure with list values.
+    """
+
+    return dict((entity, dict((instance, list(elements))
+                              for instance, elements in instances.iteritems()))
+                for entity, instances in instancesbyClass.iteritems())
+
+
+class ElementSet(object):
+    """ The SVG element ids of an annotation, in insertion order and
+        without duplicates. The order is kept in a list and membership is
+        tested against a set; both are private to the class, and only
+        changed by the methods below, so they cannot get out of sync. It
+        compares equal to the list of its elements; toJSON returns that
+        list.
+    """
+
+    def __init__(self, elements=()):
+        self.elements = []
+        self.members = set()
+        self.extend(elements)
+
+    def append(self, element):
+        """ Appends an element unless it is already in the set. """
+        if element not in self.members:
+            self.members.add(element)
+            self.elements.append(element)
+
+    def extend(self, elements):
+        for element in elements:
+            self.append(element)
+
+    def remove(self, element):
+        """ Removes an element; raises ValueError if it is not in the set.
+        """
+
+        if element not in self.members:
+            raise ValueError("%r is not in the ElementSet" % (element, ))
+        self.elements.remove(element)
+        self.members.discard(element)
+
+    def removeAll(self, elements):
+        """ Removes the given elements with one pass over the list. The
+            remaining elements keep their order.
+        :param elements: Iterable of the elements to remove; those that are
+            not in the set are ignored.
+        :return: List of the removed elements, in the order they had in
+            this list (not in the order of the argument).
+        """
+
+        removed = self.members.intersection(elements)
+        if not removed:
+            return []
+        kept = []
+        removedElements = []
+        for element in self.elements:
+            if element in removed:
+                removedElements.append(element)
+            else:
+                kept.append(element)
+        self.elements = kept
+        self.members.difference_update(removed)
+        return removedElements
+
+    def toJSON(self):
+        """ Returns the elements as a JSON-serializable list. """
+        return list(self.elements)
+
+    def __contains__(self, element):
+        return element in self.members
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __getitem__(self, index):
+        """ Returns an element, or a list of elements for a slice. """
+        return self.elements[index]
+
+    def __eq__(self, other):
+        if isinstance(other, ElementSet):
+            return self.elements == other.elements
+        if isinstance(other, list):
+            return self.elements == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    # Mutable, so not hashable
+    __hash__ = None
+
+    def __repr__(self):
+        return "ElementSet(%r)" % (self.elements, )
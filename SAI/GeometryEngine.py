@@ -0,0 +1,251 @@
+"""
+GeometryEngine computes the central points and dimensions of the SVG
+elements of a document in batch with NumPy, with the same results as the
+per-element code of SVGParser. The bounding boxes of paths are computed in
+batch by PathBounds. NumPy is optional; SVGParser falls back to
+its per-element code when it is not installed.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+import const
+import PathBounds
+import PathData
+import SVGTransform
+
+SODI_CX = "{" + const.SODI_NS + "}cx"
+SODI_CY = "{" + const.SODI_NS + "}cy"
+# Lists of fewer elements are reduced with Python floats, which is faster
+# than NumPy for them
+BATCH_MIN_ELEMENTS = 32
+
+
+def isAvailable():
+    """ Returns whether NumPy, needed by GeometryEngine, is installed. """
+    return numpy is not None
+
+
+def quantize(values):
+    """ Rounds floats to the 12 significant digits kept by str(), which
+        the per-element code uses to store some coordinates.
+    """
+
+    return numpy.array(['%.12g' % value for value in values.tolist()],
+                       dtype=float)
+
+
+class GeometryEngine(object):
+    """ The element parameters (x, y, width, height, cx, cy and transform
+        matrices) are collected into NumPy arrays with one pass over the
+        elements, and the central points of all elements are computed with
+        batched affine products. Every element gets a row; the central
+        point and dimensions of a list of elements reduce over the rows of
+        its elements.
+    """
+
+    def __init__(self, transformOf):
+        # Function that returns the cumulative matrix (a..f) of an element
+        self.transformOf = transformOf
+        # Key: element id; Value: row of its central point
+        self.rows = {}
+        # Key: id of a rect or path; Value: row of its width and height
+        self.sizeRows = {}
+        # Arrays of the central points and of the widths and heights
+        # (rects and paths only), by row; and the same values as lists of
+        # floats
+        self.centerX = None
+        self.centerY = None
+        self.widths = None
+        self.heights = None
+        self.lists = None
+        # Ids of the paths with path data and array of their bounding boxes,
+        # one (minX, minY, maxX, maxY) row per path
+        self.boxIds = []
+        self.boxes = None
+        # Collected parameters, converted into arrays by build
+        self.ids = []
+        self.xs = []
+        self.ys = []
+        self.offsetsX = []
+        self.offsetsY = []
+        # Rows with a 6-value transform, and their transforms
+        self.transformed = []
+        self.transforms = []
+        # Rows whose central point is stored as a string by SVGParser
+        self.quantized = []
+        # Rows with a width and height
+        self.sized = []
+        # Outputs of PathData.scan for the paths with path data, and their
+        # matrices
+        self.paths = []
+        self.pathMatrices = []
+
+    def addRow(self, id, x, y, offsetX, offsetY, matrix):
+        """ Collects one element whose central point is
+            ((x + (x + offsetX)) / 2, (y + (y + offsetY)) / 2), transformed
+            by the given matrix.
+        """
+
+        row = len(self.ids)
+        self.ids.append(id)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.offsetsX.append(offsetX)
+        self.offsetsY.append(offsetY)
+        if matrix != SVGTransform.IDENTITY:
+            self.transformed.append(row)
+            self.transforms.append(matrix)
+        return row
+
+    def addRects(self, elList):
+        """ Collects the rect elements, as SVGParser.addRectCenter. """
+        for rect in elList:
+            attrib = rect.attrib
+            if "id" in attrib and "x" in attrib and "y" in attrib and \
+                    "height" in attrib and "width" in attrib:
+                row = self.addRow(attrib["id"], attrib["x"], attrib["y"],
+                                  attrib["width"], attrib["height"],
+                                  self.transformOf(rect))
+                self.quantized.append(row)
+                self.sized.append(row)
+
+    def addPoints(self, elList, xName, yName):
+        """ Collects elements whose central point is given by two
+            attributes, as SVGParser.addEllipseCenter and addTextCenter.
+        """
+
+        for element in elList:
+            attrib = element.attrib
+            if "id" in attrib and xName in attrib and yName in attrib:
+                self.addRow(attrib["id"], attrib[xName], attrib[yName], 0.0,
+                            0.0, self.transformOf(element))
+
+    def addPaths(self, elList):
+        """ Collects the path elements, as SVGParser.addPathCenter. Path
+            data is scanned here; its bounding boxes are computed by build.
+        """
+
+        for path in elList:
+            attrib = path.attrib
+            if "id" not in attrib:
+                continue
+            if SODI_CX in attrib and SODI_CY in attrib:
+                self.addRow(attrib["id"], attrib[SODI_CX], attrib[SODI_CY],
+                            0.0, 0.0, self.transformOf(path))
+            elif "d" in attrib:
+                self.boxIds.append(attrib["id"])
+                self.paths.append(PathData.scan(attrib["d"]))
+                self.pathMatrices.append(self.transformOf(path))
+
+    def build(self):
+        """ Computes the central points of all collected elements. Raises
+            ValueError if a parameter is not a number.
+        """
+
+        xs = numpy.array(self.xs, dtype=float)
+        ys = numpy.array(self.ys, dtype=float)
+        offsetsX = numpy.array(self.offsetsX, dtype=float)
+        offsetsY = numpy.array(self.offsetsY, dtype=float)
+        # Same operations (and rounding) as the per-element code
+        centerX = (xs + (xs + offsetsX)) / 2
+        centerY = (ys + (ys + offsetsY)) / 2
+        if self.transformed:
+            rows = numpy.array(self.transformed)
+            a, b, c, d, e, f = \
+                numpy.array(self.transforms, dtype=float).T
+            x = centerX[rows]
+            y = centerY[rows]
+            centerX[rows] = 0.0 + a * x + c * y + e
+            centerY[rows] = 0.0 + b * x + d * y + f
+        if self.quantized:
+            rows = numpy.array(self.quantized)
+            centerX[rows] = quantize(centerX[rows])
+            centerY[rows] = quantize(centerY[rows])
+        if self.paths:
+            boxes = PathBounds.batchBounds(self.paths, self.pathMatrices)
+            found = ~numpy.isnan(boxes[:, 0])
+            self.boxIds = [id for id, isFound in
+                           zip(self.boxIds, found.tolist()) if isFound]
+            boxes = boxes[found]
+            minX, minY, maxX, maxY = boxes.T
+            rows = range(len(self.ids), len(self.ids) + len(self.boxIds))
+            self.ids.extend(self.boxIds)
+            self.sized.extend(rows)
+            centerX = numpy.concatenate((centerX, quantize((minX + maxX) / 2)))
+            centerY = numpy.concatenate((centerY, quantize((minY + maxY) / 2)))
+            offsetsX = numpy.concatenate((offsetsX, quantize(maxX - minX)))
+            offsetsY = numpy.concatenate((offsetsY, quantize(maxY - minY)))
+            self.boxes = boxes
+        else:
+            self.boxes = numpy.empty((0, 4))
+        self.centerX = centerX
+        self.centerY = centerY
+        self.widths = offsetsX
+        self.heights = offsetsY
+        self.lists = (centerX.tolist(), centerY.tolist(), offsetsX.tolist(),
+                      offsetsY.tolist())
+        for row, id in enumerate(self.ids):
+            self.rows[id] = row
+        for row in self.sized:
+            self.sizeRows[self.ids[row]] = row
+        self.ids = self.xs = self.ys = None
+        self.offsetsX = self.offsetsY = self.transforms = None
+        self.paths = self.pathMatrices = None
+
+    def center(self, elList):
+        """ Returns the central point of a list of elements, as
+            SVGParser.countCentralPointForListOfElements.
+        """
+
+        rows = [self.rows[element] for element in elList
+                if element in self.rows]
+        if not rows:
+            return None
+        if len(rows) < BATCH_MIN_ELEMENTS:
+            centerX, centerY = self.lists[:2]
+            xs = [centerX[row] for row in rows]
+            ys = [centerY[row] for row in rows]
+            minX, maxX, minY, maxY = min(xs), max(xs), min(ys), max(ys)
+        else:
+            xs = self.centerX[rows]
+            ys = self.centerY[rows]
+            minX, maxX = float(xs.min()), float(xs.max())
+            minY, maxY = float(ys.min()), float(ys.max())
+        roundX = round((minX + maxX) / 2, 3)
+        roundY = round((minY + maxY) / 2, 3)
+        return (str(roundX), str(roundY))
+
+    def dimensions(self, eList):
+        """ Returns the (height, width) of a list of elements, as
+            SVGParser.computeDimForListOfElements.
+        """
+
+        sized = [element for element in eList if element in self.sizeRows]
+        if not sized:
+            return str(None), str(None)
+        rows = [self.rows[element] for element in sized]
+        sizeRows = [self.sizeRows[element] for element in sized]
+        centerX, centerY, widths, heights = self.lists
+        if len(rows) < BATCH_MIN_ELEMENTS:
+            xs = [centerX[row] for row in rows]
+            ys = [centerY[row] for row in rows]
+            # The first element wins ties, as with strict comparisons
+            indexes = range(len(rows))
+            minX = min(indexes, key=xs.__getitem__)
+            maxX = max(indexes, key=xs.__getitem__)
+            minY = min(indexes, key=ys.__getitem__)
+            maxY = max(indexes, key=ys.__getitem__)
+        else:
+            xs = self.centerX[rows]
+            ys = self.centerY[rows]
+            minX, maxX = int(xs.argmin()), int(xs.argmax())
+            minY, maxY = int(ys.argmin()), int(ys.argmax())
+        h = (heights[sizeRows[maxY]] / 2.0) + \
+            (heights[sizeRows[minY]] / 2.0) + \
+            abs(centerY[rows[maxY]] - centerY[rows[minY]])
+        w = (widths[sizeRows[maxX]] / 2.0) + \
+            (widths[sizeRows[minX]] / 2.0) + \
+            abs(centerX[rows[maxX]] - centerX[rows[minX]])
+        return str(h), str(w)
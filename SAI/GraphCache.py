@@ -0,0 +1,285 @@
+"""
+GraphCache keeps parsed ontologies on disk so that an unchanged ontology
+does not need to be parsed again from RDF/XML.
+"""
+
+import array
+import cPickle as pickle
+import hashlib
+import os
+import rdflib
+from rdflib.term import URIRef, BNode, Literal
+
+GRAPH_SUFFIX = ".graph"
+META_SUFFIX = ".meta"
+INDEX_SUFFIX = ".index"
+
+
+def graphToSnapshot(graph):
+    """ Converts a graph into a compact picklable snapshot: a table with
+        every distinct term and a flat integer array with the term
+        indexes of every (s, p, o) triple.
+    :param graph: rdflib Graph.
+    :return: (terms, triples) pair.
+    """
+
+    termIds = {}
+    terms = []
+    triples = array.array('i')
+    for triple in graph:
+        for term in triple:
+            termId = termIds.get(term)
+            if termId is None:
+                termId = termIds[term] = len(terms)
+                if isinstance(term, Literal):
+                    terms.append(('L', unicode(term), term.datatype,
+                                  term.language))
+                elif isinstance(term, BNode):
+                    terms.append(('B', unicode(term)))
+                else:
+                    terms.append(('U', unicode(term)))
+            triples.append(termId)
+    return terms, triples.tostring()
+
+
+def snapshotToGraph(snapshot, graph=None):
+    """ Fills a graph with the triples of a snapshot created by
+        graphToSnapshot.
+    :param snapshot: (terms, triples) pair.
+    :param graph: Graph to be filled; a new one is created if None.
+    :return: The filled graph.
+    """
+
+    if graph is None:
+        graph = rdflib.Graph()
+    termTable, rawTriples = snapshot
+    terms = []
+    for term in termTable:
+        if term[0] == 'U':
+            terms.append(URIRef(term[1]))
+        elif term[0] == 'B':
+            terms.append(BNode(term[1]))
+        else:
+            terms.append(Literal(term[1], datatype=term[2], lang=term[3]))
+    triples = array.array('i')
+    triples.fromstring(rawTriples)
+    ids = iter(triples)
+    graph.addN((terms[s], terms[p], terms[o], graph)
+               for s, p, o in zip(ids, ids, ids))
+    return graph
+
+
+class GraphCache(object):
+    """ On-disk cache of parsed ontology graphs and of the indexes derived
+        from them by RDFReader. Entries are keyed by the path of the
+        ontology file and validated against its size, modification time
+        and content hash, so a changed file is never served from the cache.
+        The total size of the cache is bounded; the least recently used
+        entries are evicted first.
+    """
+
+    def __init__(self, directory, maxSize):
+        self.directory = directory
+        self.maxSize = maxSize
+
+    def load(self, path):
+        """ Returns the cached snapshot of the graph of the given file, or
+            None if the file has not been cached or has changed since.
+        :param path: Path of the ontology file.
+        :return: Snapshot (see graphToSnapshot) or None.
+        """
+
+        if not self.isValid(path):
+            return None
+        return self.readEntry(self.entryPath(path, GRAPH_SUFFIX))
+
+    def loadIndexes(self, path, namespace):
+        """ Returns the cached RDFReader indexes of the given file for the
+            given namespace, or None.
+        :param path: Path of the ontology file.
+        :param namespace: Namespace the indexes were built for.
+        :return: dict with the indexes or None.
+        """
+
+        if not self.isValid(path):
+            return None
+        return self.readEntry(self.indexPath(path, namespace))
+
+    def store(self, path, graph):
+        """ Stores the graph parsed from the given file.
+        :param path: Path of the ontology file.
+        :param graph: rdflib Graph parsed from the file.
+        """
+
+        meta = self.fileMeta(path)
+        if meta is not None:
+            self.writeEntry(self.entryPath(path, GRAPH_SUFFIX),
+                            graphToSnapshot(graph))
+            self.writeEntry(self.entryPath(path, META_SUFFIX), meta)
+            self.evict()
+
+    def storeIndexes(self, path, namespace, indexes):
+        """ Stores the RDFReader indexes built from the given file. They are
+            only stored alongside a valid graph entry.
+        :param path: Path of the ontology file.
+        :param namespace: Namespace the indexes were built for.
+        :param indexes: dict with the indexes.
+        """
+
+        if self.isValid(path):
+            self.writeEntry(self.indexPath(path, namespace), indexes)
+            self.evict()
+
+    def invalidate(self, path):
+        """ Removes every entry of the given file from the cache.
+        :param path: Path of the ontology file.
+        """
+
+        prefix = self.entryKey(path)
+        for fileName in self.listEntries():
+            if fileName.startswith(prefix):
+                self.removeFile(os.path.join(self.directory, fileName))
+
+    def isValid(self, path):
+        """ Returns whether the cached entry of a file matches the file on
+            disk. Size and modification time are checked first; the content
+            hash is only computed when they differ (e.g. a touched file),
+            and the entry is refreshed if the content is unchanged.
+        :param path: Path of the ontology file.
+        :return: 'True' if the cached entry can be used.
+        """
+
+        metaPath = self.entryPath(path, META_SUFFIX)
+        meta = self.readEntry(metaPath)
+        if meta is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if meta["size"] != stat.st_size:
+            self.invalidate(path)
+            return False
+        if meta["mtime"] != stat.st_mtime:
+            if meta["hash"] != self.contentHash(path):
+                self.invalidate(path)
+                return False
+            meta["mtime"] = stat.st_mtime
+            self.writeEntry(metaPath, meta)
+        else:
+            # Mark the entry as recently used
+            self.touch(metaPath)
+        return True
+
+    def fileMeta(self, path):
+        """ Returns the size, modification time and content hash of a file.
+        :param path: Path of the file.
+        :return: dict with the file data, None if the file cannot be read.
+        """
+
+        try:
+            stat = os.stat(path)
+            return {"path": os.path.abspath(path), "size": stat.st_size,
+                    "mtime": stat.st_mtime, "hash": self.contentHash(path)}
+        except (IOError, OSError):
+            return None
+
+    def contentHash(self, path):
+        """ Returns the SHA-1 hex digest of the content of a file. """
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def entryKey(self, path):
+        """ Returns the cache key of an ontology file. Unicode paths (e.g.
+            those returned by the Tk file dialogs) are hashed as UTF-8.
+        """
+
+        path = os.path.abspath(path)
+        if isinstance(path, unicode):
+            path = path.encode('utf-8')
+        return hashlib.sha1(path).hexdigest()
+
+    def entryPath(self, path, suffix):
+        return os.path.join(self.directory, self.entryKey(path) + suffix)
+
+    def indexPath(self, path, namespace):
+        nsKey = hashlib.sha1(namespace.encode('utf-8')).hexdigest()[:16]
+        return self.entryPath(path, ".%s%s" % (nsKey, INDEX_SUFFIX))
+
+    def readEntry(self, entryPath):
+        """ Unpickles a cache file; returns None if it cannot be read. """
+        try:
+            with open(entryPath, 'rb') as f:
+                return pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError,
+                AttributeError, ImportError, ValueError):
+            return None
+
+    def writeEntry(self, entryPath, value):
+        """ Pickles a value into a cache file. The file is written under a
+            temporary name first so that readers never see partial data.
+            Errors are ignored: the cache is an optimization only.
+        """
+
+        tmpPath = "%s.%d.tmp" % (entryPath, os.getpid())
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            with open(tmpPath, 'wb') as f:
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+            if os.path.exists(entryPath):
+                os.remove(entryPath)
+            os.rename(tmpPath, entryPath)
+        except (IOError, OSError, pickle.PicklingError):
+            self.removeFile(tmpPath)
+
+    def listEntries(self):
+        try:
+            return os.listdir(self.directory)
+        except OSError:
+            return []
+
+    def touch(self, entryPath):
+        try:
+            os.utime(entryPath, None)
+        except OSError:
+            pass
+
+    def removeFile(self, filePath):
+        try:
+            os.remove(filePath)
+        except OSError:
+            pass
+
+    def evict(self):
+        """ Removes the least recently used entries until the total size of
+            the cache is below maxSize. An entry is all the files sharing
+            the key of one ontology file; its last use is the modification
+            time of its meta file.
+        """
+
+        entries = {}
+        total = 0
+        for fileName in self.listEntries():
+            filePath = os.path.join(self.directory, fileName)
+            key = fileName.split('.')[0]
+            try:
+                stat = os.stat(filePath)
+            except OSError:
+                continue
+            if key not in entries:
+                entries[key] = {"size": 0, "used": 0, "files": []}
+            entries[key]["size"] += stat.st_size
+            entries[key]["files"].append(filePath)
+            if fileName.endswith(META_SUFFIX):
+                entries[key]["used"] = stat.st_mtime
+            total += stat.st_size
+        for key in sorted(entries, key=lambda k: entries[k]["used"]):
+            if total <= self.maxSize:
+                break
+            for filePath in entries[key]["files"]:
+                self.removeFile(filePath)
+            total -= entries[key]["size"]
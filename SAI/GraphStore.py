@@ -0,0 +1,125 @@
+"""
+GraphStore keeps ontologies in persistent rdflib stores on disk, so that
+their graphs do not need to be held in memory. The GUI still builds its
+indexes of classes, annotations and property triples from the whole
+ontology, so those must fit in memory.
+"""
+
+import os
+import shutil
+import rdflib
+from urllib import pathname2url
+from rdflib.term import URIRef
+from rdflib import plugin
+from rdflib.store import Store, VALID_STORE
+from rdflib.plugin import PluginException
+from GraphCache import GraphCache, META_SUFFIX
+from OntologyFormat import parseOntology
+
+STORE_SUFFIX = ".store"
+# Backends that keep the graph in memory; no GraphStore is needed for them
+MEMORY_BACKENDS = ("default", "IOMemory", "Memory")
+
+
+def isBackendAvailable(backend):
+    """ Returns whether an rdflib store plugin can be used, e.g. 'Sleepycat'
+        needs the bsddb module.
+    :param backend: Name of the rdflib store plugin.
+    :return: 'True' if the store can be created.
+    """
+
+    try:
+        plugin.get(backend, Store)()
+    except (PluginException, ImportError):
+        return False
+    return True
+
+
+def openGraphStore(directory, backend):
+    """ Returns a GraphStore for the given backend, or None if the backend
+        keeps graphs in memory or cannot be used here; the in-memory graph
+        of RDFReader is used then.
+    :param directory: Directory of the stores.
+    :param backend: Name of the rdflib store plugin.
+    :return: GraphStore instance or None.
+    """
+
+    if not backend or backend in MEMORY_BACKENDS or \
+            not isBackendAvailable(backend):
+        return None
+    return GraphStore(directory, backend)
+
+
+class GraphStore(GraphCache):
+    """ Persistent rdflib stores (e.g. Sleepycat, with SPO, POS and OSP
+        indexes) of ontology files. An ontology is imported into its store
+        once; later opens read only the triples that are queried. Stores are
+        validated against the ontology file in the same way as GraphCache
+        entries, and a store changed without saving the ontology (see
+        markDirty) is imported again.
+    """
+
+    def __init__(self, directory, backend):
+        # The total size of the stores is not bounded; they are removed
+        # when the ontology changes or with invalidate
+        super(GraphStore, self).__init__(directory, None)
+        self.backend = backend
+
+    def open(self, path, format=None):
+        """ Returns a graph backed by the store of the given ontology file,
+            importing the file first if the store is missing or outdated.
+        :param path: Path of the ontology file.
+        :param format: Format of the file; guessed if None.
+        :return: Opened rdflib Graph.
+        """
+
+        storePath = self.entryPath(path, STORE_SUFFIX)
+        meta = self.readEntry(self.entryPath(path, META_SUFFIX))
+        imported = self.isValid(path) and not meta.get("dirty")
+        if not imported:
+            self.invalidate(path)
+        if not os.path.isdir(storePath):
+            os.makedirs(storePath)
+        # The identifier must not change between opens, since context
+        # aware stores keep the triples of each graph identifier apart
+        identifier = URIRef("file:" + pathname2url(os.path.abspath(path)))
+        graph = rdflib.Graph(store=self.backend, identifier=identifier)
+        if graph.open(storePath, create=True) != VALID_STORE:
+            raise IOError("Cannot open the store of %s" % path)
+        if not imported:
+            parseOntology(graph, path, format)
+            graph.commit()
+            self.markClean(path)
+        return graph
+
+    def markDirty(self, path):
+        """ Records that the store of a file has been changed, so that it is
+            imported again unless markClean is called (after saving).
+        :param path: Path of the ontology file.
+        """
+
+        metaPath = self.entryPath(path, META_SUFFIX)
+        meta = self.readEntry(metaPath)
+        if meta is not None:
+            meta["dirty"] = True
+            self.writeEntry(metaPath, meta)
+
+    def markClean(self, path):
+        """ Records that the store of a file matches the file (and its
+            journal) on disk.
+        :param path: Path of the ontology file.
+        """
+
+        meta = self.fileMeta(path)
+        if meta is not None:
+            meta["dirty"] = False
+            self.writeEntry(self.entryPath(path, META_SUFFIX), meta)
+
+    def invalidate(self, path):
+        """ Removes the store of the given file. """
+        super(GraphStore, self).invalidate(path)
+        shutil.rmtree(self.entryPath(path, STORE_SUFFIX), ignore_errors=True)
+
+    def evict(self):
+        """ Stores are not evicted. """
+        pass
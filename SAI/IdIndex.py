@@ -0,0 +1,71 @@
+"""
+IdIndex keeps the highest numeric id of the instances named after SVG
+elements.
+"""
+
+import heapq
+import const as c
+
+
+def instanceNumericId(instanceName):
+    """ Returns the numeric suffix of an instance named after an SVG
+        element (e.g. 'rect12' -> 12), or None for any other name.
+    :param instanceName: Name of the instance (annotation).
+    :return: int or None.
+    """
+
+    numericId = None
+    for svgName in c.SVG_NAMED_ELEMENTS:
+        if instanceName.startswith(svgName):
+            rest = instanceName[len(svgName):]
+            if rest.isdigit() and \
+                    (numericId is None or int(rest) > numericId):
+                numericId = int(rest)
+    return numericId
+
+
+class IdIndex(object):
+    """ This class keeps the highest numeric id of the instances named
+        after SVG elements (see SVG_NAMED_ELEMENTS), so that new unique
+        names can be generated without scanning every instance. It is
+        updated when instances are added or removed; the maximum is kept
+        in a heap with lazy deletion. """
+
+    def __init__(self, instanceNames=()):
+        # Instance names known to the index
+        self.names = set()
+        # Key: numeric id; Value: number of instances with that id
+        self.counts = {}
+        # Max-heap (negated values) of the ids in counts
+        self.heap = []
+        for name in instanceNames:
+            self.add(name)
+
+    def add(self, instanceName):
+        """ Registers an instance name. """
+        if instanceName in self.names:
+            return
+        self.names.add(instanceName)
+        numericId = instanceNumericId(instanceName)
+        if numericId is not None:
+            if numericId not in self.counts:
+                self.counts[numericId] = 0
+                heapq.heappush(self.heap, -numericId)
+            self.counts[numericId] += 1
+
+    def remove(self, instanceName):
+        """ Unregisters an instance name. """
+        if instanceName not in self.names:
+            return
+        self.names.discard(instanceName)
+        numericId = instanceNumericId(instanceName)
+        if numericId is not None:
+            self.counts[numericId] -= 1
+            if self.counts[numericId] == 0:
+                del self.counts[numericId]
+
+    def lastId(self):
+        """ Returns the highest numeric id, or 0 if there is none. """
+        while self.heap and -self.heap[0] not in self.counts:
+            heapq.heappop(self.heap)
+        return -self.heap[0] if self.heap else 0
@@ -0,0 +1,82 @@
+"""
+LazyMapping loads the values of a mapping on first access.
+"""
+
+from collections import MutableMapping
+
+
+class LazyMapping(MutableMapping):
+    """ Mapping whose values are loaded the first time they are accessed
+        and memoised afterwards. The keys are given up front. If they are
+        only candidates (exactKeys is False), the loader returns None for
+        the keys that turn out not to belong to the mapping (e.g. entities
+        without instances), so membership tests and iteration load them.
+        Values can be nested LazyMappings; materialize converts the whole
+        structure into plain dicts, e.g. to serialize it into JSON.
+    """
+
+    def __init__(self, keys, loader, exactKeys=True):
+        # Keys whose value has not been loaded yet
+        self.pending = set(keys)
+        # Key: loaded key; Value: its value
+        self.loaded = {}
+        self.loader = loader
+        self.exactKeys = exactKeys
+
+    def load(self, key):
+        """ Loads the value of a pending key. Returns whether the key
+            belongs to the mapping.
+        """
+
+        self.pending.discard(key)
+        value = self.loader(key)
+        if value is None and not self.exactKeys:
+            return False
+        self.loaded[key] = value
+        return True
+
+    def loadCandidates(self):
+        """ Loads all pending keys if they are only candidates. """
+        if not self.exactKeys:
+            for key in list(self.pending):
+                self.load(key)
+
+    def __getitem__(self, key):
+        if key in self.loaded:
+            return self.loaded[key]
+        if key in self.pending and self.load(key):
+            return self.loaded[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self.pending.discard(key)
+        self.loaded[key] = value
+
+    def __delitem__(self, key):
+        if key in self.pending:
+            self.pending.discard(key)
+        else:
+            del self.loaded[key]
+
+    def __contains__(self, key):
+        if key in self.loaded:
+            return True
+        if key not in self.pending:
+            return False
+        return self.exactKeys or self.load(key)
+
+    def __iter__(self):
+        self.loadCandidates()
+        return iter(list(self.loaded) + list(self.pending))
+
+    def __len__(self):
+        self.loadCandidates()
+        return len(self.loaded) + len(self.pending)
+
+    def materialize(self):
+        """ Returns the mapping, and any nested LazyMapping, as plain dicts.
+        """
+
+        return dict((key, value.materialize()
+                     if isinstance(value, LazyMapping) else value)
+                    for key, value in self.iteritems())
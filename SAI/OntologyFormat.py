@@ -0,0 +1,274 @@
+"""
+OntologyFormat reads and writes ontologies in the formats supported by SAI:
+RDF/XML, N-Triples, Turtle and a compact binary snapshot (.saib), which is
+the fastest to load.
+
+The binary format holds data only, so opening a crafted file cannot run
+code. After BINARY_MAGIC come the following sections:
+- the namespaces of the URIs of the ontology, most used first;
+- the kind of every term, one byte each: U (URI), B (blank node) or
+  L (literal);
+- the strings of the terms: the value of every term, followed by the
+  datatype and the language ('' if none) of literals;
+- the term indexes of every (s, p, o) triple.
+Every section starts with its number of items. Lists of strings store the
+UTF-8 byte lengths of the strings, then the strings themselves. Counts,
+lengths and indexes are little-endian 32-bit integers.
+"""
+
+import os
+import re
+import struct
+import sys
+from array import array
+from GraphCache import graphToSnapshot, snapshotToGraph
+
+XML = "xml"
+NTRIPLES = "nt"
+TURTLE = "turtle"
+BINARY = "binary"
+# Key: file extension; Value: format
+FORMATS_BY_EXTENSION = {".rdf": XML, ".owl": XML, ".xml": XML,
+                        ".nt": NTRIPLES, ".ttl": TURTLE, ".saib": BINARY}
+BINARY_MAGIC = b"SAIB2\n"
+COUNT = struct.Struct("<I")
+TERM_KINDS = frozenset(b"UBL")
+
+TURTLE_PREFIX = re.compile(r'^\s*(?:@prefix|PREFIX)\s+[\w.-]*:\s*<([^>]*)>',
+                           re.IGNORECASE)
+TURTLE_BASE = re.compile(r'^\s*(?:@base|BASE)\s+<([^>]*)>', re.IGNORECASE)
+NTRIPLES_SUBJECT = re.compile(r'^\s*<([^>]*)>')
+
+
+def guessFormat(path):
+    """ Returns the format of an ontology file, from its extension or, if
+        the extension is unknown, from its first bytes.
+    :param path: Path of the ontology file.
+    :return: XML, NTRIPLES, TURTLE or BINARY.
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension in FORMATS_BY_EXTENSION:
+        return FORMATS_BY_EXTENSION[extension]
+    with open(path, 'rb') as f:
+        head = f.read(1024)
+    if head.startswith(BINARY_MAGIC):
+        return BINARY
+    stripped = head.lstrip()
+    if stripped.startswith(b"<?xml") or stripped.startswith(b"<rdf:RDF"):
+        return XML
+    if TURTLE_PREFIX.match(stripped) or TURTLE_BASE.match(stripped):
+        return TURTLE
+    if NTRIPLES_SUBJECT.match(stripped):
+        return NTRIPLES
+    return XML
+
+
+def parseOntology(graph, path, format=None):
+    """ Parses an ontology file into a graph.
+    :param graph: rdflib Graph to be filled.
+    :param path: Path of the ontology file.
+    :param format: Format of the file; guessed if None.
+    :return: The filled graph.
+    """
+
+    format = format or guessFormat(path)
+    if format == BINARY:
+        with open(path, 'rb') as f:
+            readBinary(f, graph)
+    else:
+        graph.parse(path, format=format)
+    return graph
+
+
+def serializeOntology(graph, path, format=None):
+    """ Writes a graph into an ontology file.
+    :param graph: rdflib Graph.
+    :param path: Path of the ontology file.
+    :param format: Format of the file; guessed from the extension (or the
+        current content of the file) if None.
+    """
+
+    if format is None:
+        extension = os.path.splitext(path)[1].lower()
+        if extension in FORMATS_BY_EXTENSION or not os.path.exists(path):
+            format = FORMATS_BY_EXTENSION.get(extension, XML)
+        else:
+            format = guessFormat(path)
+    if format == BINARY:
+        with open(path, 'wb') as f:
+            writeBinary(graph, f)
+    else:
+        graph.serialize(path, format=format)
+
+
+def namespaceOf(uri):
+    """ Returns the namespace of a URI: the part before the last '#', or
+        up to the last '/' (included) for slash namespaces.
+    """
+
+    index = uri.rfind('#')
+    if index >= 0:
+        return uri[:index]
+    return uri[:uri.rfind('/') + 1]
+
+
+def scanNamespaces(path, format, maxItems):
+    """ Returns the namespaces declared or used in the header of an
+        ontology file that is not RDF/XML: the @prefix and @base
+        declarations of Turtle, the namespaces of the subjects of the
+        first maxItems N-Triples statements and the first maxItems
+        namespaces of a binary snapshot. Only the header is read: the scan
+        of a Turtle file stops at its first statement, and that of a
+        binary snapshot after its namespace section.
+    :param path: Path of the ontology file.
+    :param format: NTRIPLES, TURTLE or BINARY.
+    :param maxItems: Maximum number of lines (or terms) to be read.
+    :return: Set of namespaces.
+    """
+
+    namespaces = set()
+    if format == BINARY:
+        with open(path, 'rb') as f:
+            readMagic(f)
+            return set(readStrings(f)[:maxItems])
+    with open(path, 'rb') as f:
+        for count, line in enumerate(f):
+            if count >= maxItems:
+                break
+            if format == TURTLE:
+                match = TURTLE_PREFIX.match(line) or TURTLE_BASE.match(line)
+                if match:
+                    namespaces.add(match.group(1))
+                elif line.strip() and not line.lstrip().startswith(b"#"):
+                    # Directives precede the statements that use them
+                    break
+            else:
+                match = NTRIPLES_SUBJECT.match(line)
+                if match:
+                    namespaces.add(namespaceOf(match.group(1)))
+    return namespaces
+
+
+def writeBinary(graph, f):
+    """ Writes a graph in the SAI binary format (see the module docstring).
+    :param graph: rdflib Graph.
+    :param f: File opened for writing in binary mode.
+    """
+
+    terms, rawTriples = graphToSnapshot(graph)
+    uses = {}
+    strings = []
+    for term in terms:
+        strings.append(term[1])
+        if term[0] == 'U':
+            namespace = namespaceOf(term[1])
+            uses[namespace] = uses.get(namespace, 0) + 1
+        elif term[0] == 'L':
+            strings.append(term[2] or u"")
+            strings.append(term[3] or u"")
+    f.write(BINARY_MAGIC)
+    writeStrings(f, sorted(uses, key=lambda ns: (-uses[ns], ns)))
+    f.write(COUNT.pack(len(terms)))
+    f.write(b"".join(term[0] for term in terms))
+    writeStrings(f, strings)
+    triples = array('i')
+    triples.fromstring(rawTriples)
+    f.write(COUNT.pack(len(triples)))
+    writeArray(f, triples)
+
+
+def readBinary(f, graph):
+    """ Fills a graph with the triples of a file in the SAI binary format.
+    :param f: File opened for reading in binary mode.
+    :param graph: rdflib Graph to be filled.
+    :raise IOError: If the file is not a valid SAI binary ontology.
+    """
+
+    readMagic(f)
+    readStrings(f)
+    kinds = readExactly(f, readCount(f))
+    if not TERM_KINDS.issuperset(kinds):
+        raise IOError("Unknown term kind in a SAI binary ontology")
+    strings = iter(readStrings(f))
+    terms = []
+    try:
+        for kind in kinds:
+            if kind == 'L':
+                terms.append((kind, next(strings), next(strings) or None,
+                              next(strings) or None))
+            else:
+                terms.append((kind, next(strings)))
+    except StopIteration:
+        raise IOError("Missing term strings in a SAI binary ontology")
+    count = readCount(f)
+    if count % 3:
+        raise IOError("Incomplete triple in a SAI binary ontology")
+    triples = readArray(f, 'i', count)
+    if triples and not 0 <= min(triples) <= max(triples) < len(terms):
+        raise IOError("Unknown term in a SAI binary ontology")
+    # readArray has already converted the ids into native order, the order
+    # of snapshots
+    snapshotToGraph((terms, triples.tostring()), graph)
+
+
+def readMagic(f):
+    """ Reads the magic number at the start of a SAI binary ontology. """
+    if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise IOError("Not a SAI binary ontology (or an older version)")
+
+
+def readExactly(f, size):
+    """ Reads size bytes from a file. Sizes beyond the end of the file are
+        rejected before reading, so a corrupted count cannot make the read
+        allocate more memory than the file holds.
+    """
+
+    if size > os.fstat(f.fileno()).st_size - f.tell():
+        raise IOError("Truncated SAI binary ontology")
+    return f.read(size)
+
+
+def readCount(f):
+    """ Reads a count of items. """
+    return COUNT.unpack(readExactly(f, COUNT.size))[0]
+
+
+def readArray(f, typecode, count):
+    """ Reads count little-endian integers into an array. """
+    values = array(typecode)
+    values.fromstring(readExactly(f, count * values.itemsize))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def writeArray(f, values):
+    """ Writes an array of integers in little-endian order. """
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    f.write(values.tostring())
+
+
+def readStrings(f):
+    """ Reads a list of strings written by writeStrings. """
+    lengths = readArray(f, 'I', readCount(f))
+    data = readExactly(f, sum(lengths))
+    strings = []
+    start = 0
+    for length in lengths:
+        strings.append(data[start:start + length].decode('utf-8'))
+        start += length
+    return strings
+
+
+def writeStrings(f, strings):
+    """ Writes a list of unicode strings: their number, their UTF-8 byte
+        lengths and their UTF-8 bytes.
+    """
+
+    encoded = [string.encode('utf-8') for string in strings]
+    f.write(COUNT.pack(len(encoded)))
+    writeArray(f, array('I', [len(string) for string in encoded]))
+    f.write(b"".join(encoded))
@@ -0,0 +1,112 @@
+"""
+OntologyJournal keeps the changes of an ontology in an append-only
+N-Triples log next to the ontology file, so that a save does not need to
+rewrite the whole RDF/XML file.
+"""
+
+import codecs
+import os
+from rdflib.plugins.parsers.ntriples import NTriplesParser
+from rdflib.term import Literal
+
+JOURNAL_SUFFIX = ".journal.nt"
+ADDED = "A"
+REMOVED = "D"
+
+
+def ntTerm(term):
+    """ Returns the N-Triples form of a term. It is the n3() form of the
+        term, except for literals: n3() writes those with newlines or
+        quotes as triple-quoted strings, which N-Triples does not allow,
+        so they are always written as one-line quoted strings.
+    :param term: rdflib URIRef, BNode or Literal.
+    :return: unicode string.
+    """
+
+    if not isinstance(term, Literal):
+        return term.n3()
+    text = u'"%s"' % (term.replace(u'\\', u'\\\\').replace(u'"', u'\\"')
+                      .replace(u'\n', u'\\n').replace(u'\r', u'\\r'))
+    if term.language:
+        return u"%s@%s" % (text, term.language)
+    if term.datatype:
+        return u"%s^^%s" % (text, term.datatype.n3())
+    return text
+
+
+def ntRow(triple):
+    """ Returns the N-Triples line of an (s, p, o) triple. """
+    return u"%s %s %s .\n" % tuple(ntTerm(term) for term in triple)
+
+
+class JournalSink(object):
+    """ Receives the triples parsed from the journal and applies them to a
+        graph. """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.adding = True
+
+    def triple(self, s, p, o):
+        if self.adding:
+            self.graph.add((s, p, o))
+        else:
+            self.graph.remove((s, p, o))
+
+
+class OntologyJournal(object):
+    """ Append-only log of the triples added to and removed from an
+        ontology. Every line is an N-Triples statement preceded by 'A '
+        (added) or 'D ' (removed); lines are replayed in order on top of
+        the graph parsed from the ontology file. Blank nodes get new
+        identifiers when they are replayed, so only changes of named
+        resources and literals should be journaled.
+    """
+
+    def __init__(self, ontologyPath):
+        self.path = ontologyPath + JOURNAL_SUFFIX
+
+    def size(self):
+        """ Returns the size of the journal in bytes; 0 if there is none. """
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def append(self, added, removed):
+        """ Appends one save to the journal.
+        :param added: Iterable of the (s, p, o) triples added to the graph.
+        :param removed: Iterable of the (s, p, o) triples removed from it.
+        """
+
+        lines = [u"%s %s" % (REMOVED, ntRow(triple)) for triple in removed]
+        lines.extend(u"%s %s" % (ADDED, ntRow(triple)) for triple in added)
+        if lines:
+            with codecs.open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+
+    def replay(self, graph):
+        """ Applies the changes of the journal to a graph.
+        :param graph: rdflib Graph parsed from the ontology file.
+        :return: Number of changes applied.
+        """
+
+        if not os.path.exists(self.path):
+            return 0
+        sink = JournalSink(graph)
+        parser = NTriplesParser(sink)
+        count = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if len(line) < 2:
+                    continue
+                sink.adding = line[0] == ADDED
+                parser.parsestring(line[2:])
+                count += 1
+        return count
+
+    def clear(self):
+        """ Removes the journal, e.g. after it has been compacted into the
+            ontology file. """
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,325 @@
+"""
+PathBounds computes the exact bounding boxes of SVG paths scanned by
+PathData, taking the extents of their curves into account: the roots of
+the derivatives of cubic and quadratic Bezier curves and the extrema of
+elliptical arcs. The bounding boxes of many paths are computed in batch
+with NumPy; bounds computes them for one path without NumPy.
+"""
+
+import math
+from array import array
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from PathData import LINE, QUADRATIC, CUBIC, ARC, STRIDE
+import SVGTransform
+
+# The derivative of a cubic curve is taken as linear when its quadratic
+# coefficient is this small relative to the others
+LINEAR_TOLERANCE = 1e-12
+# Arcs whose radii fall short of their end points by less than this
+# (relative) are half ellipses centered between their end points; solving
+# for the center of such arcs loses half of the significant digits
+HALF_ARC_TOLERANCE = 1e-9
+
+
+def isAvailable():
+    """ Returns whether NumPy, needed by batchBounds, is installed. """
+    return numpy is not None
+
+
+def cubicExtrema(p0, p1, p2, p3):
+    """ Returns the values of one coordinate of a cubic Bezier curve at the
+        roots of its derivative in (0, 1).
+    :param p0, p1, p2, p3: The coordinate of the start point, the control
+        points and the end point.
+    """
+
+    a = -p0 + 3 * p1 - 3 * p2 + p3
+    b = 2 * (p0 - 2 * p1 + p2)
+    c = p1 - p0
+    if abs(a) <= LINEAR_TOLERANCE * (abs(b) + abs(c)):
+        roots = [-c / b] if b != 0 else []
+    else:
+        discriminant = b * b - 4 * a * c
+        if discriminant < 0:
+            return []
+        root = math.sqrt(discriminant)
+        roots = [(-b + root) / (2 * a), (-b - root) / (2 * a)]
+    values = []
+    for t in roots:
+        if 0 < t < 1:
+            mt = 1 - t
+            values.append(mt * mt * mt * p0 + 3 * mt * mt * t * p1 +
+                          3 * mt * t * t * p2 + t * t * t * p3)
+    return values
+
+
+def quadraticExtrema(p0, p1, p2):
+    """ Returns the value of one coordinate of a quadratic Bezier curve at
+        the root of its derivative in (0, 1), if any.
+    :param p0, p1, p2: The coordinate of the start point, the control point
+        and the end point.
+    """
+
+    denominator = p0 - 2 * p1 + p2
+    if denominator == 0:
+        return []
+    t = (p0 - p1) / denominator
+    if not 0 < t < 1:
+        return []
+    mt = 1 - t
+    return [mt * mt * p0 + 2 * mt * t * p1 + t * t * p2]
+
+
+def arcExtrema(x0, y0, rx, ry, rotation, flags, x, y):
+    """ Returns the extreme x and y coordinates reached inside an elliptical
+        arc, converting it into center parameterization as described in
+        https://www.w3.org/TR/SVG/implnote.html#ArcImplementationNotes
+    :param x0, y0: The start point.
+    :param rx, ry, rotation, flags: The radii, the x-axis rotation (degrees)
+        and 2 * large-arc-flag + sweep-flag.
+    :param x, y: The end point.
+    :return: A pair of lists (x coordinates, y coordinates).
+    """
+
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0 or (x0 == x and y0 == y):
+        # A straight line, or no arc at all
+        return [], []
+    phi = rotation * math.pi / 180
+    cosPhi, sinPhi = math.cos(phi), math.sin(phi)
+    dx, dy = (x0 - x) / 2, (y0 - y) / 2
+    x1 = cosPhi * dx + sinPhi * dy
+    y1 = -sinPhi * dx + cosPhi * dy
+    reach = x1 * x1 / (rx * rx) + y1 * y1 / (ry * ry)
+    if reach >= 1 - HALF_ARC_TOLERANCE:
+        # The radii are scaled up (or down, within the tolerance) so that
+        # the arc is a half ellipse
+        scale = math.sqrt(reach)
+        rx, ry = rx * scale, ry * scale
+        coefficient = 0.0
+    else:
+        numerator = rx * rx * ry * ry - rx * rx * y1 * y1 - \
+            ry * ry * x1 * x1
+        denominator = rx * rx * y1 * y1 + ry * ry * x1 * x1
+        coefficient = math.sqrt(max(0.0, numerator / denominator))
+    if (flags >= 2) == (flags % 2 == 1):
+        coefficient = -coefficient
+    cx1 = coefficient * rx * y1 / ry
+    cy1 = -coefficient * ry * x1 / rx
+    cx = cosPhi * cx1 - sinPhi * cy1 + (x0 + x) / 2
+    cy = sinPhi * cx1 + cosPhi * cy1 + (y0 + y) / 2
+    start = math.atan2((y1 - cy1) / ry, (x1 - cx1) / rx)
+    sweep = math.atan2((-y1 - cy1) / ry, (-x1 - cx1) / rx) - start
+    if flags % 2 == 0 and sweep > 0:
+        sweep -= 2 * math.pi
+    elif flags % 2 == 1 and sweep < 0:
+        sweep += 2 * math.pi
+    thetaX = math.atan2(-ry * sinPhi, rx * cosPhi)
+    thetaY = math.atan2(ry * cosPhi, rx * sinPhi)
+    xs, ys = [], []
+    for theta, values, isX in ((thetaX, xs, True),
+                               (thetaX + math.pi, xs, True),
+                               (thetaY, ys, False),
+                               (thetaY + math.pi, ys, False)):
+        if sweep >= 0:
+            inside = (theta - start) % (2 * math.pi) <= sweep
+        else:
+            inside = (start - theta) % (2 * math.pi) <= -sweep
+        if inside:
+            cosTheta, sinTheta = math.cos(theta), math.sin(theta)
+            if isX:
+                values.append(cx + rx * cosPhi * cosTheta -
+                              ry * sinPhi * sinTheta)
+            else:
+                values.append(cy + rx * sinPhi * cosTheta +
+                              ry * cosPhi * sinTheta)
+    return xs, ys
+
+
+def bounds(kinds, coords):
+    """ Returns the bounding box of a path.
+    :param kinds, coords: The output of PathData.scan.
+    :return: (minX, minY, maxX, maxY), or None if the path has no segments.
+    """
+
+    if not kinds:
+        return None
+    xs = list(coords[0::STRIDE]) + list(coords[6::STRIDE])
+    ys = list(coords[1::STRIDE]) + list(coords[7::STRIDE])
+    for segment, kind in enumerate(kinds):
+        if kind == LINE:
+            continue
+        x0, y0, x1, y1, x2, y2, x3, y3 = \
+            coords[segment * STRIDE:(segment + 1) * STRIDE]
+        if kind == CUBIC:
+            xs.extend(cubicExtrema(x0, x1, x2, x3))
+            ys.extend(cubicExtrema(y0, y1, y2, y3))
+        elif kind == QUADRATIC:
+            xs.extend(quadraticExtrema(x0, x1, x3))
+            ys.extend(quadraticExtrema(y0, y1, y3))
+        else:
+            arcXs, arcYs = arcExtrema(x0, y0, x1, y1, x2, y2, x3, y3)
+            xs.extend(arcXs)
+            ys.extend(arcYs)
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def cubicExtremaArray(p0, p1, p2, p3):
+    """ Batch version of cubicExtrema: returns two arrays with the values at
+        the two roots, NaN where there is no root in (0, 1).
+    """
+
+    a = -p0 + 3 * p1 - 3 * p2 + p3
+    b = 2 * (p0 - 2 * p1 + p2)
+    c = p1 - p0
+    linear = numpy.abs(a) <= LINEAR_TOLERANCE * (numpy.abs(b) +
+                                                 numpy.abs(c))
+    root = numpy.sqrt(b * b - 4 * a * c)
+    roots = (numpy.where(linear, -c / b, (-b + root) / (2 * a)),
+             numpy.where(linear, numpy.nan, (-b - root) / (2 * a)))
+    values = []
+    for t in roots:
+        mt = 1 - t
+        value = mt * mt * mt * p0 + 3 * mt * mt * t * p1 + \
+            3 * mt * t * t * p2 + t * t * t * p3
+        values.append(numpy.where((t > 0) & (t < 1), value, numpy.nan))
+    return values
+
+
+def quadraticExtremaArray(p0, p1, p2):
+    """ Batch version of quadraticExtrema: returns an array with the values
+        at the roots, NaN where there is no root in (0, 1).
+    """
+
+    t = (p0 - p1) / (p0 - 2 * p1 + p2)
+    mt = 1 - t
+    value = mt * mt * p0 + 2 * mt * t * p1 + t * t * p2
+    return [numpy.where((t > 0) & (t < 1), value, numpy.nan)]
+
+
+def arcExtremaArray(x0, y0, rx, ry, rotation, flags, x, y):
+    """ Batch version of arcExtrema: returns two lists of two arrays (x
+        and y coordinates at the two extrema of each axis), NaN where the
+        extremum is not inside the arc.
+    """
+
+    rx, ry = numpy.abs(rx), numpy.abs(ry)
+    degenerate = (rx == 0) | (ry == 0) | ((x0 == x) & (y0 == y))
+    phi = rotation * numpy.pi / 180
+    cosPhi, sinPhi = numpy.cos(phi), numpy.sin(phi)
+    dx, dy = (x0 - x) / 2, (y0 - y) / 2
+    x1 = cosPhi * dx + sinPhi * dy
+    y1 = -sinPhi * dx + cosPhi * dy
+    reach = x1 * x1 / (rx * rx) + y1 * y1 / (ry * ry)
+    half = reach >= 1 - HALF_ARC_TOLERANCE
+    scale = numpy.where(half, numpy.sqrt(reach), 1.0)
+    rx, ry = rx * scale, ry * scale
+    numerator = rx * rx * ry * ry - rx * rx * y1 * y1 - ry * ry * x1 * x1
+    denominator = rx * rx * y1 * y1 + ry * ry * x1 * x1
+    coefficient = numpy.where(half, 0.0, numpy.sqrt(
+        numpy.maximum(0.0, numerator / denominator)))
+    sweepFlag = flags % 2 == 1
+    coefficient = numpy.where((flags >= 2) == sweepFlag, -coefficient,
+                              coefficient)
+    cx1 = coefficient * rx * y1 / ry
+    cy1 = -coefficient * ry * x1 / rx
+    cx = cosPhi * cx1 - sinPhi * cy1 + (x0 + x) / 2
+    cy = sinPhi * cx1 + cosPhi * cy1 + (y0 + y) / 2
+    start = numpy.arctan2((y1 - cy1) / ry, (x1 - cx1) / rx)
+    sweep = numpy.arctan2((-y1 - cy1) / ry, (-x1 - cx1) / rx) - start
+    sweep = numpy.where(~sweepFlag & (sweep > 0), sweep - 2 * numpy.pi,
+                        sweep)
+    sweep = numpy.where(sweepFlag & (sweep < 0), sweep + 2 * numpy.pi, sweep)
+    thetaX = numpy.arctan2(-ry * sinPhi, rx * cosPhi)
+    thetaY = numpy.arctan2(ry * cosPhi, rx * sinPhi)
+    xs, ys = [], []
+    for theta, values, isX in ((thetaX, xs, True),
+                               (thetaX + numpy.pi, xs, True),
+                               (thetaY, ys, False),
+                               (thetaY + numpy.pi, ys, False)):
+        inside = numpy.where(sweep >= 0,
+                             (theta - start) % (2 * numpy.pi) <= sweep,
+                             (start - theta) % (2 * numpy.pi) <= -sweep)
+        cosTheta, sinTheta = numpy.cos(theta), numpy.sin(theta)
+        if isX:
+            value = cx + rx * cosPhi * cosTheta - ry * sinPhi * sinTheta
+        else:
+            value = cy + rx * sinPhi * cosTheta + ry * cosPhi * sinTheta
+        values.append(numpy.where(inside & ~degenerate, value, numpy.nan))
+    return xs, ys
+
+
+def batchBounds(paths, matrices=None):
+    """ Computes the bounding boxes of many paths at once: the extrema of
+        all curve segments of all paths are solved with NumPy, and reduced
+        per path.
+    :param paths: List of outputs of PathData.scan.
+    :param matrices: List of the transform matrices of the paths, which
+        are applied to their segments first (optional).
+    :return: Array of one (minX, minY, maxX, maxY) row per path; the rows
+        of paths without segments are NaN.
+    """
+
+    result = numpy.empty((len(paths), 4))
+    result.fill(numpy.nan)
+    kinds = array('b')
+    coords = array('d')
+    counts = []
+    for pathKinds, pathCoords in paths:
+        kinds.extend(pathKinds)
+        coords.extend(pathCoords)
+        counts.append(len(pathKinds))
+    if not kinds:
+        return result
+    kinds = numpy.frombuffer(kinds, dtype=numpy.int8)
+    segments = numpy.frombuffer(coords, dtype=float).reshape(-1, STRIDE)
+    if matrices is not None:
+        transformed = numpy.repeat([matrix != SVGTransform.IDENTITY
+                                    for matrix in matrices], counts)
+        rows = numpy.flatnonzero(transformed)
+        if len(rows):
+            segmentMatrices = numpy.repeat(numpy.array(matrices, dtype=float),
+                                           counts, axis=0)
+            segments[rows] = SVGTransform.transformSegmentsArray(
+                kinds[rows], segments[rows], segmentMatrices[rows])
+    columns = {}
+    for axis in (0, 1):
+        # Start and end points of every segment, and the extrema of curves
+        candidates = [segments[:, axis], segments[:, 6 + axis]]
+        columns[axis] = candidates
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        for kind in (CUBIC, QUADRATIC, ARC):
+            rows = numpy.flatnonzero(kinds == kind)
+            if not len(rows):
+                continue
+            s = segments[rows]
+            if kind == ARC:
+                extrema = arcExtremaArray(*[s[:, i] for i in xrange(STRIDE)])
+            for axis in (0, 1):
+                if kind == CUBIC:
+                    values = cubicExtremaArray(s[:, axis], s[:, 2 + axis],
+                                               s[:, 4 + axis], s[:, 6 + axis])
+                elif kind == QUADRATIC:
+                    values = quadraticExtremaArray(s[:, axis], s[:, 2 + axis],
+                                                   s[:, 6 + axis])
+                else:
+                    values = extrema[axis]
+                for value in values:
+                    column = numpy.empty(len(kinds))
+                    column.fill(numpy.nan)
+                    column[rows] = value
+                    columns[axis].append(column)
+    # Segments are stored path after path; reduce those of each path
+    counts = numpy.array(counts)
+    found = numpy.flatnonzero(counts)
+    starts = (numpy.cumsum(counts) - counts)[found]
+    for axis in (0, 1):
+        candidates = numpy.vstack(columns[axis])
+        minimum = numpy.fmin.reduce(candidates, axis=0)
+        maximum = numpy.fmax.reduce(candidates, axis=0)
+        result[found, axis] = numpy.minimum.reduceat(minimum, starts)
+        result[found, 2 + axis] = numpy.maximum.reduceat(maximum, starts)
+    return result
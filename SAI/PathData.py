@@ -0,0 +1,172 @@
+"""
+PathData scans the d attribute of SVG path elements into the absolute
+coordinates of their segments, without building segment objects.
+"""
+
+import re
+from array import array
+
+# Kinds of segment
+LINE, QUADRATIC, CUBIC, ARC = range(4)
+# Floats per segment in the coordinate array: the start point, two control
+# points and the end point. Lines repeat their start and end points as
+# control points, and quadratic curves their only control point. Arcs keep
+# (rx, ry) instead of the first control point, and (x-axis rotation,
+# 2 * large-arc-flag + sweep-flag) instead of the second one.
+STRIDE = 8
+
+COMMANDS = frozenset("MmZzLlHhVvCcSsQqTtAa")
+# A command or a number
+TOKEN_RE = re.compile(r"[MmZzLlHhVvCcSsQqTtAa]|"
+                      r"[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?")
+
+
+def scan(pathData):
+    """ Scans path data into its segments, as svg.path.parse_path, writing
+        their absolute coordinates into a preallocated array. The path data
+        is split into commands and numbers with one regular expression.
+    :param pathData: Value of the d attribute of a path.
+    :return: A pair (kinds, coordinates) of arrays: the kind of every
+        segment and STRIDE floats per segment.
+    :raise ValueError: If the path data is malformed.
+    """
+
+    tokens = TOKEN_RE.findall(pathData)
+    # Every segment takes at least one token
+    count = len(tokens)
+    kinds = array('b', [LINE]) * count
+    coords = array('d', [0.0]) * (STRIDE * count)
+    segment = 0
+    # Current point, start of the current subpath, last control point of
+    # the previous segment and its command (for S and T)
+    x = y = startX = startY = controlX = controlY = 0.0
+    previous = upper = None
+    relative = False
+    i = 0
+    try:
+        while i < count:
+            token = tokens[i]
+            if token in COMMANDS:
+                upper = token.upper()
+                relative = token != upper
+                i += 1
+                if upper == "Z":
+                    if x != startX or y != startY:
+                        kinds[segment] = LINE
+                        coords[segment * STRIDE:(segment + 1) * STRIDE] = \
+                            array('d', (x, y, x, y, startX, startY, startX,
+                                        startY))
+                        segment += 1
+                    x, y = startX, startY
+                    # Numbers cannot follow a closepath
+                    previous, upper = "Z", None
+                    continue
+                if upper == "M":
+                    endX, endY = float(tokens[i]), float(tokens[i + 1])
+                    i += 2
+                    if relative:
+                        endX += x
+                        endY += y
+                    x, y = startX, startY = endX, endY
+                    # Further pairs of a moveto are linetos
+                    previous = upper = "L"
+                    continue
+            if upper == "L":
+                endX, endY = float(tokens[i]), float(tokens[i + 1])
+                i += 2
+                if relative:
+                    endX += x
+                    endY += y
+                kind, x1, y1, x2, y2 = LINE, x, y, endX, endY
+            elif upper == "C":
+                x1, y1, x2, y2, endX, endY = map(float, tokens[i:i + 6])
+                i += 6
+                if relative:
+                    x1 += x
+                    y1 += y
+                    x2 += x
+                    y2 += y
+                    endX += x
+                    endY += y
+                kind = CUBIC
+            elif upper == "H":
+                endX, endY = float(tokens[i]), y
+                i += 1
+                if relative:
+                    endX += x
+                kind, x1, y1, x2, y2 = LINE, x, y, endX, endY
+            elif upper == "V":
+                endX, endY = x, float(tokens[i])
+                i += 1
+                if relative:
+                    endY += y
+                kind, x1, y1, x2, y2 = LINE, x, y, endX, endY
+            elif upper == "S":
+                if previous in ("C", "S"):
+                    # Reflection of the previous control point
+                    x1, y1 = x + x - controlX, y + y - controlY
+                else:
+                    x1, y1 = x, y
+                x2, y2, endX, endY = map(float, tokens[i:i + 4])
+                i += 4
+                if relative:
+                    x2 += x
+                    y2 += y
+                    endX += x
+                    endY += y
+                kind = CUBIC
+            elif upper == "Q":
+                x1, y1, endX, endY = map(float, tokens[i:i + 4])
+                i += 4
+                if relative:
+                    x1 += x
+                    y1 += y
+                    endX += x
+                    endY += y
+                kind, x2, y2 = QUADRATIC, x1, y1
+            elif upper == "T":
+                if previous in ("Q", "T"):
+                    x1, y1 = x + x - controlX, y + y - controlY
+                else:
+                    x1, y1 = x, y
+                endX, endY = float(tokens[i]), float(tokens[i + 1])
+                i += 2
+                if relative:
+                    endX += x
+                    endY += y
+                kind, x2, y2 = QUADRATIC, x1, y1
+            elif upper == "A":
+                x1, y1, x2 = map(float, tokens[i:i + 3])
+                i += 3
+                flags = ""
+                while len(flags) < 2:
+                    flags += tokens[i]
+                    i += 1
+                if len(flags) > 2:
+                    # Flags need no separator, e.g. "0110" is 0, 1 and 10
+                    i -= 1
+                    tokens[i] = flags[2:]
+                if flags[0] not in "01" or flags[1] not in "01":
+                    raise ValueError("Wrong arc flags in %s" % pathData)
+                endX, endY = float(tokens[i]), float(tokens[i + 1])
+                i += 2
+                if relative:
+                    endX += x
+                    endY += y
+                kind, y2 = ARC, 2 * int(flags[0]) + int(flags[1])
+            else:
+                raise ValueError("Unallowed implicit command in %s"
+                                 % pathData)
+            kinds[segment] = kind
+            coords[segment * STRIDE:(segment + 1) * STRIDE] = \
+                array('d', (x, y, x1, y1, x2, y2, endX, endY))
+            segment += 1
+            x, y = endX, endY
+            controlX, controlY = x2, y2
+            previous = upper
+    except IndexError:
+        raise ValueError("Missing numbers at the end of %s" % pathData)
+    # Movetos and closepaths at the start of their subpath add no segment
+    del kinds[segment:]
+    del coords[segment * STRIDE:]
+    return kinds, coords
@@ -5,47 +5,551 @@ Created on Apr 27, 2016
 
 import rdflib
 from rdflib.term import URIRef
-from rdflib import RDF
+from rdflib import RDF, RDFS, Namespace
+from rdflib.plugins.sparql import prepareQuery
+from ClassHierarchy import ClassHierarchy
+from GraphCache import snapshotToGraph
+from TermTable import TermTable
+from IdIndex import IdIndex
+from LazyMapping import LazyMapping
+from OntologyJournal import OntologyJournal
+from OntologyFormat import parseOntology, serializeOntology
 import const as c
 
+OWL_CLASS = URIRef("%s#Class" % c.OWL_NS)
+OWL_NAMED_INDIVIDUAL = URIRef("%s#NamedIndividual" % c.OWL_NS)
+OWL_OBJECT_PROPERTY = URIRef("%s#ObjectProperty" % c.OWL_NS)
+OWL_DATATYPE_PROPERTY = URIRef("%s#DatatypeProperty" % c.OWL_NS)
+OWL_UNION_OF = URIRef("%s#unionOf" % c.OWL_NS)
+# Version of the indexes returned by getIndexes; cached indexes of any
+# other version are rebuilt
+INDEXES_VERSION = 4
+
+QUERY_NS = {"rdf": RDF, "rdfs": RDFS, "owl": Namespace("%s#" % c.OWL_NS)}
+# Queries are parsed once; their variables are bound with initBindings
+PREPARED_QUERIES = {
+    "domainOfProperty": prepareQuery(
+        """SELECT DISTINCT ?dom
+           WHERE { ?property rdfs:domain ?dom }""", initNs=QUERY_NS),
+    "rangeOfProperty": prepareQuery(
+        """SELECT DISTINCT ?range
+           WHERE { ?property rdfs:range ?range }""", initNs=QUERY_NS),
+    "getSVGElementsOfInstance": prepareQuery(
+        """SELECT ?id
+           WHERE {
+               ?ind rdf:type owl:NamedIndividual .
+               ?ind ?hasSVGElement ?id
+           }""", initNs=QUERY_NS),
+    "classOfIndividual": prepareQuery(
+        """SELECT ?cl
+           WHERE { ?ind rdf:type ?cl
+               FILTER EXISTS { ?ind rdf:type owl:NamedIndividual }
+           }""", initNs=QUERY_NS)
+}
+
 
 class RDFReader(object):
     """ This class enables us the operation with .rdf ontology. The basic
         basic functionality is - load data from ontology, save data to
         ontology, create a tree view of the data using SPARQL. """
 
-    def __init__(self, path, namespace):
+    def __init__(self, path, namespace, bulkLoad=True, cache=None,
+                 store=None, lazy=False, format=None):
         self.filePath = path
+        # Format of the ontology file (see OntologyFormat); detected from
+        # the file when the graph is loaded if None
+        self.format = format
         self.namespace = namespace
         self.namespacePrefix = "<%s#>" % self.namespace
-        self.graph = rdflib.Graph()
-        self.graph.load(path)
+        # Local name <-> URIRef table of the ontology namespace
+        self.terms = TermTable(namespace)
+        # GraphCache instance, or None if the ontology is not cached
+        self.cache = cache
+        # GraphStore instance, or None if the graph is kept in memory
+        self.store = store
+        # 'True' once the graph in the store has been changed
+        self.storeChanged = False
+        # Changes saved since the ontology file was last written
+        self.journal = OntologyJournal(path)
+        self._graph = None
+        # Key: (s, p, o) triple changed since the last save; Value: 'True'
+        # if it was added, 'False' if it was removed
+        self.changes = {}
+        # Triples added in the current batch (see beginBatch), not yet in
+        # the graph; None when triples are added to the graph directly.
+        # Key: subject; Value: set of (predicate, object) pairs
+        self.batchAdds = None
+        # Values set in the current batch, which replace the values of
+        # their datatype properties in the graph when it is committed.
+        # Key: subject; Value: dict from predicate to object
+        self.batchValues = None
+        # Incremented on every change of the graph made through this reader
+        self.generation = 0
+        # Key: (query name, bindings); Value: (generation, result)
+        self.queryResults = {}
+        # Key: query name; Value: {"hits": n, "misses": m}
+        self.queryStats = dict((name, {"hits": 0, "misses": 0})
+                               for name in PREPARED_QUERIES)
         self.ontologyTree = []
         # Index: Property Name; Values: Entities that belong to its range
         self.rangesByProperty = {}
         # Index: Property Name; Values: Entities that belong to its domain
         self.domainsByProperty = {}
         self.instancesbyClass = {}
+        # Index: Property Name; Values: [subject, property, object] lists
+        self.propertyTriples = {}
+        # IdIndex of the instance names; built on first use if None
+        self._idIndex = None
+        if lazy:
+            # Nothing is cached: the lazy indexes only load what is used
+            self.initializeLazyIndexes()
+            return
+        indexes = None
+        if cache is not None:
+            indexes = cache.loadIndexes(path, namespace)
+        if indexes is not None and \
+                indexes.get("version") == INDEXES_VERSION and \
+                indexes.get("journal") == self.journal.size():
+            self.restoreIndexes(indexes)
+        else:
+            self.buildIndexes(bulkLoad)
+            if cache is not None:
+                cache.storeIndexes(path, namespace, self.getIndexes())
+
+    @property
+    def graph(self):
+        """ rdflib Graph of the ontology. It is parsed (or read from the
+            cache) the first time it is used, so that loading an ontology
+            whose indexes are cached does not need the graph at all.
+        """
+
+        if self._graph is None:
+            self._graph = self.loadGraph()
+        return self._graph
+
+    def loadGraph(self):
+        """ Opens the graph of the ontology in the persistent store, if
+            any. Otherwise, reads it from the cache if possible, or parses
+            the ontology file (and caches the result). The changes of the
+            journal are applied on top of it.
+        :return: rdflib Graph.
+        """
+
+        if self.store is not None:
+            graph = self.store.open(self.filePath, self.format)
+            self.journal.replay(graph)
+            return graph
+        graph = rdflib.Graph()
+        snapshot = None
+        if self.cache is not None:
+            snapshot = self.cache.load(self.filePath)
+        if snapshot is not None:
+            snapshotToGraph(snapshot, graph)
+        else:
+            parseOntology(graph, self.filePath, self.format)
+            if self.cache is not None:
+                self.cache.store(self.filePath, graph)
+        self.journal.replay(graph)
+        return graph
+
+    @property
+    def idIndex(self):
+        """ IdIndex of the instance names. In lazy mode, it is built from
+            the graph the first time it is used.
+        """
+
+        if self._idIndex is None:
+            self._idIndex = IdIndex(
+                self.terms.localName(s) for s in
+                set(self.graph.subjects(RDF.type, OWL_NAMED_INDIVIDUAL)))
+        return self._idIndex
+
+    @idIndex.setter
+    def idIndex(self, idIndex):
+        self._idIndex = idIndex
+
+    def buildIndexes(self, bulkLoad=True):
+        """ Initialize instancesbyClass, the property lists, domains, ranges,
+            property triples and the class hierarchy from the graph.
+        :param bulkLoad: If it is 'True', instances are loaded in bulk
+            instead of with one query per instance.
+        """
+
         # Initialize instancesbyClass. e.g.
         # {"Graphic_Object", {"annotation123", [path123, rect567]}}
-        instanceList = self.getInstanceList()
-        for entity, instances in instanceList.iteritems():
-            if entity not in self.instancesbyClass:
-                self.instancesbyClass[entity] = {}
-            for instance in instances:
-                self.instancesbyClass[entity][instance] = \
-                    self.getSVGElementsOfInstance(instance)
-        self.objectProperties = self.getObjectPropertyList()
-        self.dataTypeProperties = self.getDatatypePropertyList()
+        if bulkLoad:
+            self.bulkLoad()
+        else:
+            instanceList = self.getInstanceList()
+            for entity, instances in instanceList.iteritems():
+                if entity not in self.instancesbyClass:
+                    self.instancesbyClass[entity] = {}
+                for instance in instances:
+                    self.instancesbyClass[entity][instance] = \
+                        self.getSVGElementsOfInstance(instance)
+            self.objectProperties = self.getObjectPropertyList()
+            self.dataTypeProperties = self.getDatatypePropertyList()
+        self.initializeDomainsAndRanges()
+        self.initializePropertyTriples()
+        self.hierarchy = self.buildClassHierarchy()
+        self.idIndex = IdIndex(instance
+                               for instances in self.instancesbyClass.values()
+                               for instance in instances)
+
+    def getIndexes(self):
+        """ Returns the indexes built from the graph, to be cached.
+        :return: dict with the indexes.
+        """
+
+        return {"version": INDEXES_VERSION,
+                "journal": self.journal.size(),
+                "instancesbyClass": self.instancesbyClass,
+                "objectProperties": self.objectProperties,
+                "dataTypeProperties": self.dataTypeProperties,
+                "domainsByProperty": self.domainsByProperty,
+                "rangesByProperty": self.rangesByProperty,
+                "propertyTriples": self.propertyTriples,
+                "hierarchy": self.hierarchy,
+                "idIndex": self.idIndex}
+
+    def restoreIndexes(self, indexes):
+        """ Restores the indexes returned by getIndexes.
+        :param indexes: dict with the indexes.
+        """
+
+        self.instancesbyClass = indexes["instancesbyClass"]
+        self.objectProperties = indexes["objectProperties"]
+        self.dataTypeProperties = indexes["dataTypeProperties"]
+        self.domainsByProperty = indexes["domainsByProperty"]
+        self.rangesByProperty = indexes["rangesByProperty"]
+        self.propertyTriples = indexes["propertyTriples"]
+        self.hierarchy = indexes["hierarchy"]
+        self.idIndex = indexes["idIndex"]
+
+    def initializeLazyIndexes(self):
+        """ Initialize the indexes in lazy mode. The property lists,
+            domains, ranges and class hierarchy are built as usual, since
+            their size does not depend on the number of annotations, while
+            instancesbyClass and propertyTriples are LazyMappings: the
+            instances of an entity, the SVG elements of an instance and the
+            triples of a property are loaded when they are first accessed.
+            Only entities declared as owl:Class or taking part in the class
+            hierarchy are candidate keys of instancesbyClass. The GUI uses
+            this mode to save, compact and export, but not to load an
+            ontology, which reads every instance into its trees and JSON
+            file (see PickerGUI.readerOperation).
+        """
+
+        self.objectProperties = sorted(
+            self.terms.localName(p)
+            for p in self.graph.subjects(RDF.type, OWL_OBJECT_PROPERTY))
+        self.dataTypeProperties = sorted(
+            self.terms.localName(p)
+            for p in self.graph.subjects(RDF.type, OWL_DATATYPE_PROPERTY))
         self.initializeDomainsAndRanges()
+        self.hierarchy = self.buildClassHierarchy()
+        entities = set(self.terms.localName(entity)
+                       for entity in self.hierarchy.entities())
+        entities.update(self.terms.localName(cl)
+                        for cl in self.graph.subjects(RDF.type, OWL_CLASS)
+                        if isinstance(cl, URIRef))
+        entities.difference_update(['NamedIndividual', 'Class'])
+        self.instancesbyClass = LazyMapping(entities, self.loadInstancesOf,
+                                            exactKeys=False)
+        self.propertyTriples = LazyMapping(
+            self.objectProperties + self.dataTypeProperties,
+            self.loadPropertyTriples)
+
+    def loadInstancesOf(self, entityName):
+        """ Returns a LazyMapping with the SVG elements of the instances of
+            an entity, indexed by instance name, or None if the entity has
+            no instances. Used by the lazy instancesbyClass.
+        """
+
+        entityURI = self.terms.uri(entityName)
+        names = [self.terms.localName(s)
+                 for s in self.graph.subjects(RDF.type, entityURI)
+                 if (s, RDF.type, OWL_NAMED_INDIVIDUAL) in self.graph]
+        if not names:
+            return None
+        return LazyMapping(names, self.loadSVGElementsOf)
+
+    def loadSVGElementsOf(self, instanceName):
+        """ Returns the SVG elements of an instance, as bulkLoad does. """
+        instanceURI = self.terms.uri(instanceName)
+        hasSVGElementURI = self.terms.uri(c.HAS_SVG_PROPERTY)
+        return [o.toPython()
+                for o in self.graph.objects(instanceURI, hasSVGElementURI)]
+
+    def initializePropertyTriples(self):
+        """ Initialize propertyTriples with the instances of every object
+            and datatype property, as [subject, property, object] lists.
+        """
+
+        for property in self.objectProperties + self.dataTypeProperties:
+            self.propertyTriples[property] = self.loadPropertyTriples(property)
+
+    def loadPropertyTriples(self, property):
+        """ Returns the instances of a property as [subject, property,
+            object] lists.
+        """
+
+        # Literal objects (e.g. SVG element IDs) are kept as they are
+        # Cast to lists so they can be serialized
+        return [[self.terms.localName(s), property, self.terms.localName(o)]
+                for s, p, o in self.getPropertyInstances(property)]
+
+    def bulkLoad(self):
+        """ Initialize instancesbyClass, objectProperties and
+            dataTypeProperties with two passes over the graph triples (one
+            over rdf:type, one over hasSVGElement) instead of running one
+            SPARQL query per instance. The results are the same as those of
+            getInstanceList, getSVGElementsOfInstance,
+            getObjectPropertyList and getDatatypePropertyList.
+        """
+
+        hasSVGElementURI = self.terms.uri(c.HAS_SVG_PROPERTY)
+        individuals = set()
+        classesOfSubject = {}
+        objectProperties = set()
+        dataTypeProperties = set()
+        for s, p, o in self.graph.triples((None, RDF.type, None)):
+            if o == OWL_NAMED_INDIVIDUAL:
+                individuals.add(s)
+            elif o == OWL_OBJECT_PROPERTY:
+                objectProperties.add(s)
+            elif o == OWL_DATATYPE_PROPERTY:
+                dataTypeProperties.add(s)
+            if s not in classesOfSubject:
+                classesOfSubject[s] = []
+            classesOfSubject[s].append(o)
+
+        svgElementsOfSubject = {}
+        for s, p, o in self.graph.triples((None, hasSVGElementURI, None)):
+            if s in individuals:
+                if s not in svgElementsOfSubject:
+                    svgElementsOfSubject[s] = []
+                svgElementsOfSubject[s].append(o.toPython())
+
+        for individual in individuals:
+            individualName = self.terms.localName(individual)
+            # SVG elements are looked up in the ontology namespace, as in
+            # getSVGElementsOfInstance
+            individualURI = self.terms.uri(individualName)
+            svgElements = svgElementsOfSubject.get(individualURI, [])
+            for cl in classesOfSubject[individual]:
+                entityName = self.terms.localName(cl)
+                if entityName != 'NamedIndividual' and entityName != 'Class':
+                    if entityName not in self.instancesbyClass:
+                        self.instancesbyClass[entityName] = {}
+                    # Each entity gets its own copy of the list, since
+                    # AnnotationEffect edits them in place
+                    self.instancesbyClass[entityName][individualName] = \
+                        list(svgElements)
+
+        self.objectProperties = sorted(self.terms.localName(p)
+                                       for p in objectProperties)
+        self.dataTypeProperties = sorted(self.terms.localName(p)
+                                         for p in dataTypeProperties)
 
     def initializeDomainsAndRanges(self):
-        """ Initialize domainsByProperty and rangesByProperty dictionaries. """
+        """ Initialize domainsByProperty and rangesByProperty dictionaries
+            with one scan over the rdfs:domain and rdfs:range triples.
+            Domains and ranges given as an owl:unionOf class expression are
+            expanded into their member entities.
+        """
+
+        domains = self.collectEntitiesByProperty(RDFS.domain)
+        ranges = self.collectEntitiesByProperty(RDFS.range)
         for property in self.objectProperties:
-            self.domainsByProperty[property] = self.domainOfProperty(property)
-            self.rangesByProperty[property] = self.rangeOfProperty(property)
+            propertyURI = self.terms.uri(property)
+            self.domainsByProperty[property] = domains.get(propertyURI, [])
+            self.rangesByProperty[property] = ranges.get(propertyURI, [])
         for property in self.dataTypeProperties:
-            self.rangesByProperty[property] = self.rangeOfProperty(property)
+            propertyURI = self.terms.uri(property)
+            self.rangesByProperty[property] = ranges.get(propertyURI, [])
+
+    def collectEntitiesByProperty(self, predicate):
+        """ Returns a dict, indexed by property URI, with the names of the
+            entities related to the property by the given predicate
+            (rdfs:domain or rdfs:range).
+        :param predicate: rdfs:domain or rdfs:range URI.
+        :return: dict indexed by property URI with lists of entity names.
+        """
+
+        entitiesByProperty = {}
+        for s, p, o in self.graph.triples((None, predicate, None)):
+            if s not in entitiesByProperty:
+                entitiesByProperty[s] = []
+            for entity in self.expandUnion(o):
+                entityName = self.terms.localName(entity)
+                if entityName not in entitiesByProperty[s]:
+                    entitiesByProperty[s].append(entityName)
+        return entitiesByProperty
+
+    def expandUnion(self, classNode):
+        """ Returns the named classes of an owl:unionOf class expression, or
+            the given class itself if it is a named class.
+        :param classNode: URIRef or BNode of the class.
+        :return: List of URIRefs of named classes.
+        """
+
+        if isinstance(classNode, URIRef):
+            return [classNode]
+        members = []
+        for unionList in self.graph.objects(classNode, OWL_UNION_OF):
+            for member in self.graph.items(unionList):
+                members.extend(self.expandUnion(member))
+        return members
+
+    def buildClassHierarchy(self):
+        """ Builds the class hierarchy index from the rdfs:subClassOf
+            triples between named classes, keyed by their URIs.
+        :return: ClassHierarchy instance.
+        """
+
+        pairs = []
+        for s, p, o in self.graph.triples((None, RDFS.subClassOf, None)):
+            if isinstance(s, URIRef) and isinstance(o, URIRef):
+                pairs.append((s, o))
+        return ClassHierarchy(pairs)
+
+    def runQuery(self, name, **bindings):
+        """ Runs a prepared query with the given variable bindings. Results
+            are cached until the graph is changed through this reader.
+        :param name: Key of the query in PREPARED_QUERIES.
+        :param bindings: Values of the query variables.
+        :return: List of result rows.
+        """
+
+        key = (name, tuple(sorted(bindings.iteritems())))
+        cached = self.queryResults.get(key)
+        if cached is not None and cached[0] == self.generation:
+            self.queryStats[name]["hits"] += 1
+            return cached[1]
+        self.queryStats[name]["misses"] += 1
+        result = list(self.graph.query(PREPARED_QUERIES[name],
+                                       initBindings=bindings))
+        self.queryResults[key] = (self.generation, result)
+        return result
+
+    def getQueryStats(self):
+        """ Returns the number of cache hits and misses of every prepared
+            query, e.g. {"classOfIndividual": {"hits": 3, "misses": 1}}.
+        """
+
+        return dict((name, dict(stats))
+                    for name, stats in self.queryStats.iteritems())
+
+    def addTriple(self, triple):
+        """ Adds a triple to the graph, or to the current batch, and
+            invalidates cached results. """
+        if self.batchAdds is not None:
+            s, p, o = triple
+            self.batchAdds.setdefault(s, set()).add((p, o))
+        else:
+            self.graph.add(triple)
+            self.changes[triple] = True
+        self.graphChanged()
+
+    def removeTriple(self, triple):
+        """ Removes the triples matching a (s, p, o) pattern from the graph
+            and from the current batch, and invalidates cached results.
+        """
+
+        if self.batchAdds is not None:
+            s, p, o = triple
+            for subject in [s] if s is not None else list(self.batchAdds):
+                pending = self.batchAdds.get(subject)
+                if pending:
+                    pending.difference_update(
+                        [(p2, o2) for p2, o2 in pending
+                         if p in (None, p2) and o in (None, o2)])
+            for subject in [s] if s is not None else list(self.batchValues):
+                values = self.batchValues.get(subject, {})
+                for p2, o2 in values.items():
+                    if p in (None, p2) and o in (None, o2):
+                        # The value is removed, with the triples that it
+                        # would have replaced
+                        del values[p2]
+                        self.removeTriple((subject, p2, None))
+        for removed in list(self.graph.triples(triple)):
+            self.changes[removed] = False
+        self.graph.remove(triple)
+        self.graphChanged()
+
+    def beginBatch(self):
+        """ Starts collecting the triples added through addTriple, and the
+            values set through setDatatypeValue, instead of applying them
+            one by one; commitBatch applies them. Removals are still made
+            at once. The hasX methods take the collected changes into
+            account, so they see every change in order; queries only see
+            them after commitBatch.
+        """
+
+        if self.batchAdds is None:
+            self.batchAdds = {}
+            self.batchValues = {}
+
+    def commitBatch(self):
+        """ Applies the changes collected since beginBatch. The triples of
+            every changed subject are read once: the values set replace the
+            other values of their properties if they differ, and the
+            collected triples already in the graph are dropped with a set
+            difference. The rest are added at once with addN, and the
+            changes of the batch are committed as one transaction if the
+            graph is in a persistent store.
+        """
+
+        if self.batchAdds is None:
+            return
+        adds = self.batchAdds
+        values = self.batchValues
+        self.batchAdds = None
+        self.batchValues = None
+        graph = self.graph
+        new = []
+        for s in set(adds) | set(values):
+            existing = set(graph.predicate_objects(s))
+            subjectValues = values.get(s)
+            if subjectValues:
+                for p, o in existing:
+                    if p in subjectValues and subjectValues[p] != o:
+                        graph.remove((s, p, o))
+                        self.changes[(s, p, o)] = False
+                pairs = set(subjectValues.iteritems())
+                pairs.update(adds.get(s, ()))
+            else:
+                pairs = adds[s]
+            new.extend((s, p, o) for p, o in pairs - existing)
+        graph.addN((s, p, o, graph) for s, p, o in new)
+        for triple in new:
+            self.changes[triple] = True
+        if self.store is not None:
+            graph.commit()
+        self.graphChanged()
+
+    def contains(self, triple):
+        """ Returns whether the graph, or the current batch, contains a
+            (s, p, o) triple.
+        """
+
+        if self.batchAdds is not None:
+            s, p, o = triple
+            if (p, o) in self.batchAdds.get(s, ()):
+                return True
+            values = self.batchValues.get(s)
+            if values and p in values:
+                return values[p] == o
+        return triple in self.graph
+
+    def graphChanged(self):
+        """ Invalidates cached results after a change of the graph. A
+            persistent store is marked as changed until it is saved. """
+        self.generation += 1
+        if self.store is not None and not self.storeChanged:
+            self.store.markDirty(self.filePath)
+            self.storeChanged = True
 
     def hasEntity(self, entityName):
         """ Returns whether the given Entity exists in the ontology.
@@ -54,9 +558,8 @@ class RDFReader(object):
             'False' otherwise.
         """
 
-        entityURI = URIRef("%s#%s" % (self.namespace, entityName))
-        owlClassURI = URIRef("%s#Class" % c.OWL_NS)
-        return (entityURI, RDF.type, owlClassURI) in self.graph
+        entityURI = self.terms.uri(entityName)
+        return self.contains((entityURI, RDF.type, OWL_CLASS))
 
     def hasProperty(self, propertyName, type):
         """ Check whether a property exists in the ontology.
@@ -67,13 +570,13 @@ class RDFReader(object):
             in the ontology, 'False' otherwise
         """
 
-        objectURI = URIRef("%s#%s" % (self.namespace, propertyName))
-        dataPropertyURI = URIRef("%s#type" % c.RDF_NS)
+        objectURI = self.terms.uri(propertyName)
+        dataPropertyURI = RDF.type
         if type == "object":
-            subjectURI = URIRef("%s#ObjectProperty" % c.OWL_NS)
+            subjectURI = OWL_OBJECT_PROPERTY
         else:
-            subjectURI = URIRef("%s#DatatypeProperty" % c.OWL_NS)
-        return (objectURI, dataPropertyURI, subjectURI) in self.graph
+            subjectURI = OWL_DATATYPE_PROPERTY
+        return self.contains((objectURI, dataPropertyURI, subjectURI))
 
     def addProperty(self, propertyName, type):
         """ Adds a new property to the ontology (NOT a property instance).
@@ -83,13 +586,13 @@ class RDFReader(object):
         """
 
         if not self.hasProperty(propertyName, type):
-            objectURI = URIRef("%s#%s" % (self.namespace, propertyName))
-            dataPropertyURI = URIRef("%s#type" % c.RDF_NS)
+            objectURI = self.terms.uri(propertyName)
+            dataPropertyURI = RDF.type
             if type == "object":
-                subjectURI = URIRef("%s#ObjectProperty" % c.OWL_NS)
+                subjectURI = OWL_OBJECT_PROPERTY
             else:
-                subjectURI = URIRef("%s#DatatypeProperty" % c.OWL_NS)
-            self.graph.add((objectURI, dataPropertyURI, subjectURI))
+                subjectURI = OWL_DATATYPE_PROPERTY
+            self.addTriple((objectURI, dataPropertyURI, subjectURI))
 
     def hasInstance(self, entityName, instanceName):
         """ Returns whether the given individual (annotation) for an entity
@@ -100,11 +603,10 @@ class RDFReader(object):
             the instanceName.
         """
 
-        entityURI = URIRef("%s#%s" % (self.namespace, entityName))
-        instanceURI = URIRef("%s#%s" % (self.namespace, instanceName))
-        namedIndividualURI = URIRef("%s#%s" % (c.OWL_NS, "NamedIndividual"))
-        return ((instanceURI, RDF.type, entityURI) in self.graph) and \
-               ((instanceURI, RDF.type, namedIndividualURI) in self.graph)
+        entityURI = self.terms.uri(entityName)
+        instanceURI = self.terms.uri(instanceName)
+        return self.contains((instanceURI, RDF.type, entityURI)) and \
+            self.contains((instanceURI, RDF.type, OWL_NAMED_INDIVIDUAL))
 
     def hasSVGElement(self, instanceName, dataPropertyValue):
         """ Returns whether a given instance has a given
@@ -128,10 +630,11 @@ class RDFReader(object):
         :return:
         """
 
-        instanceURI = URIRef("%s#%s" % (self.namespace, instanceName))
-        dataPropertyURI = URIRef("%s#%s" % (self.namespace, datapropertyName))
+        instanceURI = self.terms.uri(instanceName)
+        dataPropertyURI = self.terms.uri(datapropertyName)
         dataPropertyValURI = rdflib.term.Literal(dataPropertyValue)
-        return (instanceURI, dataPropertyURI, dataPropertyValURI) in self.graph
+        return self.contains((instanceURI, dataPropertyURI,
+                              dataPropertyValURI))
 
     def hasCoordinates(self, instanceName, dataPropertyValue):
         """ Returns whether a given instance has a given SVG element
@@ -141,10 +644,10 @@ class RDFReader(object):
         :return:
         """
 
-        instanceURI = URIRef("%s#%s" % (self.namespace, instanceName))
-        dataPropertyURI = URIRef("%s#%s" % (self.namespace, c.HAS_X_COORD_PR))
+        instanceURI = self.terms.uri(instanceName)
+        dataPropertyURI = self.terms.uri(c.HAS_X_COORD_PR)
         dataPrValueURI = rdflib.term.Literal(dataPropertyValue)
-        return (instanceURI, dataPropertyURI, dataPrValueURI) in self.graph
+        return self.contains((instanceURI, dataPropertyURI, dataPrValueURI))
 
     def addInstance(self, entityName, instanceName):
         """ Adds an instance of a given name to a given entity of the ontology
@@ -152,11 +655,12 @@ class RDFReader(object):
         :param instanceName:
         """
 
-        entityURI = URIRef("%s#%s" % (self.namespace, entityName))
-        instanceURI = URIRef("%s#%s" % (self.namespace, instanceName))
-        namedIndividualURI = URIRef("%s#%s" % (c.OWL_NS, "NamedIndividual"))
-        self.graph.add((instanceURI, RDF.type, entityURI))
-        self.graph.add((instanceURI, RDF.type, namedIndividualURI))
+        entityURI = self.terms.uri(entityName)
+        instanceURI = self.terms.uri(instanceName)
+        self.addTriple((instanceURI, RDF.type, entityURI))
+        self.addTriple((instanceURI, RDF.type, OWL_NAMED_INDIVIDUAL))
+        if self._idIndex is not None:
+            self._idIndex.add(instanceName)
 
     def removeInstance(self, instanceName):
         """ Removes an instance with a given name and entity from the ontology.
@@ -164,8 +668,10 @@ class RDFReader(object):
         :param instanceName:
         """
 
-        instanceURI = URIRef("%s#%s" % (self.namespace, instanceName))
-        self.graph.remove((instanceURI, None, None))
+        instanceURI = self.terms.uri(instanceName)
+        self.removeTriple((instanceURI, None, None))
+        if self._idIndex is not None:
+            self._idIndex.remove(instanceName)
 
     def addSVGElementProperty(self, instanceName, dataPropertyValue):
         """ Adds a hasSVGElement data property value to the given
@@ -184,11 +690,14 @@ class RDFReader(object):
         :param dataPrValue:
         """
 
-        if not self.hasDatatypeProperty(instanceName, dataPrName, dataPrValue):
-            instanceURI = URIRef("%s#%s" % (self.namespace, instanceName))
-            dataPropertyURI = URIRef("%s#%s" % (self.namespace, dataPrName))
+        # A batch drops the triples already in the graph when committed
+        if self.batchAdds is not None or \
+                not self.hasDatatypeProperty(instanceName, dataPrName,
+                                             dataPrValue):
+            instanceURI = self.terms.uri(instanceName)
+            dataPropertyURI = self.terms.uri(dataPrName)
             dataPrValueURI = rdflib.term.Literal(dataPrValue)
-            self.graph.add((instanceURI, dataPropertyURI, dataPrValueURI))
+            self.addTriple((instanceURI, dataPropertyURI, dataPrValueURI))
 
     def removeSVGElementProperty(self, instanceName, dataPropertyValue):
         """ Removes a hasSVGElement data property value from the
@@ -210,10 +719,10 @@ class RDFReader(object):
         """
         """"""
         if self.hasDatatypeProperty(instanceName, dataPrName, dataPrValue):
-            instanceURI = URIRef("%s#%s" % (self.namespace, instanceName))
-            dataPrURI = URIRef("%s#%s" % (self.namespace, dataPrName))
+            instanceURI = self.terms.uri(instanceName)
+            dataPrURI = self.terms.uri(dataPrName)
             dataPrValueURI = rdflib.term.Literal(dataPrValue)
-            self.graph.remove((instanceURI, dataPrURI, dataPrValueURI))
+            self.removeTriple((instanceURI, dataPrURI, dataPrValueURI))
 
     def addCoordinatesXY(self, instanceName, dataPropertyValueX,
                          dataPropertyValueY):
@@ -225,16 +734,37 @@ class RDFReader(object):
         :return:
         """
 
-        instanceURI = URIRef("%s#%s" % (self.namespace, instanceName))
-        dataPropertyURI = URIRef("%s#%s" % (self.namespace, c.HAS_X_COORD_PR))
-        dataPropertyValueXURI = rdflib.term.Literal(dataPropertyValueX)
-        self.graph.remove((instanceURI, dataPropertyURI, None))
-        self.graph.add((instanceURI, dataPropertyURI, dataPropertyValueXURI))
+        instanceURI = self.terms.uri(instanceName)
+        self.setDatatypeValue(instanceURI, self.terms.uri(c.HAS_X_COORD_PR),
+                              dataPropertyValueX)
+        self.setDatatypeValue(instanceURI, self.terms.uri(c.HAS_Y_COORD_PR),
+                              dataPropertyValueY)
+
+    def setDatatypeValue(self, instanceURI, dataPropertyURI, value):
+        """ Makes a value the only value of a datatype property of an
+            instance. The graph is left untouched if it already is, so
+            re-saving an annotation that did not move changes nothing.
+            In a batch, the value is compared with the graph on commit.
+        :param instanceURI:
+        :param dataPropertyURI:
+        :param value:
+        """
 
-        dataPropertyURI = URIRef("%s#%s" % (self.namespace, c.HAS_Y_COORD_PR))
-        dataPropertyValueYURI = rdflib.term.Literal(dataPropertyValueY)
-        self.graph.remove((instanceURI, dataPropertyURI, None))
-        self.graph.add((instanceURI, dataPropertyURI, dataPropertyValueYURI))
+        literal = rdflib.term.Literal(value)
+        if self.batchAdds is not None:
+            pending = self.batchAdds.get(instanceURI)
+            if pending:
+                pending.difference_update(
+                    [(p, o) for p, o in pending if p == dataPropertyURI])
+            self.batchValues.setdefault(instanceURI, {})[dataPropertyURI] = \
+                literal
+            self.graphChanged()
+            return
+        values = set(self.graph.objects(instanceURI, dataPropertyURI))
+        if values != set([literal]):
+            if values:
+                self.removeTriple((instanceURI, dataPropertyURI, None))
+            self.addTriple((instanceURI, dataPropertyURI, literal))
 
     def addObjectProperty(self, subj, property, obj):
         """ Adds an instance of an object property to the ontology.
@@ -243,11 +773,12 @@ class RDFReader(object):
         :param obj:
         """
 
-        subjectURI = URIRef("%s#%s" % (self.namespace, subj))
-        propertyURI = URIRef("%s#%s" % (self.namespace, property))
-        objectURI = URIRef("%s#%s" % (self.namespace, obj))
-        if not (subjectURI, propertyURI, objectURI) in self.graph:
-            self.graph.add((subjectURI, propertyURI, objectURI))
+        subjectURI = self.terms.uri(subj)
+        propertyURI = self.terms.uri(property)
+        objectURI = self.terms.uri(obj)
+        if self.batchAdds is not None or \
+                not self.contains((subjectURI, propertyURI, objectURI)):
+            self.addTriple((subjectURI, propertyURI, objectURI))
 
 
     def addLengthAndWidth(self, instanceName, length, width):
@@ -258,15 +789,11 @@ class RDFReader(object):
         :param width: float; value of the has_width property for the instance
         :return:
         """
-        instanceURI = URIRef("%s#%s" % (self.namespace, instanceName))
-        dataPropertyURI = URIRef("%s#%s" % (self.namespace, c.HAS_LENGTH_PR))
-        dataPropertyValueURI = rdflib.term.Literal(length)
-        self.graph.remove((instanceURI, dataPropertyURI, None))
-        self.graph.add((instanceURI, dataPropertyURI, dataPropertyValueURI))
-        dataPropertyURI = URIRef("%s#%s" % (self.namespace, c.HAS_WIDTH_PR))
-        dataPropertyValueURI = rdflib.term.Literal(width)
-        self.graph.remove((instanceURI, dataPropertyURI, None))
-        self.graph.add((instanceURI, dataPropertyURI, dataPropertyValueURI))
+        instanceURI = self.terms.uri(instanceName)
+        self.setDatatypeValue(instanceURI, self.terms.uri(c.HAS_LENGTH_PR),
+                              length)
+        self.setDatatypeValue(instanceURI, self.terms.uri(c.HAS_WIDTH_PR),
+                              width)
 
     def removeObjectProperty(self, subj, property, obj):
         """ Removes an instance of an object property to the ontology.
@@ -275,27 +802,18 @@ class RDFReader(object):
         :param obj:
         """
 
-        subjectURI = URIRef("%s#%s" % (self.namespace, subj))
-        propertyURI = URIRef("%s#%s" % (self.namespace, property))
-        objectURI = URIRef("%s#%s" % (self.namespace, obj))
-        if (subjectURI, propertyURI, objectURI) in self.graph:
-            self.graph.remove((subjectURI, propertyURI, objectURI))
+        subjectURI = self.terms.uri(subj)
+        propertyURI = self.terms.uri(property)
+        objectURI = self.terms.uri(obj)
+        if self.contains((subjectURI, propertyURI, objectURI)):
+            self.removeTriple((subjectURI, propertyURI, objectURI))
 
     def getLastId(self):
         """ Search for the last Id of  instances for making them unique.
         :return: The highest id that has specific name from SVG_NAMED_ELEMENTS
         """
 
-        lastId = 0
-        for key, value in self.getInstanceList().iteritems():
-            for instance in value:
-                for svgName in c.SVG_NAMED_ELEMENTS:
-                    if svgName in instance:
-                        annotationRest = instance[len(svgName):]
-                        if annotationRest.isdigit() and \
-                           int(annotationRest) > lastId:
-                            lastId = int(annotationRest)
-        return lastId
+        return self.idIndex.lastId()
 
     def getInstanceList(self):
         """ Returns a dict, indexed by Entity name, with the instances of said
@@ -315,9 +833,9 @@ class RDFReader(object):
                    """
         query_res = self.graph.query(query)
         for row in query_res:
-            entityName = row.cl.split('#')[1]
+            entityName = self.terms.localName(row.cl)
             if entityName != 'NamedIndividual' and entityName != 'Class':
-                individualName = row.ind.split('#')[1]
+                individualName = self.terms.localName(row.ind)
                 if (entityName not in instancesOfClass):
                     instancesOfClass[entityName] = []
                 instancesOfClass[entityName].append(individualName)
@@ -329,7 +847,7 @@ class RDFReader(object):
         :return: All occurrences of a given Property
         """
 
-        propertyURI = URIRef("%s#%s" % (self.namespace, propertyName))
+        propertyURI = self.terms.uri(propertyName)
         return self.graph.triples((None, propertyURI, None))
 
     def getObjectPropertyList(self):
@@ -345,7 +863,7 @@ class RDFReader(object):
                    }
                    """
         query_res = self.graph.query(query)
-        retlist = [row.id.split("#")[1] for row in query_res]
+        retlist = [self.terms.localName(row.id) for row in query_res]
         retlist.sort()
         return retlist
 
@@ -362,7 +880,7 @@ class RDFReader(object):
                    }
                    """
         query_res = self.graph.query(query)
-        retlist = [row.id.split("#")[1] for row in query_res]
+        retlist = [self.terms.localName(row.id) for row in query_res]
         retlist.sort()
         return retlist
 
@@ -372,15 +890,9 @@ class RDFReader(object):
         :return: Entity(ies) of the domain of the given property.
         """
 
-        query = """PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                   PREFIX vis: %s
-                   SELECT DISTINCT ?dom
-                   WHERE {
-                       vis:%s rdfs:domain ?dom
-                   }
-                   """ % (self.namespacePrefix, property)
-        query_res = self.graph.query(query)
-        return [row.dom.split("#")[1] for row in query_res]
+        propertyURI = self.terms.uri(property)
+        query_res = self.runQuery("domainOfProperty", property=propertyURI)
+        return [self.terms.localName(row.dom) for row in query_res]
 
     def rangeOfProperty(self, property):
         """ Returns the entity(ies) of the range of the given property.
@@ -388,15 +900,9 @@ class RDFReader(object):
         :return: Entity(ies) of the range of the given property.
         """
 
-        query = """PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                   PREFIX vis: %s
-                   SELECT DISTINCT ?range
-                   WHERE {
-                       vis:%s rdfs:range ?range
-                   }
-                   """ % (self.namespacePrefix, property)
-        query_res = self.graph.query(query)
-        return [row.range.split("#")[1] for row in query_res]
+        propertyURI = self.terms.uri(property)
+        query_res = self.runQuery("rangeOfProperty", property=propertyURI)
+        return [self.terms.localName(row.range) for row in query_res]
 
     def termsBelongingToNameSpace(self, nameSpace, *types):
         """ Returns a list of terms belonging to the given namespace.
@@ -419,7 +925,7 @@ class RDFReader(object):
                    }
                    """ % (valueString, nameSpace)
         query_res = self.graph.query(query)
-        retlist = [row.id.split("#")[1] for row in query_res]
+        retlist = [self.terms.localName(row.id) for row in query_res]
         return retlist
 
     def getSVGElementsOfInstance(self, instanceID):
@@ -429,16 +935,11 @@ class RDFReader(object):
         :return:
         """
 
-        query = """PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-                   PREFIX owl: <http://www.w3.org/2002/07/owl#>
-                   PREFIX vis: %s
-                   SELECT ?id
-                   WHERE {
-                       vis:%s rdf:type owl:NamedIndividual .
-                       vis:%s vis:hasSVGElement ?id
-                   }
-                   """ % (self.namespacePrefix, instanceID, instanceID)
-        query_res = self.graph.query(query)
+        instanceURI = self.terms.uri(instanceID)
+        hasSVGElementURI = self.terms.uri(c.HAS_SVG_PROPERTY)
+        query_res = self.runQuery("getSVGElementsOfInstance",
+                                  ind=instanceURI,
+                                  hasSVGElement=hasSVGElementURI)
         return [row.id.toPython() for row in query_res]
 
     def classOfIndividual(self, individualName):
@@ -448,16 +949,9 @@ class RDFReader(object):
         :return:
         """
 
-        query = """PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-                   PREFIX owl: <http://www.w3.org/2002/07/owl#>
-                   PREFIX vis: %s
-                   SELECT ?cl
-                   WHERE { vis:%s rdf:type ?cl
-                       FILTER EXISTS { vis:%s rdf:type owl:NamedIndividual }
-                   }
-                   """ % (self.namespacePrefix, individualName, individualName)
-        query_res = self.graph.query(query)
-        retlist = [row.cl.split("#")[1] for row in query_res]
+        individualURI = self.terms.uri(individualName)
+        query_res = self.runQuery("classOfIndividual", ind=individualURI)
+        retlist = [self.terms.localName(row.cl) for row in query_res]
         if retlist:
             classNameList = [r for r in retlist if 'NamedIndividual' not in r]
             className = classNameList[0]
@@ -471,14 +965,8 @@ class RDFReader(object):
         :return: All subclasses for the parent class.
         """
 
-        query = """PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                   PREFIX vis: %s
-                   SELECT ?cl
-                   WHERE { ?cl rdfs:subClassOf vis:%s }
-                   """ % (self.namespacePrefix, parentClass)
-        query_res = self.graph.query(query)
-        retlist = [row.cl.split("#")[1] for row in query_res]
-        return retlist
+        return [self.terms.localName(entity) for entity
+                in self.hierarchy.getSubclasses(self.terms.uri(parentClass))]
 
     def getParentclasses(self, childClass):
         """ Return parent class for the given child class.
@@ -486,31 +974,29 @@ class RDFReader(object):
         :return: Parent class for the given child class.
         """
 
-        query = """PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                   PREFIX vis: %s
-                   SELECT ?cl
-                   WHERE { vis:%s rdfs:subClassOf ?cl }
-                   """ % (self.namespacePrefix, childClass)
-        query_res = self.graph.query(query)
-        retlist = [row.cl.split("#")[1] for row in query_res]
-        return retlist
+        return [self.terms.localName(entity) for entity
+                in self.hierarchy.getParentclasses(self.terms.uri(childClass))]
 
     def generateSubTree(self, rootEntity, treeViewInstance):
-        """ Generates subtree
+        """ Generates subtree from the class hierarchy and feeds the
+            treeView with it.
         :param rootEntity:
         :param treeViewInstance:
         """
-        tree = self.subTreeRecursive(rootEntity, treeViewInstance)
+        tree = self.hierarchy.subTree(self.terms.uri(rootEntity),
+                                      self.terms.localName)
+        self.insertSubTree(tree, treeViewInstance)
         return tree
 
-    def subTreeRecursive(self, rootEntity, treeViewInstance, parentID=''):
-        """ Get all entities from the ontology and feed the treeView with them.
-        :param rootEntity:
+    def insertSubTree(self, subtree, treeViewInstance, parentID=''):
+        """ Feed the treeView with the entities of a subtree (as returned by
+            ClassHierarchy.subTree) and their instances.
+        :param subtree:
         :param treeViewInstance:
         :param parentID:
-        :return:
         """
 
+        rootEntity = subtree[0]
         # Insert element into GUI ViewTree
         childID = treeViewInstance.insert(parentID, 'end', text=rootEntity,
                                           tags=('entityRow', ))
@@ -518,13 +1004,8 @@ class RDFReader(object):
         if (rootEntity in self.instancesbyClass):
             self.insertInstancesInTree(self.instancesbyClass[rootEntity],
                                        treeViewInstance, childID)
-        subtree = [rootEntity]
-        rootChildren = self.getSubclasses(rootEntity)
-        if rootChildren:
-            for child in rootChildren:
-                subtree.append(self.subTreeRecursive(child, treeViewInstance,
-                                                     childID))
-        return subtree
+        for child in subtree[1:]:
+            self.insertSubTree(child, treeViewInstance, childID)
 
     def insertInstancesInTree(self, instanceList, treeViewInstance, parentID):
         """ Insert instances in the tree structure
@@ -538,9 +1019,62 @@ class RDFReader(object):
             treeViewInstance.insert(parentID, 'end', text=instance,
                                     tags=('instanceRow', ))
 
-    def saveOntology(self):
-        """Save current graph into a RDF file"""
-        self.graph.serialize(self.filePath)
+    def saveOntology(self, journal=False):
+        """ Save current graph into a RDF file. In journal mode, only the
+            changes made since the last save are appended to the journal of
+            the ontology; the file itself is rewritten once the journal grows
+            over JOURNAL_MAX_SIZE.
+        :param journal: If it is 'True', changes are saved into the journal.
+        """
+
+        if journal:
+            self.journal.append(
+                [t for t, added in self.changes.iteritems() if added],
+                [t for t, added in self.changes.iteritems() if not added])
+            self.changes = {}
+            if self.journal.size() <= c.JOURNAL_MAX_SIZE:
+                self.storeSaved()
+                return
+        self.compactOntology()
+
+    def compactOntology(self):
+        """ Rewrites the ontology file, in its own format, with the current
+            graph, which folds the journal into it. """
+        serializeOntology(self.graph, self.filePath)
+        self.journal.clear()
+        self.changes = {}
+        if self.cache is not None:
+            self.cache.invalidate(self.filePath)
+            if self.store is None:
+                # Cache the saved graph so that it is not parsed on next load
+                self.cache.store(self.filePath, self.graph)
+        self.storeSaved()
+
+    def storeSaved(self):
+        """ Records that the persistent store matches the saved ontology.
+        """
+
+        if self.store is not None:
+            self.graph.commit()
+            self.store.markClean(self.filePath)
+            self.storeChanged = False
+
+    def exportOntology(self, path, format=None):
+        """ Writes the current graph into another file, e.g. in a format
+            that is faster to load (see OntologyFormat).
+        :param path: Path of the exported file.
+        :param format: Format of the file; guessed from its extension if
+            None.
+        """
+
+        serializeOntology(self.graph, path, format)
+
+    def close(self):
+        """ Closes the graph; needed by persistent stores to release their
+            files. """
+        if self._graph is not None:
+            self._graph.close(commit_pending_transaction=True)
+            self._graph = None
 
     """
     # Unused methods
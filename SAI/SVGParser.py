@@ -3,10 +3,23 @@ Created on May 23, 2016
 @author: Tomas Murillo-Morales, Jaromir Plhak
 """
 
-from svg.path import parse_path
+import hashlib
 import inkex
 import sys
 import const
+import GeometryEngine
+import PathBounds
+import PathData
+import SVGTransform
+
+# Key: SVG element name; Value: its qualified tag
+SVG_TAGS = dict((name, "{%s}%s" % (inkex.NSS["svg"], name))
+                for name in ("rect", "ellipse", "path", "text"))
+# Attributes of the SVG elements the geometry is computed from (besides
+# the transforms of the elements and their groups)
+GEOMETRY_ATTRIBUTES = ("x", "y", "width", "height", "cx", "cy", "d",
+                       "{%s}cx" % const.SODI_NS, "{%s}cy" % const.SODI_NS)
+
 
 class SVGParser:
     """
@@ -14,25 +27,99 @@ class SVGParser:
     the given etree root node.
     """
 
-    def __init__(self, svgRoot):
+    def __init__(self, svgRoot, batch=True):
         self.svgRoot = svgRoot
         self.dict = {}  # Element coordinate dictionary
         self.att_dict = {}  # Other element attributes
+        self.bbox_dict = {}  # Bounding boxes of paths with path data
+        # Cumulative transform matrices of the elements and their groups
+        self.transforms = SVGTransform.TransformCache()
+        # Computes the geometry in batch if NumPy is available; None if the
+        # per-element code (dict and att_dict) is used
+        self.engine = None
+        self.batch = batch and GeometryEngine.isAvailable()
+        # Whether the geometry of the whole document has been computed
+        self.centersFound = False
 
     def findCenters(self):
         """ This is the main method for detecting centers of SVG elements.
-            It selects the specific svg elements and calls the appropriate
-            function for them.
+            It collects the rect, ellipse, path and text elements in one
+            walk over the document and calls the appropriate function for
+            them. The result is a geometry index of the document keyed by
+            element id, which is built only once and shared by every
+            annotation; call invalidate if the document changes.
+        """
+
+        if self.centersFound:
+            return
+        elementsByTag = dict((SVG_TAGS[name], []) for name in SVG_TAGS)
+        for element in self.svgRoot.getroottree().iter(*elementsByTag):
+            elementsByTag[element.tag].append(element)
+        if self.batch:
+            engine = GeometryEngine.GeometryEngine(self.transforms.matrixOf)
+            engine.addRects(elementsByTag[SVG_TAGS["rect"]])
+            engine.addPoints(elementsByTag[SVG_TAGS["ellipse"]], "cx", "cy")
+            engine.addPaths(elementsByTag[SVG_TAGS["path"]])
+            engine.addPoints(elementsByTag[SVG_TAGS["text"]], "x", "y")
+            try:
+                engine.build()
+                self.engine = engine
+                self.centersFound = True
+                return
+            except ValueError:
+                # Some parameter is not a number; the per-element code
+                # handles it as before
+                pass
+        self.addRectCenter(elementsByTag[SVG_TAGS["rect"]])
+        self.addEllipseCenter(elementsByTag[SVG_TAGS["ellipse"]])
+        self.addPathCenter(elementsByTag[SVG_TAGS["path"]])
+        self.addTextCenter(elementsByTag[SVG_TAGS["text"]])
+        self.centersFound = True
+
+    def invalidate(self):
+        """ Discards the geometry index, e.g. after the document changes. """
+        self.dict = {}
+        self.att_dict = {}
+        self.bbox_dict = {}
+        self.transforms = SVGTransform.TransformCache()
+        self.engine = None
+        self.centersFound = False
+
+    def boundingBoxes(self):
+        """ Returns the exact bounding boxes of the path elements with path
+            data, curves included.
+        :return: A pair (ids, boxes): the ids of the paths and one
+            (minX, minY, maxX, maxY) row per path, as a NumPy array if the
+            geometry is computed in batch, or as a list of tuples otherwise.
+        """
+
+        self.findCenters()
+        if self.engine is not None:
+            return self.engine.boxIds, self.engine.boxes
+        ids = list(self.bbox_dict)
+        return ids, [self.bbox_dict[elementId] for elementId in ids]
+
+    def geometrySignatures(self, elementIds):
+        """ Returns digests of everything the geometry of the given
+            elements is computed from: their tags, geometry attributes and
+            cumulative transforms. An element whose digest differs from an
+            earlier one has been moved, resized or removed.
+        :param elementIds: ids of SVG elements.
+        :return: dict from every element id to its digest, or to None if
+            the document has no element with that id.
         """
 
-        self.addRectCenter(self.svgRoot.xpath("//svg:rect",
-                                              namespaces=inkex.NSS))
-        self.addEllipseCenter(self.svgRoot.xpath("//svg:ellipse",
-                                                 namespaces=inkex.NSS))
-        self.addPathCenter(self.svgRoot.xpath("//svg:path",
-                                              namespaces=inkex.NSS))
-        self.addTextCenter(self.svgRoot.xpath("//svg:text",
-                                              namespaces=inkex.NSS))
+        wanted = set(elementIds)
+        signatures = dict.fromkeys(wanted)
+        for element in self.svgRoot.getroottree().iter("*"):
+            elementId = element.get("id")
+            if elementId not in wanted or signatures[elementId] is not None:
+                continue
+            state = (element.tag,
+                     tuple(element.get(name) for name in GEOMETRY_ATTRIBUTES),
+                     self.transforms.matrixOf(element))
+            signatures[elementId] = hashlib.sha1(repr(state)).hexdigest()
+        return signatures
 
     def addRectCenter(self, elList):
         """ Searches the central point and other attributes of all rect SVG elements. Coordinates
@@ -50,9 +137,8 @@ class SVGParser:
                 cx_orig = (x_orig + (x_orig + float(rect.attrib["width"]))) / 2
                 cy_orig = (y_orig + (y_orig + float(rect.attrib["height"]))) / 2
                 transformed = False
-                if "transform" in rect.attrib:
-                    transVector = self.__transformStringToVector(
-                                                     rect.attrib["transform"])
+                transVector = self.transforms.matrixOf(rect)
+                if transVector != SVGTransform.IDENTITY:
                     (x, y) = self.__calculateTransformedCoordinates(
                                                             cx_orig, 
                                                             cy_orig, 
@@ -80,9 +166,8 @@ class SVGParser:
                 x_orig = ell.attrib["cx"]
                 y_orig = ell.attrib["cy"]
                 transformed = False
-                if "transform" in ell.attrib:
-                    transVector = self.__transformStringToVector(
-                                                     ell.attrib["transform"])
+                transVector = self.transforms.matrixOf(ell)
+                if transVector != SVGTransform.IDENTITY:
                     (x, y) = self.__calculateTransformedCoordinates(
                                                             x_orig, 
                                                             y_orig, 
@@ -97,7 +182,10 @@ class SVGParser:
 
     def addPathCenter(self, elList):
         """ Searches the central point of all path SVG elements. Coordinates
-            are added to the dictionary using elements id as the key.
+            are added to the dictionary using elements id as the key. The
+            central point of a path with path data is the center of its
+            bounding box, whose size is kept as the width and height of
+            the path.
         :param elList: List of path elements whose coordinates are
             counted
         """
@@ -109,9 +197,8 @@ class SVGParser:
                 x_orig = path.attrib["{" + const.SODI_NS + "}cx"]
                 y_orig = path.attrib["{" + const.SODI_NS + "}cy"]
                 transformed = False
-                if "transform" in path.attrib:
-                    transVector = self.__transformStringToVector(
-                                                     path.attrib["transform"])
+                transVector = self.transforms.matrixOf(path)
+                if transVector != SVGTransform.IDENTITY:
                     (x, y) = self.__calculateTransformedCoordinates(
                                                             x_orig, 
                                                             y_orig, 
@@ -125,29 +212,28 @@ class SVGParser:
                 self.dict[path.attrib["id"]] = (x, y)
             elif (path is not None and "id" in path.attrib
                     and "d" in path.attrib):
-                
-                svgpath = parse_path(path.attrib["d"])
+                kinds, coords = PathData.scan(path.attrib["d"])
+                matrix = self.transforms.matrixOf(path)
+                if matrix != SVGTransform.IDENTITY:
+                    coords = SVGTransform.transformSegments(kinds, coords,
+                                                            matrix)
+                box = PathBounds.bounds(kinds, coords)
+                if box is not None:
+                    self.addPathBox(path.attrib["id"], box)
 
-                maxX = -sys.float_info.max
-                minX = sys.float_info.max
-                maxY = -sys.float_info.max
-                minY = sys.float_info.max
-                for pt in svgpath:
-                    parsedX = float(str(pt.point(0))[1:str(pt.point(0)).
-                                    index("+")])
-                    parsedY = float(str(pt.point(0))[str(pt.point(0)).
-                                    index("+") + 1: -2])
-                    if parsedX > maxX:
-                        maxX = parsedX
-                    if parsedX < minX:
-                        minX = parsedX
-                    if parsedY > maxY:
-                        maxY = parsedY
-                    if parsedY < minY:
-                        minY = parsedY
+    def addPathBox(self, elementId, box):
+        """ Adds the central point, width and height of a path given its
+            bounding box.
+        :param elementId: Id of the path element.
+        :param box: (minX, minY, maxX, maxY) bounding box of the path.
+        """
 
-                self.dict[path.attrib["id"]] = \
-                    (str((minX + maxX) / 2), str((minY + maxY) / 2))
+        (minX, minY, maxX, maxY) = box
+        self.bbox_dict[elementId] = box
+        self.dict[elementId] = (str((minX + maxX) / 2), str((minY + maxY) / 2))
+        self.att_dict[elementId] = {}
+        self.att_dict[elementId]['height'] = str(maxY - minY)
+        self.att_dict[elementId]['width'] = str(maxX - minX)
 
     def addTextCenter(self, elList):
         """ Searches the central point of all text SVG elements. Coordinates
@@ -162,9 +248,8 @@ class SVGParser:
             if (text is not None and "id" in text.attrib and "x" in text.attrib
                     and "y" in text.attrib):
                 transformed = False
-                if "transform" in text.attrib:
-                    transVector = self.__transformStringToVector(
-                                                     text.attrib["transform"])
+                transVector = self.transforms.matrixOf(text)
+                if transVector != SVGTransform.IDENTITY:
                     (x, y) = self.__calculateTransformedCoordinates(
                                                             text.attrib["x"], 
                                                             text.attrib["y"], 
@@ -203,6 +288,8 @@ class SVGParser:
         """
 
         self.findCenters()
+        if self.engine is not None:
+            return self.engine.center(elList)
 
         maxX = -sys.float_info.max
         minX = sys.float_info.max
@@ -228,10 +315,13 @@ class SVGParser:
 
     def computeDimForListOfElements(self, eList):
         """
-        Computes the total length and width of rectangles or annotations made up of rectangles
+        Computes the total length and width of rectangles and paths or annotations made up of them
         :param eList: List of elements
         :return: (height, width); dimensions for the annotation made up of the given elements
         """
+        self.findCenters()
+        if self.engine is not None:
+            return self.engine.dimensions(eList)
         c_max_y, c_max_x = -sys.float_info.max, -sys.float_info.max
         c_min_y, c_min_x = sys.float_info.max, sys.float_info.max
         min_len, min_width, max_len, max_width = (0.0,)*4
@@ -296,24 +386,6 @@ class SVGParser:
         else:
             return None, None
     
-    def __transformStringToVector(self, transformAttribute):
-        """Converts the textual value of a transform attribute to an array
-        of parameters for a transform matrix
-        :param transformAttribute: the value of an SVG transform attribute
-                e.g. 'matrix(1,2,3,4,0,0)' or 'translate(50,50)'
-        :return: A vector (list) of transform parameters [a b c d e f]
-                e.g. [1,2,3,4,0,0] or [1,0,0,1,50,50] (a translate vector
-                gets converted to a transform)
-        """
-        transform = []
-        if transformAttribute and transformAttribute.endswith(')'):
-            if transformAttribute.startswith('matrix('):
-                transform = transformAttribute[7:-1].split(',')
-            elif transformAttribute.startswith('translate('):
-                translate = transformAttribute[10:-1].split(',')
-                transform = [1, 0, 0, 1].extend(translate)
-        return [float(n) for n in transform]
-    
     def __matmult(self, a,b):
         """
         Multiply two matrices. From stackoverflow.com/questions/10508021
@@ -0,0 +1,225 @@
+"""
+SVGTransform parses SVG transform attributes into affine matrices and
+composes the transforms of the ancestors of SVG elements.
+
+A matrix is a tuple (a, b, c, d, e, f) standing for
+    [ a c e ]
+    [ b d f ]
+    [ 0 0 1 ]
+See https://www.w3.org/TR/SVG/coords.html#TransformMatrixDefined
+"""
+
+import math
+import re
+from array import array
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from PathData import ARC, STRIDE
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+# A transform function and the text of its arguments
+FUNCTION_RE = re.compile(r"(matrix|translate|scale|rotate|skewX|skewY)"
+                         r"\s*\(([^)]*)\)")
+NUMBER_RE = re.compile(r"[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)"
+                       r"(?:[eE][-+]?[0-9]+)?")
+SEPARATORS = " \t\r\n,"
+# Key: transform function; Value: numbers of arguments it accepts
+ARGUMENTS = {"matrix": (6,), "translate": (1, 2), "scale": (1, 2),
+             "rotate": (1, 3), "skewX": (1,), "skewY": (1,)}
+
+
+def multiply(m1, m2):
+    """ Returns the matrix product m1 * m2, i.e. the transform that applies
+        m2 and then m1.
+    """
+
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (a1 * a2 + c1 * b2, b1 * a2 + d1 * b2,
+            a1 * c2 + c1 * d2, b1 * c2 + d1 * d2,
+            a1 * e2 + c1 * f2 + e1, b1 * e2 + d1 * f2 + f1)
+
+
+def functionMatrix(name, args):
+    """ Returns the matrix of one transform function.
+    :param name: Name of the function, e.g. 'rotate'.
+    :param args: List of its arguments (floats).
+    """
+
+    if name == "matrix":
+        return tuple(args)
+    if name == "translate":
+        return (1.0, 0.0, 0.0, 1.0, args[0], args[1] if len(args) > 1 else 0.0)
+    if name == "scale":
+        return (args[0], 0.0, 0.0, args[-1], 0.0, 0.0)
+    if name == "rotate":
+        angle = math.radians(args[0])
+        cos, sin = math.cos(angle), math.sin(angle)
+        rotation = (cos, sin, -sin, cos, 0.0, 0.0)
+        if len(args) == 1:
+            return rotation
+        # Rotation about the point (cx, cy)
+        cx, cy = args[1], args[2]
+        return multiply(multiply((1.0, 0.0, 0.0, 1.0, cx, cy), rotation),
+                        (1.0, 0.0, 0.0, 1.0, -cx, -cy))
+    tan = math.tan(math.radians(args[0]))
+    if name == "skewX":
+        return (1.0, 0.0, tan, 1.0, 0.0, 0.0)
+    return (1.0, tan, 0.0, 1.0, 0.0, 0.0)
+
+
+def parse(transformAttribute):
+    """ Converts the textual value of a transform attribute into a matrix.
+    :param transformAttribute: The value of an SVG transform attribute, a
+        list of transform functions, e.g. 'translate(50,50) rotate(45)'.
+    :return: The matrix of the whole list; IDENTITY if the attribute is
+        empty or not valid (an invalid transform list is ignored, as SVG
+        renderers do).
+    """
+
+    matrix = IDENTITY
+    if not transformAttribute:
+        return matrix
+    position = 0
+    for match in FUNCTION_RE.finditer(transformAttribute):
+        if transformAttribute[position:match.start()].strip(SEPARATORS):
+            return IDENTITY
+        position = match.end()
+        name, arguments = match.groups()
+        numbers = NUMBER_RE.findall(arguments)
+        if NUMBER_RE.sub("", arguments).strip(SEPARATORS) or \
+                len(numbers) not in ARGUMENTS[name]:
+            return IDENTITY
+        matrix = multiply(matrix, functionMatrix(name,
+                                                 [float(n) for n in numbers]))
+    if transformAttribute[position:].strip(SEPARATORS):
+        return IDENTITY
+    return matrix
+
+
+def transformArc(matrix, rx, ry, rotation, flags):
+    """ Returns the radii, x-axis rotation (degrees) and flags of the image
+        of an elliptical arc by a matrix. The ellipse is mapped by the
+        linear part of the matrix; its new radii and rotation are the
+        singular values and the angle of the left singular vectors of
+        matrix * rotate(rotation) * scale(rx, ry). A reflection reverses
+        the direction of the arc.
+    """
+
+    a, b, c, d = matrix[:4]
+    phi = rotation * math.pi / 180
+    cos, sin = math.cos(phi), math.sin(phi)
+    p, q = (a * cos + c * sin) * rx, (-a * sin + c * cos) * ry
+    r, s = (b * cos + d * sin) * rx, (-b * sin + d * cos) * ry
+    e, f = (p + s) / 2, (p - s) / 2
+    g, h = (r + q) / 2, (r - q) / 2
+    first, second = math.hypot(e, h), math.hypot(f, g)
+    angle = (math.atan2(h, e) + math.atan2(g, f)) / 2
+    if a * d - b * c < 0:
+        # Swaps the sweep flag
+        flags = flags - 1 if flags % 2 == 1 else flags + 1
+    return first + second, abs(first - second), angle * 180 / math.pi, flags
+
+
+def transformSegments(kinds, coords, matrix):
+    """ Returns the coordinates of the segments of a path (the output of
+        PathData.scan) mapped by a matrix. Bezier curves are mapped through
+        their control points; arcs get new radii, rotation and flags.
+    """
+
+    a, b, c, d, e, f = matrix
+    result = array('d', coords)
+    for segment, kind in enumerate(kinds):
+        offset = segment * STRIDE
+        points = (0, 6) if kind == ARC else (0, 2, 4, 6)
+        for point in points:
+            x, y = coords[offset + point], coords[offset + point + 1]
+            result[offset + point] = a * x + c * y + e
+            result[offset + point + 1] = b * x + d * y + f
+        if kind == ARC:
+            result[offset + 2:offset + 6] = array('d', transformArc(
+                matrix, *coords[offset + 2:offset + 6]))
+    return result
+
+
+def transformSegmentsArray(kinds, segments, matrices):
+    """ Batch version of transformSegments with NumPy.
+    :param kinds: Array of the kinds of the segments.
+    :param segments: Array of STRIDE coordinates per segment.
+    :param matrices: Array of one matrix (6 values) per segment.
+    :return: The array of the mapped coordinates.
+    """
+
+    a, b, c, d, e, f = matrices.T
+    result = segments.copy()
+    for point in (0, 2, 4, 6):
+        x, y = segments[:, point], segments[:, point + 1]
+        result[:, point] = a * x + c * y + e
+        result[:, point + 1] = b * x + d * y + f
+    arcs = numpy.flatnonzero(kinds == ARC)
+    if len(arcs):
+        a, b, c, d = a[arcs], b[arcs], c[arcs], d[arcs]
+        rx, ry, rotation, flags = segments[arcs, 2:6].T
+        phi = rotation * numpy.pi / 180
+        cos, sin = numpy.cos(phi), numpy.sin(phi)
+        p, q = (a * cos + c * sin) * rx, (-a * sin + c * cos) * ry
+        r, s = (b * cos + d * sin) * rx, (-b * sin + d * cos) * ry
+        e, f = (p + s) / 2, (p - s) / 2
+        g, h = (r + q) / 2, (r - q) / 2
+        first, second = numpy.hypot(e, h), numpy.hypot(f, g)
+        angle = (numpy.arctan2(h, e) + numpy.arctan2(g, f)) / 2
+        reflected = a * d - b * c < 0
+        flags = numpy.where(reflected, numpy.where(flags % 2 == 1, flags - 1,
+                                                   flags + 1), flags)
+        result[arcs, 2] = first + second
+        result[arcs, 3] = numpy.abs(first - second)
+        result[arcs, 4] = angle * 180 / numpy.pi
+        result[arcs, 5] = flags
+    return result
+
+
+class TransformCache(object):
+    """ This class computes the cumulative matrices of SVG elements: the
+        product of the transforms of all their ancestors and their own.
+        The matrix of every element with children (e.g. a group or an
+        Inkscape layer) is memoised, so when the elements of a document
+        are visited top-down every group is composed once and its
+        descendants reuse it, i.e. O(n) instead of O(n * depth).
+    """
+
+    def __init__(self):
+        # Key: element with children; Value: its cumulative matrix
+        self.groups = {}
+        # Key: transform attribute; Value: its matrix
+        self.parsed = {}
+
+    def parse(self, transformAttribute):
+        """ Returns the matrix of a transform attribute, parsing every
+            distinct value once.
+        """
+
+        matrix = self.parsed.get(transformAttribute)
+        if matrix is None:
+            matrix = self.parsed[transformAttribute] = \
+                parse(transformAttribute)
+        return matrix
+
+    def matrixOf(self, element):
+        """ Returns the cumulative matrix of an element (IDENTITY if
+            neither the element nor its ancestors are transformed).
+        """
+
+        matrix = self.groups.get(element)
+        if matrix is not None:
+            return matrix
+        parent = element.getparent()
+        matrix = IDENTITY if parent is None else self.matrixOf(parent)
+        transform = element.get("transform")
+        if transform:
+            own = self.parse(transform)
+            matrix = own if matrix == IDENTITY else multiply(matrix, own)
+        if len(element):
+            self.groups[element] = matrix
+        return matrix
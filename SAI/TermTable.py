@@ -0,0 +1,74 @@
+"""
+TermTable interns the URIRefs of an ontology namespace and their local
+names.
+"""
+
+from rdflib.term import URIRef, Literal
+
+
+def localName(term):
+    """ Returns the local name of a term of any namespace: the part after
+        the last '#', or after the last '/' for slash-terminated
+        namespaces. Literals are returned unchanged.
+    :param term: rdflib term.
+    :return: Local name of the term.
+    """
+
+    if isinstance(term, Literal):
+        return unicode(term)
+    for separator in ('#', '/'):
+        index = term.rfind(separator)
+        if 0 <= index < len(term) - 1:
+            return term[index + 1:]
+    return unicode(term)
+
+
+class TermTable(object):
+    """ This class interns the URIRefs of one ontology namespace. It maps
+        local names to URIRefs and back, so that they are built and parsed
+        only once. Both hash ('http://x/onto#Name') and slash
+        ('http://x/onto/Name') namespaces are supported. """
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        if namespace.endswith('#') or namespace.endswith('/'):
+            self.base = namespace
+        else:
+            self.base = namespace + '#'
+        # Key: local name; Value: URIRef in the namespace
+        self.uris = {}
+        # Key: URIRef; Value: local name
+        self.names = {}
+
+    def uri(self, name):
+        """ Returns the URIRef of a local name of the namespace.
+        :param name: Local name, e.g. 'Graphic_Object'.
+        :return: URIRef, e.g. <http://x/onto#Graphic_Object>.
+        """
+
+        uri = self.uris.get(name)
+        if uri is None:
+            uri = URIRef(self.base + name)
+            self.uris[name] = uri
+            self.names[uri] = name
+        return uri
+
+    def localName(self, term):
+        """ Returns the local name of a term. Terms of the namespace are
+            resolved against its base; other terms fall back to the
+            module-level localName.
+        :param term: rdflib term.
+        :return: Local name of the term.
+        """
+
+        name = self.names.get(term)
+        if name is None:
+            if isinstance(term, Literal):
+                return unicode(term)
+            if term.startswith(self.base) and len(term) > len(self.base):
+                name = term[len(self.base):]
+            else:
+                name = localName(term)
+            if isinstance(term, URIRef):
+                self.names[term] = name
+        return name
@@ -0,0 +1,297 @@
+"""
+TripleTable keeps the property triples of the GUI in array-backed
+columns with hash indexes.
+"""
+
+from array import array
+
+# Marks the property column of removed rows
+REMOVED = -1
+# Removed rows are compacted away once they are more than this many and
+# more than half of the rows
+COMPACT_MIN_REMOVED = 1024
+
+
+class TripleTable(object):
+    """ This class keeps a set of [subject, property, object] triples of
+        strings with constant-time lookups, instead of scanning lists of
+        triples. Strings are interned to integer ids and the triples are
+        kept in three array-backed columns, in insertion order. Membership
+        is tested against a set of packed (s, o, p) keys, and rows are
+        looked up through hash indexes by subject, property or object id,
+        which are built on first use and maintained afterwards. Removed
+        rows are marked and compacted away lazily. Properties can be
+        declared without triples, e.g. the properties of the ontology that
+        have no instances.
+        The table is meant for lookup speed, not memory. Without its
+        indexes it takes about as much memory per triple as lists of
+        triples, mostly for the strings and their ids; once the indexes
+        are built it takes a third to two thirds more (see
+        benchmarks/bench_triples.py).
+    """
+
+    def __init__(self, triples=(), properties=()):
+        # Key: id; Value: string
+        self.strings = []
+        # Key: string; Value: id
+        self.ids = {}
+        # Columns of ids, by position in the triple
+        self.columns = (array('i'), array('i'), array('i'))
+        # Key: position in the triple; Value: index of its column, i.e.
+        # dict from id to the rows (possibly removed) with that id
+        self.indexes = {}
+        # Packed keys of the triples in the table
+        self.keys = set()
+        # Bits of each id in a packed key, grown with the number of strings
+        self.keyBits = 21
+        self.removed = 0
+        # Declared property ids, in declaration order
+        self.declared = []
+        self.declaredSet = set()
+        for property in properties:
+            self.declare(property)
+        for triple in triples:
+            self.add(triple)
+
+    def intern(self, string):
+        """ Returns the id of a string, assigning a new one if needed. """
+        id = self.ids.get(string)
+        if id is None:
+            id = len(self.strings)
+            self.strings.append(string)
+            self.ids[string] = id
+            if id >> self.keyBits:
+                self.keyBits *= 2
+                self.keys = set(self.packedKey(s, p, o)
+                                for s, p, o in self.rowIds())
+        return id
+
+    def packedKey(self, s, p, o):
+        """ Returns the membership key of a triple of ids. """
+        return (((s << self.keyBits) | o) << self.keyBits) | p
+
+    def tripleIds(self, triple):
+        """ Returns the ids of a triple, or None if any of its strings is
+            not in the table (so the triple is not either).
+        """
+
+        ids = self.ids
+        s = ids.get(triple[0])
+        p = ids.get(triple[1])
+        o = ids.get(triple[2])
+        if s is None or p is None or o is None:
+            return None
+        return s, p, o
+
+    def declare(self, property):
+        """ Declares a property, which is listed by properties() even if
+            it has no triples.
+        """
+
+        p = self.intern(property)
+        if p not in self.declaredSet:
+            self.declaredSet.add(p)
+            self.declared.append(p)
+
+    def properties(self):
+        """ Returns the declared properties, in declaration order. """
+        return [self.strings[p] for p in self.declared]
+
+    def add(self, triple):
+        """ Adds a triple and declares its property.
+        :param triple: [subject, property, object] strings.
+        :return: 'True' if the triple was not in the table.
+        """
+
+        s = self.intern(triple[0])
+        o = self.intern(triple[2])
+        self.declare(triple[1])
+        p = self.ids[triple[1]]
+        key = self.packedKey(s, p, o)
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        row = len(self.columns[0])
+        ids = (s, p, o)
+        for position, column in enumerate(self.columns):
+            column.append(ids[position])
+        for position, index in self.indexes.iteritems():
+            index.setdefault(ids[position], array('i')).append(row)
+        return True
+
+    def remove(self, triple):
+        """ Removes a triple. Its property stays declared.
+        :param triple: [subject, property, object] strings.
+        :return: 'True' if the triple was in the table.
+        """
+
+        ids = self.tripleIds(triple)
+        if ids is None:
+            return False
+        s, p, o = ids
+        key = self.packedKey(s, p, o)
+        if key not in self.keys:
+            return False
+        self.keys.discard(key)
+        subjects, predicates, objects = self.columns
+        for row in self.rows(0, s):
+            if predicates[row] == p and objects[row] == o:
+                predicates[row] = REMOVED
+                break
+        self.removed += 1
+        if self.removed > COMPACT_MIN_REMOVED and \
+                self.removed * 2 > len(subjects):
+            self.compact()
+        return True
+
+    def compact(self):
+        """ Drops the removed rows. The indexes are built again on their
+            next use.
+        """
+
+        live = list(self.rowIds())
+        self.columns = (array('i', (ids[0] for ids in live)),
+                        array('i', (ids[1] for ids in live)),
+                        array('i', (ids[2] for ids in live)))
+        self.indexes = {}
+        self.removed = 0
+
+    def rows(self, position, id):
+        """ Returns the rows (possibly removed) whose id at the given
+            position of the triple (0: subject, 1: property, 2: object) is
+            the given one.
+        """
+
+        index = self.indexes.get(position)
+        if index is None:
+            index = {}
+            for row, rowId in enumerate(self.columns[position]):
+                index.setdefault(rowId, array('i')).append(row)
+            self.indexes[position] = index
+        return index.get(id, ())
+
+    def rowIds(self, rows=None):
+        """ Yields the (s, p, o) ids of the given rows (all rows if None),
+            skipping removed ones.
+        """
+
+        subjects, predicates, objects = self.columns
+        if rows is None:
+            rows = xrange(len(subjects))
+        for row in rows:
+            p = predicates[row]
+            if p != REMOVED:
+                yield subjects[row], p, objects[row]
+
+    def rowTriples(self, rows=None):
+        """ Returns the triples of the given rows (all rows if None) as
+            [subject, property, object] lists.
+        """
+
+        strings = self.strings
+        return [[strings[s], strings[p], strings[o]]
+                for s, p, o in self.rowIds(rows)]
+
+    def triples(self, property=None):
+        """ Returns the triples of a property (all triples if None) as
+            [subject, property, object] lists, in insertion order.
+        """
+
+        if property is None:
+            return self.rowTriples()
+        p = self.ids.get(property)
+        if p is None:
+            return []
+        return self.rowTriples(self.rows(1, p))
+
+    def missing(self, triples):
+        """ Returns the given triples that are not in the table, once each
+            and in the given order. The membership of all of them is
+            resolved with one set difference against the packed keys of
+            the table; triples with strings unknown to the table are keyed
+            by their strings, since they cannot be in it.
+        :param triples: Iterable of [subject, property, object] strings.
+        :return: List of the new triples.
+        """
+
+        candidates = []
+        for triple in triples:
+            ids = self.tripleIds(triple)
+            key = tuple(triple) if ids is None else self.packedKey(*ids)
+            candidates.append((key, triple))
+        new = set(key for key, triple in candidates).difference(self.keys)
+        result = []
+        for key, triple in candidates:
+            if key in new:
+                new.discard(key)
+                result.append(triple)
+        return result
+
+    def triplesOf(self, name):
+        """ Returns the triples whose subject or object is the given string
+            (e.g. an instance), in insertion order, through the subject and
+            object indexes.
+        """
+
+        id = self.ids.get(name)
+        if id is None:
+            return []
+        rows = set(self.rows(0, id))
+        rows.update(self.rows(2, id))
+        return self.rowTriples(sorted(rows))
+
+    def __contains__(self, triple):
+        if len(triple) != 3:
+            return False
+        ids = self.tripleIds(triple)
+        return ids is not None and self.packedKey(*ids) in self.keys
+
+    def __iter__(self):
+        return iter(self.rowTriples())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def toJSON(self):
+        """ Returns the table as a JSON-serializable dict: the strings, the
+            declared property ids and the live triples as a flat list of
+            ids.
+        """
+
+        strings = self.strings
+        used = {}
+        for p in self.declared:
+            used.setdefault(p, len(used))
+        flat = []
+        for ids in self.rowIds():
+            for id in ids:
+                flat.append(used.setdefault(id, len(used)))
+        usedStrings = [None] * len(used)
+        for id, newId in used.iteritems():
+            usedStrings[newId] = strings[id]
+        return {"strings": usedStrings,
+                "properties": range(len(self.declared)),
+                "triples": flat}
+
+    @classmethod
+    def fromJSON(cls, data):
+        """ Builds a table from the output of toJSON. The previous formats
+            of viso.json are accepted too: a dict from properties to lists
+            of triples, or a list of triples.
+        """
+
+        if isinstance(data, dict) and "strings" in data:
+            strings = data["strings"]
+            table = cls(properties=[strings[p] for p in data["properties"]])
+            flat = data["triples"]
+            for i in xrange(0, len(flat), 3):
+                table.add([strings[flat[i]], strings[flat[i + 1]],
+                           strings[flat[i + 2]]])
+            return table
+        if isinstance(data, dict):
+            table = cls(properties=sorted(data))
+            for property in sorted(data):
+                for triple in data[property]:
+                    table.add(triple)
+            return table
+        return cls(triples=data or ())
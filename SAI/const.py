@@ -27,6 +27,20 @@ Y_COOR_PROPERTY = "locationPointY"
 
 # Gui
 JSON_FILENAME = "viso.json"  # Setting
+# (JSON key, PickerGUI attribute) of the TripleTables kept in JSON_FILENAME
+JSON_TRIPLE_TABLES = [
+    ("objectProperties", "objectProperties"),
+    ("dataTypeProperties", "dataTypeProperties"),
+    ("propertyTriples", "objectPropertiesToAdd"),
+    ("propertyTriplesToRemove", "objectPropertiesToRemove"),
+    ("dataTypePropertyTriples", "dataTypePropertiesToAdd"),
+    ("dataTypePropertyTriplesToRemove", "dataTypePropertiesToRemove")]
+CACHE_DIRNAME = ".sai_cache"  # Setting
+CACHE_MAX_SIZE = 512 * 1024 * 1024  # Setting; bytes
+STORE_BACKEND = "IOMemory"  # Setting; "Sleepycat" keeps ontologies on disk
+STORE_DIRNAME = ".sai_store"  # Setting
+JOURNAL_MODE = False  # Setting; append saved changes to a journal file
+JOURNAL_MAX_SIZE = 16 * 1024 * 1024  # Setting; bytes, compacted when exceeded
 RDF_ROOT_NAME = "Graphic_Thing"  # Setting
 INSTANCES_NAME = "Instances"  # Setting
 MAX_INSTANCES_IN_DIR = 4  # Setting
@@ -36,6 +50,13 @@ DEFAULT_NS = \
     "http://www.semanticweb.org/ak116252/ontologies/2015/2/upper-visualization"
 # DEFAULT_NS = "http://lsd.fi.muni.cz/gate/ontologies/go.rdf"
 RDF_NS_ATTRIBUTE = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about"
+NS_SCAN_MAX_ELEMENTS = 1000  # Setting; elements read to find owl:Ontology
+ONTOLOGY_FILETYPES = [("Ontology files",
+                       (".rdf", ".owl", ".nt", ".ttl", ".saib")),
+                      ("RDF/XML files", (".rdf", ".owl")),
+                      ("N-Triples files", ".nt"),
+                      ("Turtle files", ".ttl"),
+                      ("SAI binary files", ".saib")]
 OWL_PREFIX = "http://www.w3.org/2002/07/owl#"
 COMMON_PREFIXES = set(["http://www.w3.org/2002/07/owl",
                        "http://www.w3.org/2000/01/rdf-schema",
@@ -44,6 +65,7 @@ COMMON_PREFIXES = set(["http://www.w3.org/2002/07/owl",
                        "http://www.owl-ontologies.com/assert.owl",
                        "http://ontosphere3d.sourceforge.net/LogicViews.owl",
                        "http://www.w3.org/2001/XMLSchema",
+                       "http://www.w3.org/XML/1998/namespace",
                        "http://www.w3.org/1999/02/22-rdf-syntax-ns"])
 
 TREE_TAG_PROPERTIES_HEADER = "headerRow"
@@ -159,6 +181,14 @@ SAVE_NOT_LOADED = "Ontology has not been loaded yet."
 SAVE_TO_ORIGINAL = "Do you want to save ontology to the original .rdf file?"
 SAVE_NOT_CHOSEN = "File was not chosen."
 
+# Compact
+COMPACT = "Compact Ontology"
+COMPACT_DONE = "Saved changes have been written into the .rdf file."
+
+# Export
+EXPORT = "Export Ontology"
+EXPORT_DONE = "The saved ontology has been exported into %s."
+
 # Load
 LOAD = "Load Ontology"
 LOAD_SAVING = "Would you like to save your changes before" \
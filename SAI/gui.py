@@ -7,7 +7,13 @@ import Tkinter
 from ttk import Treeview
 import tkFileDialog
 from RDFReader import RDFReader
+from GraphCache import GraphCache
+from GraphStore import openGraphStore
+import OntologyFormat
 from SVGParser import SVGParser
+from TripleTable import TripleTable
+from ElementIndex import ElementIndex
+from ElementSet import toElementSets, instancesToJSON
 import inkex
 import os
 import tkMessageBox
@@ -24,8 +30,19 @@ class PickerGUI():
 
     def __init__(self, master, annotationEffect):
         self.fileName = ""
+        # Format of fileName detected on load (see OntologyFormat)
+        self.fileFormat = None
         self.namespace = None
         self.aEffect = annotationEffect
+        self.graphCache = GraphCache(os.path.join(os.path.expanduser("~"),
+                                                  c.CACHE_DIRNAME),
+                                     c.CACHE_MAX_SIZE)
+        # None if ontologies are kept in memory (see STORE_BACKEND). Even
+        # with a store, the dicts of the GUI are filled from the whole
+        # ontology
+        self.graphStore = openGraphStore(
+            os.path.join(os.path.expanduser("~"), c.STORE_DIRNAME),
+            c.STORE_BACKEND)
         self.root = master
         self.root.bind('<Escape>', self.close)
         self.leftFrame = Tkinter.Frame(master)
@@ -44,6 +61,10 @@ class PickerGUI():
         self.fileMenu.add_command(label="Save to Ontology",
                                   accelerator="Ctrl+S",
                                   command=self.saveOntology)
+        self.fileMenu.add_command(label="Compact Ontology",
+                                  command=self.compactOntology)
+        self.fileMenu.add_command(label="Export Ontology...",
+                                  command=self.exportOntology)
         self.menuBar.add_cascade(label="File", menu=self.fileMenu)
         self.fileMenuUndo = Tkinter.Menu(self.menuBar, tearoff=0)
         self.fileMenuUndo.add_command(label="Undo", accelerator="Ctrl+Z",
@@ -86,7 +107,7 @@ class PickerGUI():
         # define options for opening or saving a file
         self.file_opt = options = {}
         options["defaultextension"] = ".rdf"
-        options["filetypes"] = [("RDF files", ".rdf")]
+        options["filetypes"] = c.ONTOLOGY_FILETYPES
         options["parent"] = master
         options["title"] = "Load a RDF Ontology"
         self.resetVariables()
@@ -137,13 +158,23 @@ class PickerGUI():
         # Keys: classHierarchy, instances; Values: temporary data
         # (to be serialized and saved)
         self.tempData = {}
-        # Key: Class Name; Value: List of IDs of instances of that class
+        # Key: Class Name; Value: dict from the instances of that class to
+        # their SVG element IDs (ElementSets)
         self.instancesbyClass = {}
+        # Annotations of every annotated SVG element
+        self.annotationsByElement = ElementIndex()
+        # Key: ID of an annotated SVG element; Value: digest of its geometry
+        # when the ontology was loaded (see SVGParser.geometrySignatures).
+        # None if unknown, and then all the geometry is saved
+        self.geometrySignatures = None
         # Key: Property Name; Values: Entities that belong to its range
         self.rangesByProperty = {}
         # Key: Property Name; Values: Entities that belong to its domain
         self.domainsByProperty = {}
         self.ontologyTree = None
+        # Key: Entity name; Value: subtree of ontologyTree rooted at it
+        self.subTreesByEntity = None
+        self.subTreesIndexedTree = None
         self.lastId = -1
         self.defaultName = ""
         self.defaultTypeValue = ""
@@ -152,17 +183,17 @@ class PickerGUI():
         self.selectedEntities = None
         self.selectedRange = None
         self.selectedProperties = None
-        # Keys: properties; Values: occurrences of the property
+        # Declared object properties and their occurrences
         # i.e. (s,p,o) triples
-        self.objectProperties = {}
+        self.objectProperties = TripleTable()
         # (s,p,o) triples with object properties to be added to the ontology
-        self.objectPropertiesToAdd = []
-        self.objectPropertiesToRemove = []
+        self.objectPropertiesToAdd = TripleTable()
+        self.objectPropertiesToRemove = TripleTable()
         # Key: TreeView element ID. #Value: (s,p,o) triple.
         self.propertiesByTreeID = {}
-        self.dataTypeProperties = {}
-        self.dataTypePropertiesToAdd = []
-        self.dataTypePropertiesToRemove = []
+        self.dataTypeProperties = TripleTable()
+        self.dataTypePropertiesToAdd = TripleTable()
+        self.dataTypePropertiesToRemove = TripleTable()
 
     def buttonAddClick(self, event):
         """ Button handler for adding entities. """
@@ -400,17 +431,28 @@ class PickerGUI():
         :return: subtree with the entity as a root.
         """
 
-        nodeQueue = entityTree[:]
+        if self.subTreesByEntity is None or \
+                self.subTreesIndexedTree is not entityTree:
+            self.subTreesByEntity = self.indexSubTrees(entityTree)
+            self.subTreesIndexedTree = entityTree
+        return self.subTreesByEntity.get(entity, [])
+
+    def indexSubTrees(self, entityTree):
+        """ Indexes every subtree of a tree structure by its root entity.
+            If an entity appears more than once (multiple parents), the
+            first occurrence in breadth-first order is kept.
+        :param entityTree: Tree structure to be indexed.
+        :return: dict indexed by entity name with its subtree.
+        """
+
+        subTrees = {}
+        nodeQueue = [entityTree] if entityTree else []
         while nodeQueue:
             element = nodeQueue.pop(0)
-            if isinstance(element[0], basestring):
-                if element[0] == entity:
-                    return element
-            iternodes = iter(element)
-            next(iternodes)
-            for n in iternodes:
-                nodeQueue.append(n)
-        return []
+            if element[0] not in subTrees:
+                subTrees[element[0]] = element
+            nodeQueue.extend(element[1:])
+        return subTrees
 
     def prepareSelectedEntities(self, allowOnlyInstances=False):
         """ Initializes the selectedEntities and selectedRange properties
@@ -473,8 +515,11 @@ class PickerGUI():
             fileName = tkFileDialog.askopenfilename(**self.file_opt)
 
         if fileName:
-            self.readerOperation(fileName, self.namespace, serialize=False,
-                                 save=True)
+            if fileName == self.fileName:
+                self.saveChanges(fileName)
+            else:
+                self.readerOperation(fileName, self.namespace,
+                                     serialize=False, save=True)
 
             filePath = os.path.join(os.path.expanduser("~"), c.JSON_FILENAME)
             if os.path.exists(filePath):
@@ -483,6 +528,52 @@ class PickerGUI():
         else:
             tkMessageBox.showwarning(c.SAVE, c.SAVE_NOT_CHOSEN)
 
+    def compactOntology(self, *args):
+        """ Folds the journal of saved changes (see JOURNAL_MODE) into the
+            .rdf file of the loaded ontology.
+        """
+
+        if not self.fileName:
+            tkMessageBox.showwarning(c.COMPACT, c.SAVE_NOT_LOADED)
+            return
+
+        try:
+            reader = self.openReader(self.fileName, self.namespace,
+                                     lazy=True)
+            reader.compactOntology()
+            reader.close()
+            tkMessageBox.showinfo(c.COMPACT, c.COMPACT_DONE)
+        except IOError as e:
+            tkMessageBox.showwarning(c.FILE, c.FILE_ERROR % e.strerror)
+
+    def exportOntology(self, *args):
+        """ Exports the saved ontology into a file of another format, e.g.
+            N-Triples or SAI binary, which are much faster to load than
+            RDF/XML. The geometry of the annotations is recomputed from the
+            current SVG document.
+        """
+
+        if not self.fileName:
+            tkMessageBox.showwarning(c.EXPORT, c.SAVE_NOT_LOADED)
+            return
+
+        fileName = tkFileDialog.asksaveasfilename(
+            defaultextension=".saib", filetypes=c.ONTOLOGY_FILETYPES[1:],
+            parent=self.root, title=c.EXPORT)
+        if not fileName:
+            tkMessageBox.showwarning(c.EXPORT, c.SAVE_NOT_CHOSEN)
+            return
+
+        try:
+            reader = self.openReader(self.fileName, self.namespace,
+                                     lazy=True)
+            self.updateGeometry(reader)
+            reader.exportOntology(fileName)
+            reader.close()
+            tkMessageBox.showinfo(c.EXPORT, c.EXPORT_DONE % fileName)
+        except IOError as e:
+            tkMessageBox.showwarning(c.FILE, c.FILE_ERROR % e.strerror)
+
     def loadOntology(self, *args):
         """ Ask user to choose rdf file. Then load the ontology onto GUI
             and serialize it to a temp file.
@@ -502,6 +593,7 @@ class PickerGUI():
 
         if fileName:
             self.fileName = fileName
+            self.fileFormat = OntologyFormat.guessFormat(fileName)
             candidateSet = self.getCandidateSetOfPrefixes(fileName)
             namespace = self.resolveNamespace(candidateSet)
             if not namespace:
@@ -527,7 +619,10 @@ class PickerGUI():
         """
 
         try:
-            reader = RDFReader(fileName, namespace)
+            # Not lazy: every instance is put in the TreeViews and in the
+            # JSON file right away. The graph itself is not built when the
+            # indexes of the ontology are cached (see RDFReader.graph)
+            reader = self.openReader(fileName, namespace)
             if save:
                 self.addDefaultProperties(reader)
             self.treeEntityPicker.delete(*self.treeEntityPicker.get_children())
@@ -535,7 +630,11 @@ class PickerGUI():
             self.treeRangePicker.delete(*self.treeRangePicker.get_children())
             self.ontologyTree = reader.generateSubTree(c.RDF_ROOT_NAME,
                                                        self.treeEntityPicker)
-            self.instancesbyClass = reader.instancesbyClass
+            self.instancesbyClass = toElementSets(reader.instancesbyClass)
+            self.annotationsByElement = ElementIndex(self.instancesbyClass)
+            self.geometrySignatures = SVGParser(
+                self.aEffect.document.getroot()).geometrySignatures(
+                    self.annotationsByElement.annotations)
             self.initializeTriples(reader, "object")
             self.initializeTriples(reader, "datatype")
             self.domainsByProperty = reader.domainsByProperty
@@ -548,10 +647,46 @@ class PickerGUI():
                 self.serialize()
             if save:
                 self.savingOperations(reader)
+            reader.close()
         except IOError as e:
             tkMessageBox.showwarning(c.FILE, c.FILE_ERROR % e.strerror)
             self.closeGUI()
 
+    def openReader(self, fileName, namespace, lazy=False):
+        """ Returns a reader of the given ontology that uses the cache and
+            the persistent store (if configured) of the GUI.
+        :param fileName: FileName of the .rdf file.
+        :param namespace: Namespace of the ontology.
+        :param lazy: If it is 'True', instances are only loaded from the
+            ontology when they are used (see RDFReader). Only worth it for
+            readers whose instances are not all read, i.e. not on load.
+        :return: RDFReader instance.
+        """
+
+        # The format of the loaded ontology is not detected again
+        format = self.fileFormat if fileName == self.fileName else None
+        return RDFReader(fileName, namespace, cache=self.graphCache,
+                         store=self.graphStore, lazy=lazy, format=format)
+
+    def saveChanges(self, fileName):
+        """ Saves the pending changes into the loaded ontology. Unlike
+            readerOperation, the TreeViews are not rebuilt and the graph is
+            taken from the cache when possible; only the annotations edited
+            since loading are written, besides the geometry of those whose
+            elements have been moved.
+        :param fileName: FileName of the loaded .rdf file.
+        """
+
+        try:
+            # The instances of the reader are not used when saving
+            reader = self.openReader(fileName, self.namespace, lazy=True)
+            self.addDefaultProperties(reader)
+            self.savingOperations(reader, changedOnly=True)
+            reader.close()
+        except IOError as e:
+            tkMessageBox.showwarning(c.FILE, c.FILE_ERROR % e.strerror)
+            self.closeGUI(isInstanceListChanged=True)
+
     def initializeTriples(self, reader, type):
         """ Initialize instances of properties. Allowed types:
             object, datatype.
@@ -565,36 +700,34 @@ class PickerGUI():
             # type == "datatype":
             properties = reader.dataTypeProperties
 
+        table = self.objectProperties if type == "object" \
+            else self.dataTypeProperties
         for property in properties:
-            triples = reader.getPropertyInstances(property)
-            if type == "object":
-                self.objectProperties[property] = []
-            else:
-                self.dataTypeProperties[property] = []
-            for s, p, o in triples:
-                subject = s.split('#')[1]
-                obj = o.split('#')
-                # Some objects (e.g. SVG paths) have no NS
-                obj = obj[1 if len(obj) > 1 else 0]
-                if type == "object":
-                    # Cast to lists so they can be serialized
-                    self.objectProperties[property].append([subject, property,
-                                                            obj])
-                else:
-                    self.dataTypeProperties[property].append([subject,
-                                                              property, obj])
+            table.declare(property)
+            for triple in reader.propertyTriples[property]:
+                table.add(triple)
 
-    def savingOperations(self, reader):
+    def savingOperations(self, reader, changedOnly=False):
         """
         Save current data into an .rdf file.
         :param reader: Instance of the reader class.
+        :param changedOnly: If it is 'True' then only the annotations added
+            or modified since loading (see undoStack) are written, and the
+            geometry of those and of the annotations whose elements have
+            been moved since loading. Otherwise all of them are written.
         """
 
-        self.loadSerializedInstances()
         # Check all 'remove' operations performed; maybe elements need
         # to be removed from the ontology
 
         self.loadSerializedInstances()
+        # (entity, instance) pairs of the annotations edited since loading
+        changed = set((atomicAction["entityName"], atomicAction["instanceId"])
+                      for operation in self.undoStack
+                      for atomicAction in operation
+                      if atomicAction["type"] in ("add", "remove"))
+        # New triples are collected and added to the graph at once
+        reader.beginBatch()
         for operation in self.undoStack:
             for atomicAction in operation:
                 if atomicAction["type"] == "remove":
@@ -613,23 +746,22 @@ class PickerGUI():
                                 reader.removeSVGElementProperty(instance,
                                                                 svgElement)
 
-        for entity, annotations in self.instancesbyClass.iteritems():
-            if reader.hasEntity(entity):  # Ensure entity belongs to ontology
-                for annotation, svgElements in annotations.iteritems():
-                    if not reader.hasInstance(entity, annotation):
-                        reader.addInstance(entity, annotation)
+        annotations = self.annotationPairs(sorted(changed)
+                                           if changedOnly else None)
+        for entity, annotation in annotations:
+            # Ensure entity belongs to ontology
+            if reader.hasEntity(entity):
+                if not reader.hasInstance(entity, annotation):
+                    reader.addInstance(entity, annotation)
 
-                    svg = SVGParser(self.aEffect.document.getroot())
-                    cPnt = svg.countCentralPointForListOfElements(svgElements)
-                    if cPnt is not None:
-                        reader.addCoordinatesXY(annotation, cPnt[0], cPnt[1])
+                for svgElement in self.instancesbyClass[entity][annotation]:
+                    reader.addSVGElementProperty(annotation, svgElement)
 
-                    h, w = svg.computeDimForListOfElements(svgElements)
-                    if h is not None:
-                        reader.addLengthAndWidth(annotation, h, w)
-
-                    for svgElement in svgElements:
-                        reader.addSVGElementProperty(annotation, svgElement)
+        # Elements of annotations that were not edited may have been moved
+        if changedOnly and self.geometrySignatures is not None:
+            self.updateGeometry(reader, changed | self.movedAnnotations())
+        else:
+            self.updateGeometry(reader)
 
         for triple in self.objectPropertiesToRemove:
             reader.removeObjectProperty(triple[c.SUBJECT_INDEX],
@@ -649,30 +781,102 @@ class PickerGUI():
                                        triple[c.PROPERTY_INDEX],
                                        triple[c.OBJECT_INDEX])
 
-        reader.saveOntology()
+        reader.commitBatch()
+        reader.saveOntology(journal=c.JOURNAL_MODE)
+
+    def updateGeometry(self, reader, annotations=None):
+        """ Recomputes the central points and dimensions of annotations of
+            the ontology from the current SVG document, since their
+            elements may have been moved or resized after they were
+            annotated. Unchanged values are left untouched in the graph.
+        :param reader: Instance of the reader class.
+        :param annotations: (entity, instance) pairs of the annotations to
+            update, or None to update all of them.
+        """
+
+        # One parser for all annotations: it indexes the geometry of the
+        # whole document once
+        svg = SVGParser(self.aEffect.document.getroot())
+        for entity, annotation in self.annotationPairs(annotations):
+            if not reader.hasEntity(entity) or \
+                    not reader.hasInstance(entity, annotation):
+                continue
+
+            svgElements = self.instancesbyClass[entity][annotation]
+            cPnt = svg.countCentralPointForListOfElements(svgElements)
+            if cPnt is not None:
+                reader.addCoordinatesXY(annotation, cPnt[0], cPnt[1])
+
+            h, w = svg.computeDimForListOfElements(svgElements)
+            if h is not None:
+                reader.addLengthAndWidth(annotation, h, w)
+
+    def annotationPairs(self, annotations=None):
+        """ Returns the given (entity, instance) pairs that are current
+            annotations, or the pairs of all annotations if None.
+        :param annotations: Iterable of (entity, instance) pairs or None.
+        :return: List of (entity, instance) pairs.
+        """
+
+        if annotations is None:
+            return [(entity, annotation)
+                    for entity, instances in self.instancesbyClass.iteritems()
+                    for annotation in instances]
+        return [(entity, annotation) for entity, annotation in annotations
+                if annotation in self.instancesbyClass.get(entity, ())]
+
+    def movedAnnotations(self):
+        """ Returns the annotations whose SVG elements have been moved,
+            resized or removed since the ontology was loaded. Moves made
+            before loading are only saved by exportOntology, which
+            recomputes all the geometry.
+        :return: Set of (entity, instance) pairs.
+        """
+
+        svg = SVGParser(self.aEffect.document.getroot())
+        signatures = svg.geometrySignatures(self.geometrySignatures)
+        moved = [elementId for elementId, signature
+                 in self.geometrySignatures.iteritems()
+                 if signatures[elementId] != signature]
+        return self.annotationsByElement.annotationsOf(moved)
 
     def getCandidateSetOfPrefixes(self, fileName):
         """ This method tries to find the correct prefix of ontology directly
-            from .rdf file.
+            from .rdf file. Only the header of the file is read: parsing
+            stops at the owl:Ontology element, or after NS_SCAN_MAX_ELEMENTS
+            elements if there is none. Files of other formats are handled
+            by OntologyFormat.scanNamespaces.
         :param fileName: Name of the file to be searched.
         :return: Candidate set of prefixes that are used in ontology without
             common ones.
         """
 
-        tree = etree.parse(fileName)
-        root = tree.getroot()
         setOfPrefixes = set()
-
-        for name in root.nsmap:
-            setOfPrefixes.add(self.removeLastHTag(root.nsmap[name]))
+        format = self.fileFormat or OntologyFormat.guessFormat(fileName)
+        if format != OntologyFormat.XML:
+            for namespace in OntologyFormat.scanNamespaces(
+                    fileName, format, c.NS_SCAN_MAX_ELEMENTS):
+                setOfPrefixes.add(self.removeLastHTag(namespace))
+            return setOfPrefixes - c.COMMON_PREFIXES
 
         # namespace generated by the Protege
-        inkex.NSS['owl'] = c.OWL_PREFIX
-        ontNS = root.xpath(".//owl:Ontology", namespaces=inkex.NSS)
-        if ontNS is not None and len(ontNS) > 0 and ontNS[0] is not None:
-            if c.RDF_NS_ATTRIBUTE in ontNS[0].attrib:
-                cand = self.removeLastHTag(ontNS[0].attrib[c.RDF_NS_ATTRIBUTE])
-                setOfPrefixes.add(cand)
+        ontologyTag = "{%s}Ontology" % c.OWL_PREFIX
+        with open(fileName, 'rb') as f:
+            for count, (event, element) in enumerate(
+                    etree.iterparse(f, events=("start", ))):
+                if count == 0:
+                    # Root element
+                    for name in element.nsmap:
+                        setOfPrefixes.add(
+                            self.removeLastHTag(element.nsmap[name]))
+                elif element.tag == ontologyTag:
+                    if c.RDF_NS_ATTRIBUTE in element.attrib:
+                        cand = self.removeLastHTag(
+                            element.attrib[c.RDF_NS_ATTRIBUTE])
+                        setOfPrefixes.add(cand)
+                    break
+                if count >= c.NS_SCAN_MAX_ELEMENTS:
+                    break
 
         return setOfPrefixes - c.COMMON_PREFIXES
 
@@ -747,7 +951,7 @@ class PickerGUI():
                     self.expandBranches(treeViewInstance, childID)
                 # Insert instances of current Entity
                 if i in self.instancesbyClass:
-                    self.insertInstancesInTree(self.instancesbyClass[i],
+                    self.insertInstancesInTree(i, self.instancesbyClass[i],
                                                treeViewInstance, childID,
                                                selectPrevious)
                 self.stack.append(childID)
@@ -769,9 +973,10 @@ class PickerGUI():
             treeViewInstance.item(tempStack.pop(), open=True)
         self.setFocus(treeViewInstance, rowID)
 
-    def insertInstancesInTree(self, instanceList, treeViewInstance, parentID,
-                              selectPrevious="none"):
+    def insertInstancesInTree(self, entity, instanceList, treeViewInstance,
+                              parentID, selectPrevious="none"):
         """ Insert instances from instanceList into treeView.
+        :param entity: Entity of the instances.
         :param instanceList: List of instances.
         :param treeViewInstance: View of the tree.
         :param parentID: Id of the parent in the tree view.
@@ -786,8 +991,11 @@ class PickerGUI():
                                         tags=(c.TREE_TAG_INSTANCE,
                                               c.TREE_TAG_INSTANCES_HEADER, ))
 
+        # Annotations containing any selected SVG element
+        highlighted = self.annotationsByElement.annotationsOf(
+            self.aEffect.selected)
         for instance in sorted(instanceList.keys()):
-            if set(self.aEffect.selected).intersection(instanceList[instance]):
+            if (entity, instance) in highlighted:
                 tag = c.TREE_TAG_HIGHLIGHT
             else:
                 tag = c.TREE_TAG_INSTANCE
@@ -807,10 +1015,10 @@ class PickerGUI():
         """ Method initializes tree of properties.
         :param treeViewInstance: View of the tree.
         """
-        if self.objectProperties:
+        if self.objectProperties.properties():
             oID = treeViewInstance.insert('', 'end', text='Object Properties',
                                           tags=(c.TREE_TAG_PROPERTIES_HEADER,))
-        if self.dataTypeProperties:
+        if self.dataTypeProperties.properties():
             dID = treeViewInstance.insert('', 'end', text='Datatype Properties',
                                           tags=(c.TREE_TAG_PROPERTIES_HEADER,))
         self.addPropertiesToTreeView(treeViewInstance, self.objectProperties,
@@ -826,11 +1034,11 @@ class PickerGUI():
         :param type: Type of the property.
         """
         selected = self.previousSelectedProperties()
-        for property in props:
+        for property in props.properties():
             textAdd = property
             parID = treeViewInstance.insert(headerID, 'end', text=textAdd,
                                             tags=(c.TREE_TAG_PROPERTY, type))
-            triples = props[property]
+            triples = props.triples(property)
             if selected and textAdd in selected:
                 self.expandPropertyBranches(treeViewInstance, [headerID],
                                             parID)
@@ -876,7 +1084,8 @@ class PickerGUI():
         """
 
         treeViewInstance.delete(*treeViewInstance.get_children())
-        if self.objectProperties or self.dataTypeProperties:
+        if self.objectProperties.properties() or \
+                self.dataTypeProperties.properties():
             self.initializePropertyTree(treeViewInstance)
         else:
             tkMessageBox.showwarning(c.PROP, c.PROP_NOTHING_FOUND)
@@ -894,7 +1103,9 @@ class PickerGUI():
                     self.tempData = json.load(f)
                     self.ontologyTree = self.tempData["classHierarchy"]
                     self.stack = ['']
-                    self.instancesbyClass = self.tempData["instances"]
+                    self.instancesbyClass = \
+                        toElementSets(self.tempData["instances"])
+                    self.loadSerializedElementIndex()
                     self.defaultName = self.tempData["defaultName"]
                     self.defaultTypeValue = self.tempData["defaultValue"]
                     self.defaultTypeValue = self.tempData["defaultValue"]
@@ -902,24 +1113,16 @@ class PickerGUI():
                     self.namespace = self.tempData["namespace"]
                     self.lastId = self.tempData["lastId"]
                     self.undoStack = self.tempData["undoStack"]
+                    self.geometrySignatures = \
+                        self.tempData.get("geometrySignatures")
                     self.subTreeFromFileRecursive(self.ontologyTree,
                                                   treeViewInstance,
                                                   selectPrevious="subject")
                     self.treeConfiguration(self.treeEntityPicker)
                     self.treeConfiguration(self.treeRangePicker)
-                    self.objectProperties = self.tempData["objectProperties"]
-                    self.dataTypeProperties = \
-                        self.tempData["dataTypeProperties"]
                     self.domainsByProperty = self.tempData["domains"]
                     self.rangesByProperty = self.tempData["ranges"]
-                    self.objectPropertiesToAdd = \
-                        self.tempData["propertyTriples"]
-                    self.objectPropertiesToRemove = \
-                        self.tempData["propertyTriplesToRemove"]
-                    self.dataTypePropertiesToAdd = \
-                        self.tempData["dataTypePropertyTriples"]
-                    self.dataTypePropertiesToRemove = \
-                        self.tempData["dataTypePropertyTriplesToRemove"]
+                    self.loadSerializedTriples()
                     self.initializePropertyTree(self.treePropertyPicker)
                 except ValueError:
                     self.ontologyTree = None
@@ -937,21 +1140,15 @@ class PickerGUI():
             with open(filePath, 'r') as f:
                 try:
                     self.tempData = json.load(f)
-                    self.instancesbyClass = self.tempData["instances"]
+                    self.instancesbyClass = \
+                        toElementSets(self.tempData["instances"])
+                    self.loadSerializedElementIndex()
                     self.domainsByProperty = self.tempData["domains"]
                     self.rangesByProperty = self.tempData["ranges"]
-                    self.objectProperties = self.tempData["objectProperties"]
-                    self.dataTypeProperties = \
-                        self.tempData["dataTypeProperties"]
-                    self.objectPropertiesToAdd = \
-                        self.tempData["propertyTriples"]
-                    self.dataTypePropertiesToAdd = \
-                        self.tempData["dataTypePropertyTriples"]
-                    self.dataTypePropertiesToRemove = \
-                        self.tempData["dataTypePropertyTriplesToRemove"]
-                    self.objectPropertiesToRemove = \
-                        self.tempData["propertyTriplesToRemove"]
+                    self.loadSerializedTriples()
                     self.namespace = self.tempData["namespace"]
+                    self.geometrySignatures = \
+                        self.tempData.get("geometrySignatures")
                 except ValueError as e:
                     tkMessageBox.showwarning(c.FILE,
                                              c.FILE_SER_ERROR % e.strerror)
@@ -1020,7 +1217,6 @@ class PickerGUI():
         if added:
             tkMessageBox.showwarning(c.PROP,
                                      c.PROP_DATA_NOT_FOUND % ', '.join(added))
-            reader.saveOntology()
 
     def close(self, event):
         self.closeGUI(isInstanceListChanged=True)
@@ -1036,6 +1232,22 @@ class PickerGUI():
 
         self.root.destroy()
 
+    def loadSerializedTriples(self):
+        """ Load the property triples, and the triples to be added and
+            removed, from the JSON data in tempData.
+        """
+
+        for key, attribute in c.JSON_TRIPLE_TABLES:
+            setattr(self, attribute, TripleTable.fromJSON(self.tempData[key]))
+
+    def loadSerializedElementIndex(self):
+        """ Load the reverse index of the annotations from the JSON data in
+            tempData, or build it if the file was written without it.
+        """
+
+        self.annotationsByElement = ElementIndex.fromJSON(
+            self.tempData.get("annotationsByElement"), self.instancesbyClass)
+
     def serialize(self):
         """ Serialize Ontology into JSON file in the user's home folder. """
         serializedInfo = {}
@@ -1045,26 +1257,22 @@ class PickerGUI():
             tkMessageBox.showwarning(c.FILE, c.FILE_JSON_ERROR)
         serializedInfo["fileName"] = self.fileName
         serializedInfo["namespace"] = self.namespace
-        serializedInfo["instances"] = self.instancesbyClass
-        serializedInfo["objectProperties"] = self.objectProperties
-        serializedInfo["dataTypeProperties"] = self.dataTypeProperties
+        serializedInfo["instances"] = instancesToJSON(self.instancesbyClass)
+        serializedInfo["annotationsByElement"] = \
+            self.annotationsByElement.toJSON()
         serializedInfo["ranges"] = self.rangesByProperty
         serializedInfo["domains"] = self.domainsByProperty
         serializedInfo["lastId"] = self.lastId
         serializedInfo["undoStack"] = self.undoStack
+        serializedInfo["geometrySignatures"] = self.geometrySignatures
         serializedInfo["selectedEntities"] = [] if not self.selectedEntities \
             else self.selectedEntities
         serializedInfo["selectedRanges"] = [] if not self.selectedRange \
             else self.selectedRange
         serializedInfo["selectedProperties"] = [] if not self.selectedProperties \
             else self.selectedProperties
-        serializedInfo["propertyTriples"] = self.objectPropertiesToAdd
-        serializedInfo["propertyTriplesToRemove"] = \
-            self.objectPropertiesToRemove
-        serializedInfo["dataTypePropertyTriples"] = \
-            self.dataTypePropertiesToAdd
-        serializedInfo["dataTypePropertyTriplesToRemove"] = \
-            self.dataTypePropertiesToRemove
+        for key, attribute in c.JSON_TRIPLE_TABLES:
+            serializedInfo[key] = getattr(self, attribute).toJSON()
         serializedInfo["defaultName"] = self.defaultName
         serializedInfo["defaultValue"] = self.defaultTypeValue
         serializedInfo["defaultValue"] = self.defaultTypeValue
@@ -0,0 +1,59 @@
+"""
+Compares the per-element geometry code of SVGParser with the NumPy batch
+engine (GeometryEngine): time to compute the central points of every
+element of a synthetic chart, and time to compute the central point and
+dimensions of its annotations. Both must give the same results.
+
+Usage: python bench_geometry.py [elements ...]
+"""
+
+import random
+import sys
+import time
+from lxml import etree
+
+import synthetic
+import GeometryEngine
+from SVGParser import SVGParser
+
+ANNOTATION_SIZE = 3
+
+
+def measure(root, annotations, batch):
+    """ Returns the index time, the annotation time and the results. """
+    svg = SVGParser(root, batch=batch)
+    start = time.time()
+    svg.findCenters()
+    indexTime = time.time() - start
+    start = time.time()
+    results = [(svg.countCentralPointForListOfElements(annotation),
+                svg.computeDimForListOfElements(annotation))
+               for annotation in annotations]
+    return indexTime, time.time() - start, results
+
+
+def main():
+    if not GeometryEngine.isAvailable():
+        print "NumPy is not installed"
+        return
+    print "%10s %10s %10s %14s %10s" % ("elements", "engine", "index (s)",
+                                        "annotations (s)", "speed-up")
+    for n in synthetic.parseSizes([10000, 100000]):
+        root = etree.fromstring(synthetic.svgDocument(n))
+        ids = [element.get("id") for element in root.iter()
+               if element.get("id") != "layer1"]
+        rnd = random.Random(n)
+        annotations = [rnd.sample(ids, ANNOTATION_SIZE)
+                       for i in xrange(n // ANNOTATION_SIZE)]
+        annotations.extend(rnd.sample(ids, len(ids) // 10) for i in xrange(5))
+        elementTimes = measure(root, annotations, batch=False)
+        batchTimes = measure(root, annotations, batch=True)
+        assert elementTimes[2] == batchTimes[2]
+        for name, times in (("element", elementTimes), ("batch", batchTimes)):
+            print "%10d %10s %10.3f %14.3f %9.1fx" % (
+                n, name, times[0], times[1],
+                sum(elementTimes[:2]) / sum(times[:2]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compares the per-instance SPARQL loading of RDFReader with the bulk loader.
+
+Usage: python bench_load.py [individuals ...]
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import synthetic
+from RDFReader import RDFReader
+
+
+def legacyLoad(reader):
+    """ Loads the instances with one SPARQL query per individual. """
+    instancesbyClass = {}
+    for entity, instances in reader.getInstanceList().iteritems():
+        instancesbyClass[entity] = {}
+        for instance in instances:
+            instancesbyClass[entity][instance] = \
+                reader.getSVGElementsOfInstance(instance)
+    reader.getObjectPropertyList()
+    reader.getDatatypePropertyList()
+    return instancesbyClass
+
+
+def normalize(instancesbyClass):
+    return dict((entity, dict((i, sorted(e)) for i, e in instances.items()))
+                for entity, instances in instancesbyClass.items())
+
+
+def main():
+    tmpDir = tempfile.mkdtemp()
+    try:
+        print "%12s %12s %12s %10s" % ("individuals", "sparql (s)",
+                                        "bulk (s)", "speed-up")
+        for n in synthetic.parseSizes([1000, 10000, 100000]):
+            path = os.path.join(tmpDir, "onto%d.rdf" % n)
+            synthetic.writeOntology(path, n)
+            reader = RDFReader(path, synthetic.NAMESPACE)
+
+            start = time.time()
+            legacy = legacyLoad(reader)
+            sparqlTime = time.time() - start
+
+            reader.instancesbyClass = {}
+            start = time.time()
+            reader.bulkLoad()
+            bulkTime = time.time() - start
+
+            assert normalize(legacy) == normalize(reader.instancesbyClass)
+            print "%12d %12.3f %12.3f %9.1fx" % (n, sparqlTime, bulkTime,
+                                                 sparqlTime / bulkTime)
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compares the time needed to load the same ontology from RDF/XML, Turtle,
+N-Triples and the SAI binary snapshot format.
+
+Usage: python bench_parse.py [individuals ...]
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import rdflib
+import synthetic
+import OntologyFormat
+
+EXTENSIONS = [".rdf", ".ttl", ".nt", ".saib"]
+
+
+def main():
+    tmpDir = tempfile.mkdtemp()
+    try:
+        print "%12s %8s %10s %10s %10s" % ("individuals", "format",
+                                           "size (kB)", "parse (s)",
+                                           "speed-up")
+        for n in synthetic.parseSizes([1000, 10000]):
+            basePath = os.path.join(tmpDir, "onto%d" % n)
+            synthetic.writeOntology(basePath + ".rdf", n)
+            graph = OntologyFormat.parseOntology(rdflib.Graph(),
+                                                 basePath + ".rdf")
+            for extension in EXTENSIONS[1:]:
+                OntologyFormat.serializeOntology(graph, basePath + extension)
+            xmlTime = None
+            for extension in EXTENSIONS:
+                path = basePath + extension
+                start = time.time()
+                parsed = OntologyFormat.parseOntology(rdflib.Graph(), path)
+                parseTime = time.time() - start
+                xmlTime = xmlTime or parseTime
+                assert len(parsed) == len(graph)
+                print "%12d %8s %10d %10.3f %9.1fx" % (
+                    n, extension, os.path.getsize(path) / 1024, parseTime,
+                    xmlTime / parseTime)
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compares svg.path.parse_path with the PathData scanner used by SVGParser,
+and the bounding boxes of paths computed one by one with those computed in
+batch with NumPy (PathBounds), on the path data of a synthetic map. The
+results of each pair must be the same.
+
+Usage: python bench_paths.py [paths ...]
+"""
+
+import random
+import time
+
+import synthetic
+import PathBounds
+import PathData
+
+SEGMENTS = 40
+
+
+def parsePathStarts(pathData):
+    """ Returns the start points of the segments of a path, with svg.path.
+    """
+
+    from svg.path import parse_path
+    return [(segment.start.real, segment.start.imag)
+            for segment in parse_path(pathData)]
+
+
+def scanStarts(pathData):
+    """ Returns the start points of the segments of a path, with PathData.
+    """
+
+    kinds, coords = PathData.scan(pathData)
+    return zip(coords[0::PathData.STRIDE], coords[1::PathData.STRIDE])
+
+
+def measure(function, *args):
+    """ Returns the time taken by a function and its result. """
+    start = time.time()
+    result = function(*args)
+    return time.time() - start, result
+
+
+def main():
+    try:
+        import svg.path
+    except ImportError:
+        svg = None
+    print "%10s %20s %10s %10s" % ("paths", "method", "time (s)", "speed-up")
+    for n in synthetic.parseSizes([1000, 10000]):
+        rnd = random.Random(n)
+        paths = [synthetic.pathData(SEGMENTS, rnd) for i in xrange(n)]
+        results = []
+        scanTime, starts = measure(lambda: [scanStarts(d) for d in paths])
+        if svg is not None:
+            parseTime, parsed = measure(
+                lambda: [parsePathStarts(d) for d in paths])
+            assert parsed == starts
+            results.append(("svg.path", parseTime, parseTime))
+        results.append(("PathData", scanTime, results[0][1] if results
+                        else scanTime))
+        scans = [PathData.scan(d) for d in paths]
+        boundsTime, boxes = measure(
+            lambda: [PathBounds.bounds(*scan) for scan in scans])
+        results.append(("bounds", boundsTime, boundsTime))
+        if PathBounds.isAvailable():
+            batchTime, batchBoxes = measure(PathBounds.batchBounds, scans)
+            assert batchBoxes.tolist() == [list(box) for box in boxes]
+            results.append(("batchBounds", batchTime, boundsTime))
+        for name, elapsed, reference in results:
+            print "%10d %20s %10.3f %9.1fx" % (n, name, elapsed,
+                                               reference / elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compares saving annotations into the graph with one call per triple and
+with the batched mutations of RDFReader (beginBatch / commitBatch), for the
+in-memory graph and for a persistent store, where every change is written
+to disk and the batch is one transaction. Persistent backends that cannot
+be used here (e.g. Sleepycat without the bsddb module) are reported as
+unavailable.
+
+Usage: python bench_save.py [annotations ...]
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import synthetic
+from GraphStore import openGraphStore
+from RDFReader import RDFReader
+
+BACKENDS = ["IOMemory", "Sleepycat"]
+
+
+def saveAnnotations(reader, n):
+    """ Applies the changes made by PickerGUI.savingOperations for n
+        annotations: half of them already exist in the ontology, the other
+        half are new.
+    """
+
+    for i in xrange(n):
+        annotation = "rect%d" % (i + n / 2)
+        entity = synthetic.LEAF_CLASSES[i % len(synthetic.LEAF_CLASSES)]
+        if not reader.hasInstance(entity, annotation):
+            reader.addInstance(entity, annotation)
+        reader.addCoordinatesXY(annotation, i * 0.5, i * 0.25)
+        reader.addLengthAndWidth(annotation, 10.0, 20.0)
+        for j in xrange(3):
+            reader.addSVGElementProperty(annotation, "rect%d_%d" % (i, j))
+
+
+def timeSave(path, n, batched, saves, store):
+    """ Times the last of the given number of consecutive saves; returns
+        the time and the triples of the graph.
+    """
+
+    if store is not None:
+        store.invalidate(path)
+    reader = RDFReader(path, synthetic.NAMESPACE, store=store)
+    for i in xrange(saves - 1):
+        saveAnnotations(reader, n)
+    reader.graph
+    start = time.time()
+    if batched:
+        reader.beginBatch()
+    saveAnnotations(reader, n)
+    if batched:
+        reader.commitBatch()
+    elif store is not None:
+        reader.graph.commit()
+    elapsed = time.time() - start
+    triples = set(reader.graph)
+    reader.close()
+    return elapsed, triples
+
+
+def main():
+    tmpDir = tempfile.mkdtemp()
+    try:
+        print "%12s %10s %8s %14s %12s %10s" % (
+            "annotations", "backend", "save", "per-triple (s)",
+            "batched (s)", "speed-up")
+        for n in synthetic.parseSizes([1000, 10000]):
+            path = os.path.join(tmpDir, "onto%d.rdf" % n)
+            synthetic.writeOntology(path, n)
+            for backend in BACKENDS:
+                store = openGraphStore(os.path.join(tmpDir, backend),
+                                       backend)
+                if backend != BACKENDS[0] and store is None:
+                    print "%12d %10s %8s" % (n, backend, "unavailable")
+                    continue
+                # The second save finds most of the triples unchanged
+                for saves, label in [(1, "first"), (2, "second")]:
+                    singleTime, singleTriples = timeSave(path, n, False,
+                                                         saves, store)
+                    batchTime, batchTriples = timeSave(path, n, True, saves,
+                                                       store)
+                    assert singleTriples == batchTriples
+                    print "%12d %10s %8s %14.3f %12.3f %9.1fx" % (
+                        n, backend, label, singleTime, batchTime,
+                        singleTime / batchTime)
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()
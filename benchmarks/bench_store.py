@@ -0,0 +1,91 @@
+"""
+Compares the in-memory graph of RDFReader with a persistent store backend
+(see STORE_BACKEND): time to open the ontology the first time (parse or
+import) and the second time, peak memory, and latency of hasInstance
+lookups. The persistent store is also measured with a lazy RDFReader,
+which does not build the instance indexes in memory. Every measurement
+runs in its own process so that peak memory is not shared between
+backends. Persistent backends that cannot be used here (e.g. Sleepycat
+without the bsddb module) are reported as unavailable.
+
+Usage: python bench_store.py [individuals ...]
+"""
+
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic
+from GraphStore import openGraphStore, MEMORY_BACKENDS
+from RDFReader import RDFReader
+
+# (backend, lazy) pairs
+BACKENDS = [("IOMemory", False), ("Sleepycat", False), ("Sleepycat", True)]
+LOOKUPS = 1000
+
+
+def measure(backend, lazy, path, storeDir, n):
+    """ Opens the ontology twice with the given backend and prints the
+        results as one line: first open, second open, lookup latency (s)
+        and peak memory (kB).
+    """
+
+    store = openGraphStore(storeDir, backend)
+    times = []
+    for i in xrange(2):
+        start = time.time()
+        reader = RDFReader(path, synthetic.NAMESPACE, store=store,
+                           lazy=lazy)
+        reader.graph
+        times.append(time.time() - start)
+        if i == 0:
+            reader.close()
+    start = time.time()
+    for i in xrange(LOOKUPS):
+        k = (i * 7919) % n
+        entity = synthetic.LEAF_CLASSES[k % len(synthetic.LEAF_CLASSES)]
+        assert reader.hasInstance(entity, "rect%d" % k)
+    latency = (time.time() - start) / LOOKUPS
+    reader.close()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print times[0], times[1], latency, peak
+
+
+def main():
+    if sys.argv[1:2] == ["--measure"]:
+        backend, lazy, path, storeDir, n = sys.argv[2:]
+        measure(backend, lazy == "lazy", path, storeDir, int(n))
+        return
+    tmpDir = tempfile.mkdtemp()
+    try:
+        print "%12s %17s %14s %15s %12s %12s" % (
+            "individuals", "backend", "first open (s)", "second open (s)",
+            "lookup (ms)", "peak (MB)")
+        for n in synthetic.parseSizes([1000, 10000, 100000]):
+            path = os.path.join(tmpDir, "onto%d.rdf" % n)
+            synthetic.writeOntology(path, n)
+            for backend, lazy in BACKENDS:
+                name = backend + (" (lazy)" if lazy else "")
+                if backend not in MEMORY_BACKENDS and \
+                        openGraphStore(tmpDir, backend) is None:
+                    print "%12d %17s %14s" % (n, name, "unavailable")
+                    continue
+                storeDir = os.path.join(tmpDir, backend)
+                output = subprocess.check_output(
+                    [sys.executable, __file__, "--measure", backend,
+                     "lazy" if lazy else "eager", path, storeDir, str(n)])
+                first, second, latency, peak = output.split()
+                print "%12d %17s %14.3f %15.3f %12.3f %12.1f" % (
+                    n, name, float(first), float(second),
+                    float(latency) * 1000, float(peak) / 1024)
+                shutil.rmtree(storeDir, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()
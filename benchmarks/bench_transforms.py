@@ -0,0 +1,64 @@
+"""
+Compares composing the transforms of the ancestors of every element
+separately with the TransformCache used by SVGParser, which memoises the
+cumulative matrix of every group: time to compute the cumulative matrices
+of all elements of a synthetic chart whose elements are nested in groups
+of growing depth. Both must give the same matrices.
+
+Usage: python bench_transforms.py [depth ...]
+"""
+
+import time
+from lxml import etree
+
+import synthetic
+import SVGTransform
+from SVGParser import SVG_TAGS
+
+ELEMENTS = 20000
+
+
+def ancestorMatrix(element):
+    """ Returns the cumulative matrix of an element by walking up its
+        ancestors, without memoisation.
+    """
+
+    transforms = []
+    while element is not None:
+        transforms.append(element.get("transform"))
+        element = element.getparent()
+    matrix = SVGTransform.IDENTITY
+    for transform in reversed(transforms):
+        if transform:
+            own = SVGTransform.parse(transform)
+            matrix = own if matrix == SVGTransform.IDENTITY else \
+                SVGTransform.multiply(matrix, own)
+    return matrix
+
+
+def measure(matrixOf, elements):
+    """ Returns the time taken to compute the cumulative matrices of the
+        elements, and the matrices.
+    """
+
+    start = time.time()
+    matrices = [matrixOf(element) for element in elements]
+    return time.time() - start, matrices
+
+
+def main():
+    print "%8s %10s %10s %10s" % ("depth", "method", "time (s)", "speed-up")
+    for depth in synthetic.parseSizes([1, 5, 20, 50]):
+        root = etree.fromstring(synthetic.svgDocument(ELEMENTS, depth=depth))
+        elements = list(root.iter(*SVG_TAGS.values()))
+        walkTime, walked = measure(ancestorMatrix, elements)
+        cacheTime, cached = measure(
+            SVGTransform.TransformCache().matrixOf, elements)
+        assert walked == cached
+        for name, elapsed in (("ancestors", walkTime), ("cache", cacheTime)):
+            print "%8d %10s %10.3f %9.1fx" % (depth, name, elapsed,
+                                              walkTime / elapsed)
+
+
+if __name__ == "__main__":
+    main()
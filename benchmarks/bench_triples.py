@@ -0,0 +1,123 @@
+"""
+Compares the property state of the GUI kept as lists of [s, p, o] lists
+(as loaded from viso.json) with a TripleTable: latency of membership
+tests, which is what the table is for, and memory per triple and size in
+viso.json. The memory of the table is measured for the whole structure,
+before and after its lazy indexes are built, and broken down into its
+parts.
+
+Usage: python bench_triples.py [individuals ...]
+"""
+
+import json
+import sys
+import time
+from array import array
+
+import synthetic
+from TripleTable import TripleTable
+
+LOOKUPS = 100
+
+
+def deepSize(obj, seen=None):
+    """ Returns the memory taken by an object and by the containers,
+        strings and numbers it references, each of them counted once.
+    """
+
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.iteritems():
+            size += deepSize(key, seen) + deepSize(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deepSize(item, seen)
+    elif not isinstance(obj, (basestring, int, long, float, array)):
+        size += deepSize(vars(obj), seen)
+    return size
+
+
+def freshTriples(n):
+    """ Yields the hasSVGElement triples of n individuals, with new string
+        objects for every triple, as json.load returns them.
+    """
+
+    property = synthetic.DATATYPE_PROPERTIES[0]
+    for i in xrange(n):
+        for j in xrange(3):
+            yield [u"rect%d" % i, u"%s" % property, u"rect%d_%d" % (i, j)]
+
+
+def buildIndexes(table):
+    """ Builds the subject, property and object indexes of a table, as
+        the GUI does when it lists the triples of a property or removes an
+        annotation.
+    """
+
+    table.triples(synthetic.DATATYPE_PROPERTIES[0])
+    table.triplesOf(u"rect0")
+
+
+def breakdown(table):
+    """ Returns the memory taken by the parts of a table, each object
+        counted once across them, as (name, bytes) pairs.
+    """
+
+    seen = set([id(table), id(vars(table))])
+    parts = [("strings", (table.strings, table.ids)),
+             ("columns", table.columns),
+             ("keys", table.keys),
+             ("indexes", table.indexes)]
+    return [(name, deepSize(part, seen)) for name, part in parts]
+
+
+def measure(kind, n):
+    """ Builds the triples of n individuals as the given kind of container
+        and returns memory per triple (bytes), JSON size per triple (bytes),
+        lookup latency (s) and the container.
+    """
+
+    if kind == "lists":
+        triples = list(freshTriples(n))
+        serialized = triples
+    else:
+        triples = TripleTable(freshTriples(n))
+        serialized = triples.toJSON()
+        if kind == "indexed":
+            buildIndexes(triples)
+    memory = float(deepSize(triples)) / (3 * n)
+    start = time.time()
+    for i in xrange(LOOKUPS):
+        k = (i * 7919) % n
+        assert [u"rect%d" % k, synthetic.DATATYPE_PROPERTIES[0],
+                u"rect%d_2" % k] in triples
+    latency = (time.time() - start) / LOOKUPS
+    return (memory, float(len(json.dumps(serialized))) / (3 * n), latency,
+            triples)
+
+
+def main():
+    print "%12s %8s %14s %14s %12s" % ("individuals", "kind", "memory (B/t)",
+                                       "json (B/t)", "lookup (us)")
+    tables = []
+    for n in synthetic.parseSizes([10000, 100000]):
+        # "table" has no indexes yet, as after loading viso.json
+        for kind in ["lists", "table", "indexed"]:
+            memory, size, latency, triples = measure(kind, n)
+            print "%12d %8s %14.1f %14.1f %12.2f" % (
+                n, kind, memory, size, latency * 1e6)
+            if kind == "indexed":
+                tables.append((n, triples))
+    print
+    print "%12s %10s %14s" % ("individuals", "part", "memory (B/t)")
+    for n, table in tables:
+        for name, size in breakdown(table):
+            print "%12d %10s %14.1f" % (n, name, float(size) / (3 * n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Synthetic ontologies used by the benchmarks. The generated files follow the
+structure of the upper visualization ontology: a small class hierarchy,
+a few object and datatype properties and N annotated individuals, each of
+them with three hasSVGElement values. Synthetic SVG charts are generated
+too.
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+NAMESPACE = "http://example.org/benchmark/upper-visualization"
+CLASSES = {"Graphic_Thing": None,
+           "Graphic_Object": "Graphic_Thing",
+           "Bar": "Graphic_Object",
+           "Axis": "Graphic_Object",
+           "Label": "Graphic_Thing",
+           "Legend": "Label"}
+LEAF_CLASSES = ["Bar", "Axis", "Label", "Legend"]
+DATATYPE_PROPERTIES = ["hasSVGElement", "hasXCoordinate", "hasYCoordinate",
+                       "has_length", "has_width"]
+# Elements per nested group of svgDocument, and transforms of the groups
+GROUP_SIZE = 100
+GROUP_TRANSFORMS = ["translate(%.3f, 5)", "rotate(%.3f 10 10)",
+                    "scale(1.01) skewX(%.3f)"]
+
+
+def writeOntology(path, individuals, namespace=NAMESPACE):
+    """ Writes an RDF/XML ontology with the given number of individuals.
+    :param path: Path of the file to be written.
+    :param individuals: Number of annotated individuals.
+    :param namespace: Namespace of the ontology.
+    """
+
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0"?>\n'
+                '<rdf:RDF xmlns="%s#" xml:base="%s"\n'
+                ' xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"\n'
+                ' xmlns:owl="http://www.w3.org/2002/07/owl#"\n'
+                ' xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#">\n'
+                % (namespace, namespace))
+        f.write('<owl:Ontology rdf:about="%s"/>\n' % namespace)
+        for cl, parent in sorted(CLASSES.items()):
+            f.write('<owl:Class rdf:about="#%s">' % cl)
+            if parent:
+                f.write('<rdfs:subClassOf rdf:resource="#%s"/>' % parent)
+            f.write('</owl:Class>\n')
+        f.write('<owl:ObjectProperty rdf:about="#has_label">'
+                '<rdfs:domain rdf:resource="#Bar"/>'
+                '<rdfs:range rdf:resource="#Label"/>'
+                '</owl:ObjectProperty>\n')
+        for dp in DATATYPE_PROPERTIES:
+            f.write('<owl:DatatypeProperty rdf:about="#%s"/>\n' % dp)
+        for i in xrange(individuals):
+            cl = LEAF_CLASSES[i % len(LEAF_CLASSES)]
+            f.write('<owl:NamedIndividual rdf:about="#rect%d">'
+                    '<rdf:type rdf:resource="#%s"/>' % (i, cl))
+            for j in xrange(3):
+                f.write('<hasSVGElement>rect%d_%d</hasSVGElement>' % (i, j))
+            if cl == "Bar" and i > 0:
+                f.write('<has_label rdf:resource="#rect%d"/>' % (i - 1))
+            f.write('</owl:NamedIndividual>\n')
+        f.write('</rdf:RDF>\n')
+
+
+def svgDocument(elements, seed=0, depth=0):
+    """ Returns the markup of an SVG chart with the given number of rect,
+        ellipse, text and path elements (one fifth of the paths with path
+        data, the rest with sodipodi centers), a third of them with a
+        matrix transform.
+    :param elements: Number of elements.
+    :param seed: Seed of the random coordinates.
+    :param depth: If not 0, every GROUP_SIZE elements are nested in this
+        many transformed groups, as in deep Inkscape layer hierarchies.
+    :return: SVG markup.
+    """
+
+    rnd = random.Random(seed)
+    parts = ['<svg xmlns="http://www.w3.org/2000/svg" xmlns:sodipodi='
+             '"http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd">'
+             '<g id="layer1">']
+    for i in xrange(elements):
+        if depth and i % GROUP_SIZE == 0:
+            if i:
+                parts.append('</g>' * depth)
+            for level in xrange(depth):
+                parts.append('<g id="g%d_%d" transform="%s">' % (
+                    i, level, GROUP_TRANSFORMS[level % len(GROUP_TRANSFORMS)]
+                    % rnd.uniform(-20, 20)))
+        transform = ""
+        if i % 3 == 0:
+            transform = ' transform="matrix(%s)"' % ",".join(
+                "%.3f" % rnd.uniform(-2, 2) for j in xrange(6))
+        values = tuple(rnd.uniform(1, 500) for j in xrange(6))
+        kind = i % 5
+        if kind == 0:
+            parts.append('<rect id="rect%d" x="%.2f" y="%.2f" width="%.2f" '
+                         'height="%.2f"%s/>' % ((i,) + values[:4] +
+                                                (transform,)))
+        elif kind == 1:
+            parts.append('<ellipse id="ellipse%d" cx="%.2f" cy="%.2f" '
+                         'rx="3" ry="3"%s/>' % ((i,) + values[:2] +
+                                                (transform,)))
+        elif kind == 2:
+            parts.append('<text id="text%d" x="%.2f" y="%.2f"%s>t</text>'
+                         % ((i,) + values[:2] + (transform,)))
+        elif i % 25 == 3:
+            parts.append('<path id="path%d" d="M %.2f,%.2f L %.2f,%.2f '
+                         'Q %.2f,%.2f 10,10 z"/>' % ((i,) + values))
+        else:
+            parts.append('<path id="path%d" sodipodi:cx="%.2f" '
+                         'sodipodi:cy="%.2f" sodipodi:type="arc" '
+                         'd="M 0,0"%s/>' % ((i,) + values[:2] + (transform,)))
+    if depth and elements:
+        parts.append('</g>' * depth)
+    parts.append('</g></svg>')
+    return "".join(parts)
+
+
+def pathData(segments, rnd):
+    """ Returns the path data of an outline such as those of maps: a moveto
+        and the given number of relative lineto, cubic, quadratic and arc
+        segments with negative and positive coordinates, closed.
+    :param segments: Number of segments.
+    :param rnd: random.Random of the coordinates.
+    """
+
+    parts = ["M %.3f,%.3f" % (rnd.uniform(-500, 500), rnd.uniform(-500, 500))]
+    for i in xrange(segments):
+        command = "lclqla"[i % 6]
+        if command == "a":
+            parts.append("a%.3f %.3f %.1f %d %d %.3f %.3f" % (
+                rnd.uniform(1, 20), rnd.uniform(1, 20), rnd.uniform(0, 360),
+                rnd.randint(0, 1), rnd.randint(0, 1), rnd.uniform(-20, 20),
+                rnd.uniform(-20, 20)))
+            continue
+        count = {"l": 2, "c": 6, "q": 4}[command]
+        parts.append(command + " ".join("%.3f" % rnd.uniform(-20, 20)
+                                        for j in xrange(count)))
+    parts.append("z")
+    return " ".join(parts)
+
+
+def parseSizes(default):
+    """ Returns the benchmark sizes given on the command line, or the
+        default ones.
+    """
+
+    if len(sys.argv) > 1:
+        return [int(n) for n in sys.argv[1:]]
+    return default
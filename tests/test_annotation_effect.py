@@ -0,0 +1,95 @@
+"""
+Tests of the id -> element cache of AnnotationEffect.getElementById, which
+must not return elements that were removed, re-parented out of the
+document or given another id. AnnotationEffect needs the inkex module of
+Inkscape and Tkinter; the tests are skipped without them.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+from lxml import etree
+try:
+    from AnnotationEffect import AnnotationEffect
+except ImportError:
+    AnnotationEffect = None
+
+DOCUMENT = """<svg xmlns="http://www.w3.org/2000/svg">
+  <g id="layer1">
+    <rect id="rect1" x="0" y="0" width="10" height="20"/>
+    <rect id="rect2" x="20" y="0" width="10" height="20"/>
+  </g>
+  <g id="layer2"/>
+  <path id="path1" d="M 0 0 L 10 10"/>
+</svg>
+"""
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+@unittest.skipIf(AnnotationEffect is None,
+                 "AnnotationEffect needs the inkex and Tkinter modules")
+class GetElementByIdTest(unittest.TestCase):
+
+    def setUp(self):
+        self.effect = AnnotationEffect()
+        self.effect.document = etree.ElementTree(etree.fromstring(DOCUMENT))
+        self.root = self.effect.document.getroot()
+
+    def element(self, elementId):
+        return self.root.xpath("//*[@id=$id]", id=elementId)[0]
+
+    def testLookupsUseOneIndex(self):
+        rect1 = self.effect.getElementById("rect1")
+        self.assertIs(rect1, self.element("rect1"))
+        index = self.effect.elementsById
+        self.assertIs(self.effect.getElementById("path1"),
+                      self.element("path1"))
+        self.assertIs(self.effect.getElementById("rect1"), rect1)
+        self.assertIs(self.effect.elementsById, index)
+        self.assertIsNone(self.effect.getElementById("missing"))
+
+    def testRemovedElement(self):
+        rect1 = self.effect.getElementById("rect1")
+        rect1.getparent().remove(rect1)
+        self.assertIsNone(self.effect.getElementById("rect1"))
+        # An element added later with the same id is found
+        newRect = etree.SubElement(self.element("layer2"), SVG + "rect",
+                                   id="rect1")
+        self.assertIs(self.effect.getElementById("rect1"), newRect)
+
+    def testRemovedGroup(self):
+        rect2 = self.effect.getElementById("rect2")
+        layer1 = self.element("layer1")
+        self.root.remove(layer1)
+        # rect2 keeps its parent, but not the document
+        self.assertIs(rect2.getparent(), layer1)
+        self.assertIsNone(self.effect.getElementById("rect2"))
+
+    def testReParentedElement(self):
+        rect2 = self.effect.getElementById("rect2")
+        self.element("layer2").append(rect2)
+        self.assertIs(self.effect.getElementById("rect2"), rect2)
+        detached = etree.Element(SVG + "g")
+        detached.append(rect2)
+        self.assertIsNone(self.effect.getElementById("rect2"))
+
+    def testChangedId(self):
+        rect1 = self.effect.getElementById("rect1")
+        rect1.set("id", "rect9")
+        self.assertIsNone(self.effect.getElementById("rect1"))
+        self.assertIs(self.effect.getElementById("rect9"), rect1)
+
+    def testReplacedDocument(self):
+        self.effect.getElementById("rect1")
+        self.effect.document = etree.ElementTree(etree.fromstring(DOCUMENT))
+        rect1 = self.effect.getElementById("rect1")
+        self.assertIs(rect1.getroottree().getroot(),
+                      self.effect.document.getroot())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Tests of ClassHierarchy, and of the class hierarchy of RDFReader built with
+it.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+from ClassHierarchy import ClassHierarchy
+from RDFReader import RDFReader
+
+NAMESPACE = "http://example.org/test"
+OTHER_NAMESPACE = "http://example.org/other"
+ONTOLOGY = """<?xml version="1.0"?>
+<rdf:RDF xmlns="%(ns)s#" xml:base="%(ns)s"
+         xmlns:other="%(other)s#"
+         xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#"
+         xmlns:owl="http://www.w3.org/2002/07/owl#">
+  <owl:Ontology rdf:about="%(ns)s"/>
+  <owl:Class rdf:about="#Graphic_Thing"/>
+  <owl:Class rdf:about="#Bar"><rdfs:subClassOf rdf:resource="#Graphic_Thing"/>
+  </owl:Class>
+  <owl:Class rdf:about="#Axis"><rdfs:subClassOf rdf:resource="#Graphic_Thing"/>
+  </owl:Class>
+  <owl:Class rdf:about="%(other)s#Bar">
+    <rdfs:subClassOf rdf:resource="%(other)s#Axis"/>
+  </owl:Class>
+  <owl:Class rdf:about="%(other)s#Label">
+    <rdfs:subClassOf rdf:resource="%(other)s#Bar"/>
+  </owl:Class>
+</rdf:RDF>
+"""
+
+# Thing > Shape > (Bar, Line), Line > Bar; Thing > Label
+PAIRS = [("Shape", "Thing"), ("Bar", "Shape"), ("Line", "Shape"),
+         ("Bar", "Line"), ("Label", "Thing"), ("Bar", "Bar")]
+
+
+class ClassHierarchyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.hierarchy = ClassHierarchy(PAIRS)
+
+    def testDirectRelations(self):
+        self.assertEqual(self.hierarchy.getSubclasses("Shape"),
+                         ["Bar", "Line"])
+        self.assertEqual(self.hierarchy.getParentclasses("Bar"),
+                         ["Shape", "Line"])
+        self.assertEqual(self.hierarchy.getSubclasses("Bar"), [])
+        self.assertEqual(self.hierarchy.getParentclasses("Thing"), [])
+        self.assertEqual(self.hierarchy.getSubclasses("Unknown"), [])
+        self.assertEqual(self.hierarchy.entities(),
+                         set(["Thing", "Shape", "Bar", "Line", "Label"]))
+        # Copies are returned
+        self.hierarchy.getSubclasses("Shape").append("Other")
+        self.assertEqual(self.hierarchy.getSubclasses("Shape"),
+                         ["Bar", "Line"])
+
+    def testSubTree(self):
+        self.assertEqual(self.hierarchy.subTree("Thing"),
+                         ["Thing",
+                          ["Shape", ["Bar"], ["Line", ["Bar"]]],
+                          ["Label"]])
+        self.assertEqual(self.hierarchy.subTree("Line"), ["Line", ["Bar"]])
+        self.assertEqual(self.hierarchy.subTree("Unknown"), ["Unknown"])
+        self.assertEqual(self.hierarchy.subTree("Line", name=str.lower),
+                         ["line", ["bar"]])
+
+    def testSubTreeBreaksCycles(self):
+        hierarchy = ClassHierarchy([("B", "A"), ("C", "B"), ("A", "C"),
+                                    ("D", "C")])
+        self.assertEqual(hierarchy.subTree("A"),
+                         ["A", ["B", ["C", ["D"]]]])
+        self.assertEqual(hierarchy.subTree("C"),
+                         ["C", ["A", ["B"]], ["D"]])
+        self.assertTrue(hierarchy.isSubclassOf("A", "C"))
+        self.assertTrue(hierarchy.isSubclassOf("C", "A"))
+        self.assertFalse(hierarchy.isSubclassOf("A", "D"))
+
+    def testIsSubclassOf(self):
+        self.assertTrue(self.hierarchy.isSubclassOf("Bar", "Thing"))
+        self.assertTrue(self.hierarchy.isSubclassOf("Bar", "Line"))
+        self.assertTrue(self.hierarchy.isSubclassOf("Bar", "Bar"))
+        self.assertTrue(self.hierarchy.isSubclassOf("Unknown", "Unknown"))
+        self.assertFalse(self.hierarchy.isSubclassOf("Thing", "Bar"))
+        self.assertFalse(self.hierarchy.isSubclassOf("Label", "Shape"))
+        self.assertFalse(self.hierarchy.isSubclassOf("Unknown", "Thing"))
+
+
+class ReaderHierarchyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpDir, "onto.rdf")
+        with open(self.path, "w") as f:
+            f.write(ONTOLOGY % {"ns": NAMESPACE, "other": OTHER_NAMESPACE})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def testClassesOfOtherNamespacesAreKeptApart(self):
+        reader = RDFReader(self.path, NAMESPACE)
+        self.assertEqual(sorted(reader.getSubclasses("Graphic_Thing")),
+                         ["Axis", "Bar"])
+        # other:Bar is a subclass of other:Axis, not of Axis
+        self.assertEqual(reader.getSubclasses("Axis"), [])
+        self.assertEqual(reader.getSubclasses("Bar"), [])
+        self.assertEqual(reader.getParentclasses("Bar"), ["Graphic_Thing"])
+        tree = reader.hierarchy.subTree(reader.terms.uri("Graphic_Thing"),
+                                        reader.terms.localName)
+        self.assertEqual(tree[0], "Graphic_Thing")
+        self.assertEqual(sorted(tree[1:]), [["Axis"], ["Bar"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
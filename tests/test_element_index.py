@@ -0,0 +1,88 @@
+"""
+Tests of ElementIndex.
+"""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+from ElementIndex import ElementIndex
+
+# The same instance name under two entities makes two annotations
+INSTANCES = {"Bar": {"bar1": ["rect1", "rect2"], "shared": ["rect3"]},
+             "Axis": {"axis1": ["path1", "rect1"], "shared": ["rect3"]}}
+
+
+class ElementIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ElementIndex(INSTANCES)
+
+    def testBuiltFromAnnotations(self):
+        self.assertEqual(self.index.annotationsOf(["rect1"]),
+                         set([("Bar", "bar1"), ("Axis", "axis1")]))
+        self.assertEqual(self.index.annotationsOf(["rect3"]),
+                         set([("Bar", "shared"), ("Axis", "shared")]))
+        self.assertEqual(self.index.annotationsOf(["path1", "rect2", "g1"]),
+                         set([("Bar", "bar1"), ("Axis", "axis1")]))
+        self.assertEqual(self.index.annotationsOf([]), set())
+
+    def testAdd(self):
+        self.index.add("g1", "Bar", "bar1")
+        self.index.addElements("Legend", "legend1", ["g1", "text1"])
+        self.assertEqual(self.index.annotationsOf(["g1"]),
+                         set([("Bar", "bar1"), ("Legend", "legend1")]))
+        self.assertEqual(self.index.annotationsOf(["text1"]),
+                         set([("Legend", "legend1")]))
+
+    def testRemoveFromOneEntity(self):
+        self.index.removeElements("Bar", "shared", ["rect3"])
+        self.assertEqual(self.index.annotationsOf(["rect3"]),
+                         set([("Axis", "shared")]))
+        self.index.remove("rect3", "Axis", "shared")
+        self.assertNotIn("rect3", self.index.annotations)
+        # Removing an element that is not in the annotation does nothing
+        self.index.remove("rect2", "Axis", "axis1")
+        self.index.remove("g9", "Bar", "bar1")
+        self.assertEqual(self.index.annotationsOf(["rect2"]),
+                         set([("Bar", "bar1")]))
+
+    def testReplaceAndUndo(self):
+        # Replace the elements of an annotation, as AnnotationEffect does,
+        # then undo it
+        before = self.index.toJSON()
+        self.index.removeElements("Bar", "bar1", ["rect1", "rect2"])
+        self.index.addElements("Bar", "bar1", ["path2"])
+        self.assertEqual(self.index.annotationsOf(["rect1"]),
+                         set([("Axis", "axis1")]))
+        self.assertNotIn("rect2", self.index.annotations)
+        self.assertEqual(self.index.annotationsOf(["path2"]),
+                         set([("Bar", "bar1")]))
+        self.index.removeElements("Bar", "bar1", ["path2"])
+        self.index.addElements("Bar", "bar1", ["rect1", "rect2"])
+        self.assertEqual(self.index.toJSON(), before)
+
+    def testJSONRoundTrip(self):
+        data = json.loads(json.dumps(self.index.toJSON()))
+        self.assertEqual(data["rect3"], [["Axis", "shared"],
+                                         ["Bar", "shared"]])
+        index = ElementIndex.fromJSON(data, {})
+        self.assertEqual(index.annotations, self.index.annotations)
+
+    def testFromJSONWithoutIndex(self):
+        index = ElementIndex.fromJSON(None, INSTANCES)
+        self.assertEqual(index.annotations, self.index.annotations)
+
+    def testFromJSONWithInstanceNamesOnly(self):
+        # Files written when the index held bare instance names
+        data = {"rect1": ["axis1", "bar1"], "rect3": ["shared"]}
+        index = ElementIndex.fromJSON(data, INSTANCES)
+        self.assertEqual(index.annotations, self.index.annotations)
+
+
+if __name__ == "__main__":
+    unittest.main()
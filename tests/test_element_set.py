@@ -0,0 +1,129 @@
+"""
+Tests of ElementSet.
+"""
+
+import copy
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+from ElementSet import ElementSet, toElementSets, instancesToJSON
+
+
+class ElementSetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.elements = ElementSet(["rect5", "path2", "text9", "rect1",
+                                    "g4", "circle3"])
+
+    def assertElements(self, expected):
+        self.assertEqual(list(self.elements), expected)
+        self.assertEqual(self.elements.members, set(expected))
+
+    def testDuplicatesAreIgnored(self):
+        self.elements.append("text9")
+        self.elements.extend(["rect1", "g7"])
+        self.assertElements(["rect5", "path2", "text9", "rect1", "g4",
+                             "circle3", "g7"])
+        self.assertIn("g7", self.elements)
+        self.assertNotIn("g8", self.elements)
+
+    def testRemoveKeepsOrder(self):
+        self.elements.remove("text9")
+        self.assertElements(["rect5", "path2", "rect1", "g4", "circle3"])
+        self.assertRaises(ValueError, self.elements.remove, "text9")
+
+    def testRemoveAllKeepsOrder(self):
+        # The selection is in a different order than the annotation
+        removed = self.elements.removeAll(["circle3", "g8", "path2",
+                                           "rect1"])
+        self.assertEqual(removed, ["path2", "rect1", "circle3"])
+        self.assertElements(["rect5", "text9", "g4"])
+
+    def testRemoveAllOfMissingElements(self):
+        self.assertEqual(self.elements.removeAll(["g8", "rect9"]), [])
+        self.assertElements(["rect5", "path2", "text9", "rect1", "g4",
+                             "circle3"])
+
+    def testRemoveEverything(self):
+        removed = self.elements.removeAll(reversed(self.elements[:]))
+        self.assertEqual(removed, ["rect5", "path2", "text9", "rect1", "g4",
+                                   "circle3"])
+        self.assertElements([])
+
+    def testSerializedAsList(self):
+        self.elements.removeAll(["path2"])
+        self.assertEqual(json.loads(json.dumps(self.elements.toJSON())),
+                         ["rect5", "text9", "rect1", "g4", "circle3"])
+        self.assertRaises(TypeError, json.dumps, self.elements)
+        # toJSON returns a copy
+        self.elements.toJSON().append("g8")
+        self.assertElements(["rect5", "text9", "rect1", "g4", "circle3"])
+
+    def testComparedAsList(self):
+        self.assertEqual(self.elements, ["rect5", "path2", "text9", "rect1",
+                                         "g4", "circle3"])
+        self.assertNotEqual(self.elements, ["rect5"])
+        self.assertEqual(self.elements, ElementSet(self.elements))
+        self.assertNotEqual(self.elements, ElementSet(["rect5"]))
+        self.assertFalse(self.elements == "rect5")
+        self.assertTrue(self.elements != set(self.elements))
+        self.assertRaises(TypeError, hash, self.elements)
+
+    def testReadAsList(self):
+        self.assertEqual(len(self.elements), 6)
+        self.assertEqual(self.elements[1], "path2")
+        self.assertEqual(self.elements[-1], "circle3")
+        self.assertEqual(self.elements[1:3], ["path2", "text9"])
+        self.assertEqual(sorted(self.elements)[0], "circle3")
+        self.assertEqual(repr(ElementSet(["g1"])), "ElementSet(['g1'])")
+
+    def testNoListMutators(self):
+        """ The list and the set can only be changed together. """
+        for name in ("insert", "pop", "sort", "reverse", "__iadd__",
+                     "__setitem__", "__delitem__", "__setslice__",
+                     "__delslice__"):
+            self.assertFalse(hasattr(self.elements, name), name)
+
+        def assign():
+            self.elements[0] = "g8"
+
+        def delete():
+            del self.elements[0:2]
+        self.assertRaises(TypeError, assign)
+        self.assertRaises(TypeError, delete)
+        self.assertElements(["rect5", "path2", "text9", "rect1", "g4",
+                             "circle3"])
+
+    def testDeepCopy(self):
+        copied = copy.deepcopy(self.elements)
+        copied.remove("rect5")
+        copied.append("g8")
+        self.assertEqual(list(copied), ["path2", "text9", "rect1", "g4",
+                                        "circle3", "g8"])
+        self.assertEqual(copied.members, set(copied))
+        self.assertIn("g8", copied)
+        self.assertNotIn("rect5", copied)
+        self.assertElements(["rect5", "path2", "text9", "rect1", "g4",
+                             "circle3"])
+
+    def testToElementSets(self):
+        converted = toElementSets({"Bar": {"bar1": ["rect2", "rect1"]}})
+        self.assertIsInstance(converted["Bar"]["bar1"], ElementSet)
+        self.assertEqual(converted["Bar"]["bar1"], ["rect2", "rect1"])
+
+    def testInstancesToJSON(self):
+        instances = {"Bar": {"bar1": ["rect2", "rect1"], "bar2": []},
+                     "Axis": {}}
+        data = json.loads(json.dumps(instancesToJSON(
+            toElementSets(instances))))
+        self.assertEqual(data, instances)
+        self.assertIs(type(instancesToJSON(
+            toElementSets(instances))["Bar"]["bar1"]), list)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+"""
+Tests of GeometryEngine. The central points and dimensions of lists of
+elements are compared with those of the per-element code of SVGParser,
+which needs the inkex module of Inkscape (the tests comparing them are
+skipped without it), and with NumPy hidden from the modules.
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+from lxml import etree
+import GeometryEngine
+import PathBounds
+import SVGTransform
+try:
+    import SVGParser
+except ImportError:
+    SVGParser = None
+
+SVG_NS = "http://www.w3.org/2000/svg"
+SODI_NS = "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
+TRANSFORMS = ["", "translate(12.5, -3)", "rotate(30 5 5)", "scale(2, 0.5)",
+              "skewX(15)", "matrix(0.8 0.6 -0.6 0.8 10 20)", "scale(-1 1)",
+              "invalid(1)"]
+PATHS = ["M 0 0 L 10 20 L 30 5 Z", "m 5 5 c 10 20 30 20 40 0 s 30 -20 40 0",
+         "M 0 0 Q 10 20 20 0 T 40 0", "M 1 1 A 5 3 30 1 0 11 1",
+         "M 0 0 a 20 10 75 1 1 5 25 a 4 4 0 0 1 -5 5",
+         "M 0 0 A 2 1 0 0 1 10 0 V 10 H 0 z", "M 10 10"]
+
+
+def randomDocument(seed, size):
+    """ Returns the root of a document with nested groups of rects,
+        ellipses, texts and paths with random parameters and transforms.
+    """
+
+    generator = random.Random(seed)
+
+    def number():
+        return "%g" % round(generator.uniform(-100, 100), 3)
+
+    def transform(element):
+        value = generator.choice(TRANSFORMS)
+        if value:
+            element.set("transform", value)
+
+    root = etree.Element("{%s}svg" % SVG_NS, nsmap={None: SVG_NS,
+                                                      "sodipodi": SODI_NS})
+    groups = [root]
+    for i in xrange(size):
+        parent = generator.choice(groups)
+        kind = generator.choice(["g", "rect", "rect", "ellipse", "text",
+                                 "path", "path", "path"])
+        element = etree.SubElement(parent, "{%s}%s" % (SVG_NS, kind),
+                                   id="%s%d" % (kind, i))
+        transform(element)
+        if kind == "g":
+            groups.append(element)
+        elif kind == "rect":
+            element.set("x", number())
+            element.set("y", number())
+            element.set("width", "%g" % generator.uniform(0, 50))
+            element.set("height", "%g" % generator.uniform(0, 50))
+        elif kind == "ellipse":
+            element.set("cx", number())
+            element.set("cy", number())
+        elif kind == "text":
+            element.set("x", number())
+            element.set("y", number())
+        elif generator.random() < 0.2:
+            # A path drawn by Inkscape as an ellipse
+            element.set("{%s}cx" % SODI_NS, number())
+            element.set("{%s}cy" % SODI_NS, number())
+        else:
+            element.set("d", generator.choice(PATHS))
+        if generator.random() < 0.05:
+            # Elements with missing attributes are not taken into account
+            for name in ("x", "cx", "width", "d"):
+                element.attrib.pop(name, None)
+    return root
+
+
+def elementLists(root, seed):
+    """ Returns lists of ids of elements of a document, of sizes below and
+        above GeometryEngine.BATCH_MIN_ELEMENTS, some with unknown ids.
+    """
+
+    generator = random.Random(seed)
+    ids = [element.get("id") for element in root.iter()
+           if element.get("id") is not None] + ["missing1", "missing2"]
+    lists = [[id] for id in ids]
+    for size in (2, 3, 5, 31, 32, 100, len(ids)):
+        for i in xrange(10):
+            lists.append(generator.sample(ids, min(size, len(ids))))
+    return lists
+
+
+class NoNumPy(object):
+    """ Hides NumPy from the modules that use it. """
+
+    MODULES = (GeometryEngine, PathBounds, SVGTransform)
+
+    def __enter__(self):
+        self.saved = [module.numpy for module in self.MODULES]
+        for module in self.MODULES:
+            module.numpy = None
+
+    def __exit__(self, *exception):
+        for module, numpy in zip(self.MODULES, self.saved):
+            module.numpy = numpy
+
+
+@unittest.skipUnless(GeometryEngine.isAvailable(), "NumPy is not installed")
+class GeometryEngineTest(unittest.TestCase):
+
+    def engineOf(self, root):
+        engine = GeometryEngine.GeometryEngine(
+            SVGTransform.TransformCache().matrixOf)
+        engine.addRects(root.iter("{%s}rect" % SVG_NS))
+        engine.addPoints(root.iter("{%s}ellipse" % SVG_NS), "cx", "cy")
+        engine.addPaths(root.iter("{%s}path" % SVG_NS))
+        engine.addPoints(root.iter("{%s}text" % SVG_NS), "x", "y")
+        engine.build()
+        return engine
+
+    def testKnownValues(self):
+        root = etree.fromstring(
+            '<svg xmlns="%s"><g transform="translate(100, 0)">'
+            '<rect id="r1" x="0" y="0" width="10" height="20"/>'
+            '<rect id="r2" x="20" y="40" width="30" height="10"/></g>'
+            '<path id="p1" d="M 0 0 A 5 5 0 0 0 10 0"/>'
+            '<text id="t1" x="7" y="8">a</text></svg>' % SVG_NS)
+        engine = self.engineOf(root)
+        self.assertEqual(engine.center(["r1"]), ("105.0", "10.0"))
+        self.assertEqual(engine.dimensions(["r1"]), ("20.0", "10.0"))
+        self.assertEqual(engine.center(["r1", "r2"]), ("120.0", "27.5"))
+        self.assertEqual(engine.dimensions(["r1", "r2"]), ("50.0", "50.0"))
+        # The bounding box of the half circle is (0, 0, 10, 5)
+        self.assertEqual(engine.center(["p1"]), ("5.0", "2.5"))
+        self.assertEqual(engine.dimensions(["p1"]), ("5.0", "10.0"))
+        # Texts have a central point but no dimensions
+        self.assertEqual(engine.center(["t1"]), ("7.0", "8.0"))
+        self.assertEqual(engine.dimensions(["t1"]), ("None", "None"))
+        self.assertIsNone(engine.center(["missing"]))
+
+    def testNoNumPy(self):
+        with NoNumPy():
+            self.assertFalse(GeometryEngine.isAvailable())
+            self.assertFalse(PathBounds.isAvailable())
+        self.assertTrue(GeometryEngine.isAvailable())
+
+
+@unittest.skipIf(SVGParser is None, "SVGParser needs the inkex module")
+class PerElementParityTest(unittest.TestCase):
+
+    def assertSameGeometry(self, parser, reference, lists):
+        for elements in lists:
+            self.assertEqual(
+                parser.countCentralPointForListOfElements(elements),
+                reference.countCentralPointForListOfElements(elements))
+            self.assertEqual(parser.computeDimForListOfElements(elements),
+                             reference.computeDimForListOfElements(elements))
+
+    def checkDocuments(self, batch):
+        for seed in xrange(5):
+            root = randomDocument(seed, 300)
+            parser = SVGParser.SVGParser(root)
+            self.assertEqual(parser.batch, batch)
+            self.assertSameGeometry(parser,
+                                    SVGParser.SVGParser(root, batch=False),
+                                    elementLists(root, seed))
+            self.assertEqual(parser.engine is not None, batch)
+
+    @unittest.skipUnless(GeometryEngine.isAvailable(),
+                         "NumPy is not installed")
+    def testSameAsPerElementCode(self):
+        self.checkDocuments(True)
+
+    def testFallbackWithoutNumPy(self):
+        with NoNumPy():
+            self.checkDocuments(False)
+
+    def testSameBoundingBoxes(self):
+        root = randomDocument(7, 300)
+        ids, boxes = SVGParser.SVGParser(root, batch=False).boundingBoxes()
+        expected = dict(zip(ids, boxes))
+        parser = SVGParser.SVGParser(root)
+        ids, boxes = parser.boundingBoxes()
+        self.assertEqual(sorted(ids), sorted(expected))
+        for id, box in zip(ids, [tuple(box) for box in boxes]):
+            for value, expectedValue in zip(box, expected[id]):
+                self.assertAlmostEqual(value, expectedValue, places=9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Tests of GraphCache.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+import rdflib
+from GraphCache import GraphCache, snapshotToGraph
+
+ONTOLOGY = """<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:owl="http://www.w3.org/2002/07/owl#">
+  <owl:Class rdf:about="http://example.org/test#Bar"/>
+  <owl:NamedIndividual rdf:about="http://example.org/test#bar1"/>
+</rdf:RDF>
+"""
+
+
+class GraphCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = GraphCache(os.path.join(self.directory, "cache"),
+                                1 << 20)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def writeOntology(self, name):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as f:
+            f.write(ONTOLOGY)
+        return path
+
+    def storeAndLoad(self, path):
+        graph = rdflib.Graph()
+        with open(path, "rb") as f:
+            graph.parse(f, format="xml")
+        self.cache.store(path, graph)
+        snapshot = self.cache.load(path)
+        self.assertIsNotNone(snapshot)
+        self.assertEqual(set(snapshotToGraph(snapshot)), set(graph))
+
+    def testAsciiPath(self):
+        self.storeAndLoad(self.writeOntology("ontology.rdf"))
+
+    def testNonAsciiPath(self):
+        name = u"ontolog\xeda \u0161ablona.rdf"
+        try:
+            name.encode(sys.getfilesystemencoding() or "ascii")
+        except UnicodeEncodeError:
+            self.skipTest("the file system encoding cannot encode %r" % name)
+        self.storeAndLoad(self.writeOntology(name))
+
+    def testChangedFileIsNotServed(self):
+        path = self.writeOntology("ontology.rdf")
+        self.storeAndLoad(path)
+        with open(path, "a") as f:
+            f.write("\n")
+        self.assertIsNone(self.cache.load(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Tests of GraphStore. The persistent backend tests need the bsddb module
+(Sleepycat store) and are skipped without it.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+import rdflib
+import GraphStore
+from GraphStore import openGraphStore, isBackendAvailable
+from RDFReader import RDFReader
+
+NAMESPACE = "http://example.org/test"
+ONTOLOGY = """<?xml version="1.0"?>
+<rdf:RDF xmlns="%(ns)s#" xml:base="%(ns)s"
+         xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:owl="http://www.w3.org/2002/07/owl#">
+  <owl:Ontology rdf:about="%(ns)s"/>
+  <owl:Class rdf:about="#Bar"/>
+  <owl:DatatypeProperty rdf:about="#hasSVGElement"/>
+  %(individuals)s
+</rdf:RDF>
+"""
+INDIVIDUAL = ('<owl:NamedIndividual rdf:about="#rect%d">'
+              '<rdf:type rdf:resource="#Bar"/>'
+              '<hasSVGElement>rect%d</hasSVGElement>'
+              '</owl:NamedIndividual>')
+SLEEPYCAT = "Sleepycat"
+
+
+def writeOntology(path, individuals):
+    with open(path, "w") as f:
+        f.write(ONTOLOGY % {"ns": NAMESPACE, "individuals": "\n".join(
+            INDIVIDUAL % (i, i) for i in xrange(individuals))})
+
+
+def parsedTriples(path):
+    graph = rdflib.Graph()
+    with open(path, "rb") as f:
+        graph.parse(f, format="xml", publicID=NAMESPACE)
+    return set(graph)
+
+
+class OpenGraphStoreTest(unittest.TestCase):
+
+    def testMemoryBackendsNeedNoStore(self):
+        for backend in (None, "default", "IOMemory", "Memory"):
+            self.assertIsNone(openGraphStore(tempfile.gettempdir(), backend))
+
+    def testUnknownBackendFallsBackToMemory(self):
+        self.assertIsNone(openGraphStore(tempfile.gettempdir(), "NoStore"))
+
+
+@unittest.skipUnless(isBackendAvailable(SLEEPYCAT),
+                     "the Sleepycat store needs the bsddb module")
+class SleepycatStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "ontology.rdf")
+        writeOntology(self.path, 10)
+        self.store = openGraphStore(os.path.join(self.directory, "stores"),
+                                    SLEEPYCAT)
+        # Counts the imports of ontology files into the store
+        self.imports = 0
+        self.parseOntology = GraphStore.parseOntology
+
+        def countingParse(graph, path, format=None):
+            self.imports += 1
+            return self.parseOntology(graph, path, format)
+        GraphStore.parseOntology = countingParse
+
+    def tearDown(self):
+        GraphStore.parseOntology = self.parseOntology
+        shutil.rmtree(self.directory)
+
+    def openTriples(self):
+        graph = self.store.open(self.path)
+        try:
+            return set(graph)
+        finally:
+            graph.close(commit_pending_transaction=True)
+
+    def testImportAndReopen(self):
+        self.assertIsNotNone(self.store)
+        expected = parsedTriples(self.path)
+        self.assertEqual(self.openTriples(), expected)
+        # The second open reads the store without importing the file again
+        self.assertEqual(self.openTriples(), expected)
+        self.assertEqual(self.imports, 1)
+
+    def testChangedFileIsImportedAgain(self):
+        self.openTriples()
+        writeOntology(self.path, 20)
+        self.assertEqual(self.openTriples(), parsedTriples(self.path))
+        self.assertEqual(self.imports, 2)
+
+    def testUnsavedChangesAreDiscarded(self):
+        expected = parsedTriples(self.path)
+        reader = RDFReader(self.path, NAMESPACE, store=self.store)
+        self.assertTrue(reader.hasInstance("Bar", "rect3"))
+        reader.removeInstance("rect3")
+        reader.close()
+        # The store was changed but the ontology was not saved
+        self.assertEqual(self.openTriples(), expected)
+
+    def testSavedChangesAreKept(self):
+        reader = RDFReader(self.path, NAMESPACE, store=self.store)
+        reader.addInstance("Bar", "rect100")
+        reader.saveOntology()
+        reader.close()
+        reader = RDFReader(self.path, NAMESPACE, store=self.store)
+        self.assertTrue(reader.hasInstance("Bar", "rect100"))
+        reader.close()
+        self.assertEqual(self.openTriples(), parsedTriples(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
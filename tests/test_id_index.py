@@ -0,0 +1,82 @@
+"""
+Tests of IdIndex, which keeps the highest numeric id of the instances named
+after SVG elements.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+from IdIndex import IdIndex, instanceNumericId
+
+
+class InstanceNumericIdTest(unittest.TestCase):
+
+    def testNamedAfterSVGElements(self):
+        self.assertEqual(instanceNumericId("rect12"), 12)
+        self.assertEqual(instanceNumericId("path0"), 0)
+        self.assertEqual(instanceNumericId("annotation7"), 7)
+        self.assertEqual(instanceNumericId("text007"), 7)
+
+    def testOtherNames(self):
+        for name in ["rect", "rect1a", "bar1", "Rect1", "rect-1", ""]:
+            self.assertIsNone(instanceNumericId(name), name)
+
+
+class IdIndexTest(unittest.TestCase):
+
+    def testEmpty(self):
+        self.assertEqual(IdIndex().lastId(), 0)
+        self.assertEqual(IdIndex(["bar1", "label"]).lastId(), 0)
+
+    def testHighestId(self):
+        index = IdIndex(["rect3", "path12", "bar99", "text0"])
+        self.assertEqual(index.lastId(), 12)
+        index.add("circle20")
+        self.assertEqual(index.lastId(), 20)
+        index.add("rect5")
+        self.assertEqual(index.lastId(), 20)
+
+    def testRemove(self):
+        index = IdIndex(["rect3", "path12", "circle12"])
+        index.remove("path12")
+        # circle12 still has the highest id
+        self.assertEqual(index.lastId(), 12)
+        index.remove("circle12")
+        self.assertEqual(index.lastId(), 3)
+        # Unknown names and names removed twice are ignored
+        index.remove("circle12")
+        index.remove("rect99")
+        self.assertEqual(index.lastId(), 3)
+        index.remove("rect3")
+        self.assertEqual(index.lastId(), 0)
+
+    def testAddingTwiceCountsOnce(self):
+        index = IdIndex(["rect3", "rect12", "rect12"])
+        index.add("rect12")
+        index.remove("rect12")
+        self.assertEqual(index.lastId(), 3)
+
+    def testReAddAfterRemove(self):
+        index = IdIndex(["rect3", "rect12"])
+        index.remove("rect12")
+        # The stale heap entry of 12 is still there until lastId drops it
+        self.assertIn(-12, index.heap)
+        index.add("path12")
+        self.assertEqual(index.lastId(), 12)
+        index.remove("path12")
+        self.assertEqual(index.lastId(), 3)
+        self.assertNotIn(-12, index.heap)
+        index.add("rect12")
+        self.assertEqual(index.lastId(), 12)
+        index.remove("rect12")
+        index.remove("rect3")
+        self.assertEqual(index.lastId(), 0)
+        self.assertEqual(index.heap, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Tests of LazyMapping, and of the lazy instancesbyClass of RDFReader built
+with it.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+from LazyMapping import LazyMapping
+from RDFReader import RDFReader
+
+NAMESPACE = "http://example.org/test"
+ONTOLOGY = """<?xml version="1.0"?>
+<rdf:RDF xmlns="%(ns)s#" xml:base="%(ns)s"
+         xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#"
+         xmlns:owl="http://www.w3.org/2002/07/owl#">
+  <owl:Ontology rdf:about="%(ns)s"/>
+  <owl:Class rdf:about="#Bar"/>
+  <owl:Class rdf:about="#Axis"><rdfs:subClassOf rdf:resource="#Bar"/>
+  </owl:Class>
+  <owl:Class rdf:about="#Legend"/>
+  <owl:DatatypeProperty rdf:about="#hasSVGElement"/>
+  <owl:NamedIndividual rdf:about="#bar1"><rdf:type rdf:resource="#Bar"/>
+    <hasSVGElement>rect1</hasSVGElement><hasSVGElement>rect2</hasSVGElement>
+  </owl:NamedIndividual>
+  <owl:NamedIndividual rdf:about="#axis1"><rdf:type rdf:resource="#Axis"/>
+    <hasSVGElement>path1</hasSVGElement>
+  </owl:NamedIndividual>
+</rdf:RDF>
+"""
+
+
+class RecordingLoader(object):
+    """ Loader that returns the values of a dict and records the keys it
+        was called with.
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self.calls = []
+
+    def __call__(self, key):
+        self.calls.append(key)
+        return self.values.get(key)
+
+
+class LazyMappingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loader = RecordingLoader({"a": 1, "b": 2, "c": None})
+        self.mapping = LazyMapping(["a", "b", "c"], self.loader)
+
+    def testPendingKeysAreLoadedOnce(self):
+        self.assertEqual(self.mapping.pending, set(["a", "b", "c"]))
+        self.assertEqual(self.mapping.loaded, {})
+        self.assertEqual(self.mapping["a"], 1)
+        self.assertEqual(self.mapping["a"], 1)
+        self.assertEqual(self.loader.calls, ["a"])
+        self.assertEqual(self.mapping.pending, set(["b", "c"]))
+        self.assertEqual(self.mapping.loaded, {"a": 1})
+        self.assertRaises(KeyError, lambda: self.mapping["d"])
+        self.assertEqual(self.loader.calls, ["a"])
+
+    def testExactKeysAreNotLoadedByMembershipOrLength(self):
+        self.assertIn("b", self.mapping)
+        self.assertNotIn("d", self.mapping)
+        self.assertEqual(len(self.mapping), 3)
+        self.assertEqual(sorted(self.mapping), ["a", "b", "c"])
+        self.assertEqual(self.loader.calls, [])
+        # A None value belongs to a mapping with exact keys
+        self.assertIsNone(self.mapping["c"])
+        self.assertIn("c", self.mapping)
+
+    def testCandidateKeysAreLoadedByMembershipAndLength(self):
+        mapping = LazyMapping(["a", "b", "c"], self.loader, exactKeys=False)
+        self.assertNotIn("c", mapping)
+        self.assertEqual(self.loader.calls, ["c"])
+        self.assertEqual(mapping.pending, set(["a", "b"]))
+        self.assertRaises(KeyError, lambda: mapping["c"])
+        self.assertEqual(len(mapping), 2)
+        self.assertEqual(sorted(self.loader.calls), ["a", "b", "c"])
+        self.assertEqual(mapping.pending, set())
+        self.assertEqual(sorted(mapping), ["a", "b"])
+        self.assertEqual(len(self.loader.calls), 3)
+
+    def testSetAndDeletePendingKeys(self):
+        self.mapping["a"] = 10
+        self.mapping["d"] = 4
+        del self.mapping["b"]
+        self.assertEqual(self.loader.calls, [])
+        self.assertEqual(self.mapping.materialize(),
+                         {"a": 10, "c": None, "d": 4})
+        self.assertRaises(KeyError, self.mapping.__delitem__, "b")
+        self.assertEqual(self.loader.calls, ["c"])
+
+    def testMaterializeNestedMappings(self):
+        inner = RecordingLoader({"x": ["rect1"], "y": ["rect2", "rect3"]})
+        outer = LazyMapping(
+            ["Bar", "Legend"],
+            lambda key: LazyMapping(["x", "y"], inner)
+            if key == "Bar" else None, exactKeys=False)
+        result = outer.materialize()
+        self.assertEqual(result, {"Bar": {"x": ["rect1"],
+                                          "y": ["rect2", "rect3"]}})
+        self.assertIs(type(result["Bar"]), dict)
+        self.assertEqual(json.loads(json.dumps(result)), result)
+        self.assertEqual(sorted(inner.calls), ["x", "y"])
+
+
+class LazyReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpDir, "onto.rdf")
+        with open(self.path, "w") as f:
+            f.write(ONTOLOGY % {"ns": NAMESPACE})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def testSameInstancesAsEagerReader(self):
+        lazy = RDFReader(self.path, NAMESPACE, lazy=True)
+        self.assertIsInstance(lazy.instancesbyClass, LazyMapping)
+        self.assertIn("Legend", lazy.instancesbyClass.pending)
+        eager = RDFReader(self.path, NAMESPACE)
+        expected = dict((entity, dict((instance, sorted(elements))
+                                      for instance, elements
+                                      in instances.iteritems()))
+                        for entity, instances
+                        in eager.instancesbyClass.iteritems())
+        self.assertEqual(sorted(lazy.instancesbyClass["Bar"]["bar1"]),
+                         expected["Bar"]["bar1"])
+        self.assertNotIn("Legend", lazy.instancesbyClass)
+        materialized = lazy.instancesbyClass.materialize()
+        self.assertEqual(dict((entity, dict((instance, sorted(elements))
+                                            for instance, elements
+                                            in instances.iteritems()))
+                              for entity, instances
+                              in materialized.iteritems()), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
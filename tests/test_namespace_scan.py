@@ -0,0 +1,127 @@
+"""
+Tests of the namespace scans that only read the header of an ontology
+file: OntologyFormat.scanNamespaces for Turtle and N-Triples, and
+PickerGUI.getCandidateSetOfPrefixes for RDF/XML. The files end with
+content that cannot be parsed, which the scans must not reach. The GUI
+needs the inkex module of Inkscape and Tkinter; its tests are skipped
+without them.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+import OntologyFormat
+try:
+    import gui
+except ImportError:
+    gui = None
+
+NAMESPACE = "http://example.org/test"
+# More than the chunks read at once by the XML parser
+PADDING = "<!-- %s -->\n" % ("x" * 256 * 1024)
+GARBAGE = "<<< not & well formed\n"
+XML_HEADER = """<?xml version="1.0"?>
+<rdf:RDF xmlns="%(ns)s#" xml:base="%(ns)s"
+         xmlns:extra="http://example.org/extra#"
+         xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:owl="http://www.w3.org/2002/07/owl#">
+"""
+ONTOLOGY = '<owl:Ontology rdf:about="%s"/>\n'
+TURTLE = """# Comments and blank lines precede the directives
+
+@prefix : <%(ns)s#> .
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+PREFIX extra: <http://example.org/extra#>
+@base <%(ns)s> .
+:Bar a owl:Class .
+@prefix late: <http://example.org/late#> .
+"""
+
+
+class TemporaryFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmpDir, name)
+        with open(path, "wb") as f:
+            f.write(text)
+        return path
+
+
+class TextScanTest(TemporaryFileTest):
+
+    def testTurtleScanStopsAtTheFirstStatement(self):
+        path = self.write("onto.ttl", TURTLE % {"ns": NAMESPACE} + GARBAGE)
+        self.assertEqual(
+            OntologyFormat.scanNamespaces(path, OntologyFormat.TURTLE, 1000),
+            set([NAMESPACE + "#", NAMESPACE, "http://example.org/extra#",
+                 "http://www.w3.org/2002/07/owl#"]))
+
+    def testTurtleScanStopsAfterMaxLines(self):
+        path = self.write("onto.ttl", TURTLE % {"ns": NAMESPACE})
+        self.assertEqual(
+            OntologyFormat.scanNamespaces(path, OntologyFormat.TURTLE, 3),
+            set([NAMESPACE + "#"]))
+
+    def testNTriplesScanStopsAfterMaxLines(self):
+        lines = ["<%s/onto%d#s> <%s#p> \"o\" .\n" % (NAMESPACE, i, NAMESPACE)
+                 for i in xrange(5)]
+        path = self.write("onto.nt", "".join(lines) + GARBAGE)
+        self.assertEqual(
+            OntologyFormat.scanNamespaces(path, OntologyFormat.NTRIPLES, 2),
+            set([NAMESPACE + "/onto0", NAMESPACE + "/onto1"]))
+
+
+@unittest.skipIf(gui is None, "The GUI needs the inkex and Tkinter modules")
+class XMLScanTest(TemporaryFileTest):
+
+    def setUp(self):
+        TemporaryFileTest.setUp(self)
+        # A GUI without windows (PickerGUI is an old-style class)
+        self.gui = types.InstanceType(gui.PickerGUI)
+        self.gui.fileFormat = None
+        self.maxElements = gui.c.NS_SCAN_MAX_ELEMENTS
+
+    def tearDown(self):
+        gui.c.NS_SCAN_MAX_ELEMENTS = self.maxElements
+        TemporaryFileTest.tearDown(self)
+
+    def testScanStopsAtTheOntology(self):
+        path = self.write("onto.rdf",
+                          XML_HEADER % {"ns": NAMESPACE} +
+                          '<owl:Class rdf:about="#Bar"/>\n' +
+                          ONTOLOGY % "http://example.org/about#" +
+                          PADDING + GARBAGE)
+        self.assertEqual(self.gui.getCandidateSetOfPrefixes(path),
+                         set([NAMESPACE, "http://example.org/extra",
+                              "http://example.org/about"]))
+
+    def testScanStopsAfterMaxElements(self):
+        gui.c.NS_SCAN_MAX_ELEMENTS = 3
+        classes = "".join('<owl:Class rdf:about="#C%d"/>\n' % i
+                          for i in xrange(5))
+        path = self.write("onto.rdf",
+                          XML_HEADER % {"ns": NAMESPACE} + classes +
+                          ONTOLOGY % "http://example.org/about#" +
+                          PADDING + GARBAGE)
+        self.assertEqual(self.gui.getCandidateSetOfPrefixes(path),
+                         set([NAMESPACE, "http://example.org/extra"]))
+        gui.c.NS_SCAN_MAX_ELEMENTS = 10
+        self.assertIn("http://example.org/about",
+                      self.gui.getCandidateSetOfPrefixes(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
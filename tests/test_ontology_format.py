@@ -0,0 +1,146 @@
+"""
+Tests of the ontology formats of OntologyFormat, mainly the SAI binary
+format.
+"""
+
+import cPickle as pickle
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+import rdflib
+import rdflib.compare
+from rdflib import RDF, XSD
+from rdflib.term import URIRef, BNode, Literal
+import OntologyFormat
+
+NS = "http://example.org/test#"
+
+
+def sampleGraph():
+    graph = rdflib.Graph()
+    bar = URIRef(NS + "bar1")
+    graph.add((bar, RDF.type, URIRef(NS + "Bar")))
+    graph.add((bar, URIRef(NS + "hasSVGElement"), Literal("rect1")))
+    graph.add((bar, URIRef(NS + "hasXCoordinate"), Literal(12.5)))
+    graph.add((bar, URIRef(NS + "has_length"),
+               Literal("3", datatype=XSD.integer)))
+    graph.add((bar, URIRef(NS + "label"),
+               Literal(u"sloupec \u010d.", lang="cs")))
+    node = BNode()
+    graph.add((bar, URIRef(NS + "part"), node))
+    graph.add((node, RDF.type, URIRef("http://other.org/onto/Part")))
+    return graph
+
+
+class BigEndianHost(object):
+    """ Makes OntologyFormat behave as on a big-endian machine. On a
+        little-endian one, the values it writes are then byteswapped, as
+        native values are on big-endian machines.
+    """
+
+    byteorder = "big"
+
+    def __enter__(self):
+        self.sys = OntologyFormat.sys
+        OntologyFormat.sys = self
+
+    def __exit__(self, *exception):
+        OntologyFormat.sys = self.sys
+
+
+class BinaryFormatTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "ontology.saib")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def parse(self):
+        return OntologyFormat.parseOntology(rdflib.Graph(), self.path)
+
+    def testRoundTrip(self):
+        graph = sampleGraph()
+        OntologyFormat.serializeOntology(graph, self.path)
+        self.assertEqual(OntologyFormat.guessFormat(self.path),
+                         OntologyFormat.BINARY)
+        parsed = self.parse()
+        self.assertEqual(len(parsed), len(graph))
+        self.assertTrue(rdflib.compare.isomorphic(parsed, graph))
+
+    def testArrayRoundTripOnBigEndianHost(self):
+        values = array('i', [0, 1, 258, 65536, 2 ** 31 - 1, -2])
+        with open(self.path, "wb") as f:
+            OntologyFormat.writeArray(f, values)
+        with BigEndianHost():
+            with open(self.path, "wb") as f:
+                OntologyFormat.writeArray(f, values)
+            with open(self.path, "rb") as f:
+                swapped = f.read()
+            with open(self.path, "rb") as f:
+                self.assertEqual(OntologyFormat.readArray(f, 'i',
+                                                          len(values)),
+                                 values)
+        # The file is written in the opposite byte order
+        expected = array('i', values)
+        expected.byteswap()
+        self.assertEqual(swapped, expected.tostring())
+
+    def testRoundTripOnBigEndianHost(self):
+        graph = sampleGraph()
+        with BigEndianHost():
+            OntologyFormat.serializeOntology(graph, self.path)
+            self.assertTrue(rdflib.compare.isomorphic(self.parse(), graph))
+
+    def testScanNamespacesReadsTheHeader(self):
+        OntologyFormat.serializeOntology(sampleGraph(), self.path)
+        namespaces = OntologyFormat.scanNamespaces(
+            self.path, OntologyFormat.BINARY, 10)
+        self.assertIn("http://example.org/test", namespaces)
+        self.assertIn("http://other.org/onto/", namespaces)
+        # The namespace of the ontology is the most used one
+        self.assertEqual(OntologyFormat.scanNamespaces(
+            self.path, OntologyFormat.BINARY, 1),
+            set(["http://example.org/test"]))
+
+    def testTruncatedFile(self):
+        OntologyFormat.serializeOntology(sampleGraph(), self.path)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for size in (3, len(OntologyFormat.BINARY_MAGIC) + 2,
+                     len(data) / 2, len(data) - 1):
+            with open(self.path, "wb") as f:
+                f.write(data[:size])
+            self.assertRaises(IOError, self.parse)
+
+    def testHugeCountIsRejected(self):
+        with open(self.path, "wb") as f:
+            f.write(OntologyFormat.BINARY_MAGIC)
+            f.write(OntologyFormat.COUNT.pack(0xFFFFFFFF))
+        self.assertRaises(IOError, self.parse)
+
+    def testPickleIsNotLoaded(self):
+        # Unpickling this payload would call os.remove on the file
+        class Payload(object):
+            def __reduce__(self):
+                return (os.remove, (self.path,))
+        payload = Payload()
+        payload.path = os.path.join(self.directory, "victim")
+        open(payload.path, "w").close()
+        with open(self.path, "wb") as f:
+            f.write(b"SAIB1\n")
+            pickle.dump(payload, f, pickle.HIGHEST_PROTOCOL)
+        self.assertRaises(IOError, self.parse)
+        self.assertTrue(os.path.exists(payload.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Tests of OntologyJournal: the changes appended to the journal and replayed
+on top of the ontology give the graph they were made on, before and after
+the journal is compacted into the ontology file.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+import rdflib
+from rdflib import Literal, URIRef, XSD
+from OntologyJournal import OntologyJournal, ntRow
+from RDFReader import RDFReader
+
+NAMESPACE = "http://example.org/test"
+ONTOLOGY = """<?xml version="1.0"?>
+<rdf:RDF xmlns="%(ns)s#" xml:base="%(ns)s"
+         xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:owl="http://www.w3.org/2002/07/owl#">
+  <owl:Ontology rdf:about="%(ns)s"/>
+  <owl:Class rdf:about="#Bar"/>
+  <owl:DatatypeProperty rdf:about="#hasSVGElement"/>
+  <owl:NamedIndividual rdf:about="#bar1"><rdf:type rdf:resource="#Bar"/>
+    <hasSVGElement>rect1</hasSVGElement>
+    <hasXCoordinate rdf:datatype="http://www.w3.org/2001/XMLSchema#double"
+      >1.0</hasXCoordinate>
+  </owl:NamedIndividual>
+</rdf:RDF>
+"""
+
+SUBJECT = URIRef(NAMESPACE + u"#bar\u00e91")
+PROPERTY = URIRef(NAMESPACE + "#has_label")
+# Literals that n3() would write as triple-quoted strings, and literals
+# with a language or a datatype
+LITERALS = [Literal(u'two\nlines, "quotes", \\ and \r'),
+            Literal(u"caf\u00e9", lang="fr"),
+            Literal(u"\U0001f600"),
+            Literal(2.5),
+            Literal("x", datatype=XSD.string)]
+
+
+class OntologyJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.journal = OntologyJournal(os.path.join(self.tmpDir, "onto.rdf"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def replayed(self, triples=()):
+        graph = rdflib.Graph()
+        for triple in triples:
+            graph.add(triple)
+        count = self.journal.replay(graph)
+        return set(graph), count
+
+    def testNTriplesRows(self):
+        for literal in LITERALS:
+            row = ntRow((SUBJECT, PROPERTY, literal))
+            self.assertEqual(row.count(u"\n"), 1)
+            self.assertTrue(row.endswith(u" .\n"))
+            self.assertNotIn(u'"""', row)
+
+    def testAppendAndReplay(self):
+        self.assertEqual(self.journal.size(), 0)
+        self.assertEqual(self.replayed(), (set(), 0))
+        triples = [(SUBJECT, PROPERTY, literal) for literal in LITERALS]
+        self.journal.append(triples, [])
+        self.assertGreater(self.journal.size(), 0)
+        self.assertEqual(self.replayed(), (set(triples), len(triples)))
+
+    def testRemovedTriplesAreReplayedInOrder(self):
+        old = (SUBJECT, PROPERTY, Literal("old"))
+        kept = (SUBJECT, PROPERTY, LITERALS[0])
+        new = (SUBJECT, PROPERTY, LITERALS[1])
+        self.journal.append([kept, new], [old])
+        # Removed, then added again in a later save, then removed again
+        self.journal.append([], [new])
+        self.journal.append([new], [])
+        self.journal.append([], [new, kept])
+        with open(self.journal.path, "rb") as f:
+            lines = f.read().splitlines()
+        self.assertEqual([line[:2] for line in lines],
+                         ["D ", "A ", "A ", "D ", "A ", "D ", "D "])
+        self.assertEqual(self.replayed([old]), (set(), 7))
+        self.journal.append([kept], [])
+        self.assertEqual(self.replayed([old]), (set([kept]), 8))
+
+    def testClear(self):
+        self.journal.append([(SUBJECT, PROPERTY, LITERALS[0])], [])
+        self.journal.clear()
+        self.assertEqual(self.journal.size(), 0)
+        self.assertEqual(self.replayed(), (set(), 0))
+        self.journal.clear()
+
+
+class ReaderJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpDir, "onto.rdf")
+        with open(self.path, "w") as f:
+            f.write(ONTOLOGY % {"ns": NAMESPACE})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def testSaveReplayAndCompact(self):
+        reader = RDFReader(self.path, NAMESPACE)
+        original = set(reader.graph)
+        # Replaces the x coordinate, which journals a removal
+        reader.addCoordinatesXY("bar1", 5.0, 6.0)
+        reader.removeSVGElementProperty("bar1", "rect1")
+        reader.addInstance("Bar", "bar2")
+        reader.addSVGElementProperty("bar2", u'rect "2"\n')
+        reader.saveOntology(journal=True)
+        reader.addObjectProperty("bar1", "has_label", "bar2")
+        reader.removeInstance("bar2")
+        reader.saveOntology(journal=True)
+        saved = set(reader.graph)
+        with open(reader.journal.path, "rb") as f:
+            journal = f.read()
+        self.assertIn("\nD ", journal)
+        self.assertNotEqual(saved, original)
+        self.assertEqual(set(RDFReader(self.path, NAMESPACE).graph), saved)
+
+        reader.compactOntology()
+        self.assertFalse(os.path.exists(reader.journal.path))
+        self.assertEqual(set(RDFReader(self.path, NAMESPACE).graph), saved)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+"""
+Tests of PathBounds. The bounding boxes of paths are compared with the
+extents of points sampled densely along their segments, and the batch
+version with the per-path one.
+"""
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+import PathBounds
+import PathData
+import SVGTransform
+
+PATHS = [
+    "M 10 20 L 30 40 L 50 20 Z",
+    "M0 0 C 10 40 30 -20 40 0 S 70 -20 80 30",
+    "m0 0 c -10 20 30 20 40 -5 s 30 -20 40 0",
+    "M0 0 Q 10 20 20 0 T 40 0 t 20 -10",
+    "M 5 5 Q 5 5 15 5",
+    "M 0 0 C 10 10 20 20 30 30",
+    # Arcs: small and large, both sweeps, rotated, and relative
+    "M 1 1 A 5 3 30 0 0 11 1",
+    "M 1 1 A 5 3 30 0 1 11 1",
+    "M 1 1 A 50 30 30 1 0 11 1",
+    "M 1 1 a 50 30 -30 1 1 10 0",
+    "M 0 0 a 20 10 75 1 1 5 25 a 4 4 0 0 1 -5 5",
+    # Half ellipses: exact radii, and radii too small for the end points
+    "M 0 0 A 5 5 0 0 1 10 0",
+    "M 0 0 A 5 5 0 0 0 10 0",
+    "M 0 0 A 2 1 0 0 1 10 0",
+    "M 0 0 A 3 1 60 1 0 10 10",
+    "M 0 0 A 10 5 90 0 1 0 20",
+    # Several subpaths
+    "M 0 0 L 10 0 Z M 100 100 C 110 90 120 130 130 100",
+]
+MATRICES = [
+    SVGTransform.parse("translate(10, -20)"),
+    SVGTransform.parse("rotate(30, 5, 5)"),
+    SVGTransform.parse("scale(2, -0.5)"),
+    SVGTransform.parse("skewX(25) rotate(-70)"),
+    SVGTransform.parse("matrix(0.5 1.2 -0.7 0.3 4 5)"),
+]
+SAMPLES = 4000
+
+
+def arcPoint(x0, y0, rx, ry, rotation, flags, x, y):
+    """ Returns a function of t in [0, 1] giving the points of an elliptical
+        arc, following the conversion to center parameterization of
+        https://www.w3.org/TR/SVG/implnote.html#ArcImplementationNotes
+    """
+
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0:
+        return lambda t: (x0 + (x - x0) * t, y0 + (y - y0) * t)
+    phi = math.radians(rotation)
+    cos, sin = math.cos(phi), math.sin(phi)
+    x1 = cos * (x0 - x) / 2 + sin * (y0 - y) / 2
+    y1 = -sin * (x0 - x) / 2 + cos * (y0 - y) / 2
+    scale = math.sqrt(x1 * x1 / (rx * rx) + y1 * y1 / (ry * ry))
+    if scale > 1:
+        rx, ry = rx * scale, ry * scale
+    square = (rx * rx * ry * ry - rx * rx * y1 * y1 - ry * ry * x1 * x1) / \
+        (rx * rx * y1 * y1 + ry * ry * x1 * x1)
+    root = math.sqrt(max(0.0, square))
+    if (flags >= 2) == (flags % 2 == 1):
+        root = -root
+    cx1, cy1 = root * rx * y1 / ry, -root * ry * x1 / rx
+    cx = cos * cx1 - sin * cy1 + (x0 + x) / 2
+    cy = sin * cx1 + cos * cy1 + (y0 + y) / 2
+    start = math.atan2((y1 - cy1) / ry, (x1 - cx1) / rx)
+    end = math.atan2((-y1 - cy1) / ry, (-x1 - cx1) / rx)
+    sweep = (end - start) % (2 * math.pi)
+    if flags % 2 == 0:
+        sweep -= 2 * math.pi
+
+    def point(t):
+        theta = start + sweep * t
+        return (cx + rx * cos * math.cos(theta) - ry * sin * math.sin(theta),
+                cy + rx * sin * math.cos(theta) + ry * cos * math.sin(theta))
+    return point
+
+
+def segmentPoint(kind, x0, y0, x1, y1, x2, y2, x3, y3):
+    """ Returns a function of t in [0, 1] giving the points of a segment
+        scanned by PathData.
+    """
+
+    if kind == PathData.ARC:
+        return arcPoint(x0, y0, x1, y1, x2, y2, x3, y3)
+    if kind == PathData.QUADRATIC:
+        return lambda t: ((1 - t) ** 2 * x0 + 2 * (1 - t) * t * x1 +
+                          t * t * x3,
+                          (1 - t) ** 2 * y0 + 2 * (1 - t) * t * y1 +
+                          t * t * y3)
+    # Lines are cubic curves with their end points as control points
+    return lambda t: ((1 - t) ** 3 * x0 + 3 * (1 - t) ** 2 * t * x1 +
+                      3 * (1 - t) * t * t * x2 + t ** 3 * x3,
+                      (1 - t) ** 3 * y0 + 3 * (1 - t) ** 2 * t * y1 +
+                      3 * (1 - t) * t * t * y2 + t ** 3 * y3)
+
+
+def sampledBounds(pathData, matrix=SVGTransform.IDENTITY):
+    """ Returns the extents of points sampled along the segments of a path,
+        mapped by a matrix.
+    """
+
+    a, b, c, d, e, f = matrix
+    kinds, coords = PathData.scan(pathData)
+    xs, ys = [], []
+    for segment, kind in enumerate(kinds):
+        point = segmentPoint(kind, *coords[segment * PathData.STRIDE:
+                                           (segment + 1) * PathData.STRIDE])
+        for i in xrange(SAMPLES + 1):
+            x, y = point(float(i) / SAMPLES)
+            xs.append(a * x + c * y + e)
+            ys.append(b * x + d * y + f)
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def pathBounds(pathData, matrix=SVGTransform.IDENTITY):
+    kinds, coords = PathData.scan(pathData)
+    if matrix != SVGTransform.IDENTITY:
+        coords = SVGTransform.transformSegments(kinds, coords, matrix)
+    return PathBounds.bounds(kinds, coords)
+
+
+class BoundsTest(unittest.TestCase):
+
+    def assertBox(self, box, expected, delta=1e-9):
+        self.assertIsNotNone(box)
+        for value, expectedValue in zip(box, expected):
+            self.assertAlmostEqual(value, expectedValue, delta=delta)
+
+    def assertSampled(self, box, sampled):
+        """ The exact box contains the sampled one and is at most a
+            sampling step larger.
+        """
+
+        size = max(sampled[2] - sampled[0], sampled[3] - sampled[1], 1.0)
+        self.assertBox(box, sampled, delta=1e-4 * size)
+        tolerance = 1e-9 * size
+        self.assertLessEqual(box[0], sampled[0] + tolerance)
+        self.assertLessEqual(box[1], sampled[1] + tolerance)
+        self.assertGreaterEqual(box[2], sampled[2] - tolerance)
+        self.assertGreaterEqual(box[3], sampled[3] - tolerance)
+
+    def testBoundsOfSampledPoints(self):
+        for pathData in PATHS:
+            self.assertSampled(pathBounds(pathData), sampledBounds(pathData))
+
+    def testBoundsOfTransformedPaths(self):
+        for pathData in PATHS:
+            for matrix in MATRICES:
+                self.assertSampled(pathBounds(pathData, matrix),
+                                   sampledBounds(pathData, matrix))
+
+    def testKnownBounds(self):
+        # Curve extrema lie outside the hull of the end points
+        self.assertBox(pathBounds("M 0 0 C 0 40 40 40 40 0"),
+                       (0, 0, 40, 30))
+        self.assertBox(pathBounds("M 0 0 Q 10 20 20 0"), (0, 0, 20, 10))
+        # Semicircles: the sweep flag picks the side
+        self.assertBox(pathBounds("M 0 0 A 5 5 0 0 1 10 0"), (0, -5, 10, 0))
+        self.assertBox(pathBounds("M 0 0 A 5 5 0 0 0 10 0"), (0, 0, 10, 5))
+        # Radii too small are scaled up to a semicircle
+        self.assertBox(pathBounds("M 0 0 A 1 1 0 0 1 10 0"), (0, -5, 10, 0))
+        # A circle of radius 10 drawn as two arcs
+        self.assertBox(pathBounds("M 0 10 A 10 10 0 1 1 20 10 "
+                                  "A 10 10 0 1 1 0 10"), (0, 0, 20, 20))
+        # Large arc of a circle of radius 5 centered at (5, 5)
+        self.assertBox(pathBounds("M 5 0 A 5 5 0 1 0 10 5"), (0, 0, 10, 10))
+
+    def testDegenerateArcsAreLines(self):
+        for pathData in ("M 0 0 A 0 5 0 0 1 10 4",
+                         "M 0 0 A 5 0 0 1 1 10 4"):
+            self.assertBox(pathBounds(pathData), (0, 0, 10, 4))
+        self.assertBox(pathBounds("M 3 4 A 5 5 0 0 1 3 4"), (3, 4, 3, 4))
+
+    def testNegativeRadii(self):
+        self.assertBox(pathBounds("M 0 0 A -5 -5 0 0 1 10 0"),
+                       pathBounds("M 0 0 A 5 5 0 0 1 10 0"))
+
+    def testEmptyPath(self):
+        self.assertIsNone(pathBounds("M 10 10"))
+
+
+@unittest.skipUnless(PathBounds.isAvailable(), "NumPy is not installed")
+class BatchBoundsTest(unittest.TestCase):
+
+    def assertSameBoxes(self, boxes, expected):
+        self.assertEqual(len(boxes), len(expected))
+        for box, expectedBox in zip(boxes.tolist(), expected):
+            size = max(expectedBox[2] - expectedBox[0],
+                       expectedBox[3] - expectedBox[1], 1.0)
+            for value, expectedValue in zip(box, expectedBox):
+                self.assertAlmostEqual(value, expectedValue,
+                                       delta=1e-12 * size)
+
+    def testSameAsBounds(self):
+        paths = [PathData.scan(pathData) for pathData in PATHS]
+        self.assertSameBoxes(PathBounds.batchBounds(paths),
+                             [pathBounds(pathData) for pathData in PATHS])
+
+    def testSameAsBoundsOfTransformedPaths(self):
+        paths = []
+        matrices = []
+        expected = []
+        for i, pathData in enumerate(PATHS):
+            matrix = SVGTransform.IDENTITY if i % 3 == 0 else \
+                MATRICES[i % len(MATRICES)]
+            paths.append(PathData.scan(pathData))
+            matrices.append(matrix)
+            expected.append(pathBounds(pathData, matrix))
+        self.assertSameBoxes(PathBounds.batchBounds(paths, matrices),
+                             expected)
+
+    def testPathsWithoutSegments(self):
+        paths = [PathData.scan(pathData)
+                 for pathData in ("M 0 0", PATHS[0], "", PATHS[1])]
+        boxes = PathBounds.batchBounds(paths)
+        self.assertTrue(all(value != value for value in boxes[0]))
+        self.assertTrue(all(value != value for value in boxes[2]))
+        self.assertSameBoxes(boxes[[1, 3]], [pathBounds(PATHS[0]),
+                                             pathBounds(PATHS[1])])
+        self.assertEqual(PathBounds.batchBounds([]).shape, (0, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
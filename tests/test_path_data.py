@@ -0,0 +1,142 @@
+"""
+Tests of PathData. The segments scanned from path data are compared with
+those of svg.path, the parser used before, when it is installed.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+try:
+    from svg.path import parse_path
+except ImportError:
+    parse_path = None
+from PathData import scan, LINE, QUADRATIC, CUBIC, ARC, STRIDE
+
+# Path data covering every command, absolute and relative, implicit
+# repetitions and arcs of every flag combination
+PATHS = [
+    "M 10 20 L 30 40 L 50 20",
+    "m 10 20 l 20 20 20 -20 z",
+    "M10,20L30,40Z M 5 5 l 1 1",
+    "M 10 10 H 50 V 30 h -20 v -10 Z",
+    "m1 1 2 2 3 3 -4-4",
+    "M0 0 C 10 20 30 20 40 0 S 70 -20 80 0",
+    "M0 0 c 10 20 30 20 40 0 s 30 -20 40 0 s 10 10 20 0",
+    "M 0 0 S 10 10 20 0",
+    "M0 0 Q 10 20 20 0 T 40 0 t 20 0",
+    "m0 0 q 10 20 20 0 t 20 0 Q 50 50 60 0",
+    "M 0 0 T 10 10",
+    "M 1 1 A 5 3 30 0 0 11 1",
+    "M 1 1 A 5 3 30 0 1 11 1",
+    "M 1 1 a 5 3 30 1 0 10 0",
+    "M 1 1 a 5 3 -45 1 1 10 0 a 4 4 0 0 1 -5 5",
+    "M 0 0 A 5 5 0 0 1 10 0 L 10 10 A 5 5 0 0 1 0 10 Z",
+    "M1.5e1 -2E-1 L.5.5 -.5-.5 l+1,-1e0",
+    "M 0 0 L 10 0 L 0 0 z",
+]
+
+
+def segments(kinds, coords):
+    """ Returns the segments scanned by PathData as (kind, coordinates)
+        pairs.
+    """
+
+    return [(kind, tuple(coords[i * STRIDE:(i + 1) * STRIDE]))
+            for i, kind in enumerate(kinds)]
+
+
+def referenceSegments(pathData):
+    """ Returns the segments of svg.path in the layout of PathData. """
+    result = []
+    for segment in parse_path(pathData):
+        name = type(segment).__name__
+        start, end = segment.start, segment.end
+        if name == "Move":
+            continue
+        if name in ("Line", "Close"):
+            kind, first, second = LINE, start, end
+        elif name == "QuadraticBezier":
+            kind, first, second = QUADRATIC, segment.control, \
+                segment.control
+        elif name == "CubicBezier":
+            kind, first, second = CUBIC, segment.control1, segment.control2
+        else:
+            kind = ARC
+            first = segment.radius
+            second = complex(segment.rotation,
+                             2 * int(segment.arc) + int(segment.sweep))
+        result.append((kind, (start.real, start.imag, first.real,
+                              first.imag, second.real, second.imag,
+                              end.real, end.imag)))
+    return result
+
+
+class ScanTest(unittest.TestCase):
+
+    def assertSegments(self, actual, expected):
+        self.assertEqual([kind for kind, _ in actual],
+                         [kind for kind, _ in expected])
+        for (_, coords), (_, expectedCoords) in zip(actual, expected):
+            for value, expectedValue in zip(coords, expectedCoords):
+                self.assertAlmostEqual(value, expectedValue, places=9)
+
+    @unittest.skipIf(parse_path is None, "svg.path is not installed")
+    def testSameSegmentsAsSvgPath(self):
+        for pathData in PATHS:
+            self.assertSegments(segments(*scan(pathData)),
+                                referenceSegments(pathData))
+
+    def testRelativeCommands(self):
+        self.assertSegments(segments(*scan("m 10 20 l 5 5 h 5 v -5 z")), [
+            (LINE, (10, 20, 10, 20, 15, 25, 15, 25)),
+            (LINE, (15, 25, 15, 25, 20, 25, 20, 25)),
+            (LINE, (20, 25, 20, 25, 20, 20, 20, 20)),
+            (LINE, (20, 20, 20, 20, 10, 20, 10, 20))])
+        # A relative moveto after a closepath starts at the start of the
+        # closed subpath
+        self.assertSegments(segments(*scan("m 10 10 l 10 0 z m 1 1 l 1 0")), [
+            (LINE, (10, 10, 10, 10, 20, 10, 20, 10)),
+            (LINE, (20, 10, 20, 10, 10, 10, 10, 10)),
+            (LINE, (11, 11, 11, 11, 12, 11, 12, 11))])
+
+    def testSmoothCurvesReflectControlPoints(self):
+        self.assertSegments(segments(*scan("M0 0 C 0 10 10 10 10 0 "
+                                           "s 10 -10 10 0")), [
+            (CUBIC, (0, 0, 0, 10, 10, 10, 10, 0)),
+            (CUBIC, (10, 0, 10, -10, 20, -10, 20, 0))])
+        self.assertSegments(segments(*scan("M0 0 Q 5 10 10 0 t 10 0")), [
+            (QUADRATIC, (0, 0, 5, 10, 5, 10, 10, 0)),
+            (QUADRATIC, (10, 0, 15, -10, 15, -10, 20, 0))])
+
+    def testRelativeArcKeepsRadii(self):
+        self.assertSegments(segments(*scan("M 5 5 a 4 3 30 1 0 10 0")), [
+            (ARC, (5, 5, 4, 3, 30, 2, 15, 5))])
+
+    def testCompactArcFlags(self):
+        # The flags need no separators; svg.path cannot parse these
+        expected = [(ARC, (0, 0, 5, 5, 0, 1, 10, 0)),
+                    (ARC, (10, 0, 5, 5, 0, 2, 20, 0))]
+        self.assertSegments(segments(*scan("M0 0 a5 5 0 0110 0 "
+                                           "a5 5 0 1 0 10 0")), expected)
+        self.assertSegments(segments(*scan("M0,0a5,5,0,0,1,10,0"
+                                           "a5,5,0,1010,0")), expected)
+
+    def testEmptyPaths(self):
+        for pathData in ("", "M 10 10", "M 10 10 Z", "M 1 1 m 2 2"):
+            kinds, coords = scan(pathData)
+            self.assertEqual(len(kinds), 0)
+            self.assertEqual(len(coords), 0)
+
+    def testMalformedPathData(self):
+        for pathData in ("M 0 0 L 10", "M 0 0 C 1 1 2 2", "10 10",
+                         "M 0 0 A 5 5 0 2 0 10 10", "M 0 0 A 5 5 0 0 1 10",
+                         "M 0 0 Z 10 10"):
+            self.assertRaises(ValueError, scan, pathData)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+"""
+Tests of the batched mutations of RDFReader (beginBatch / commitBatch). The
+same changes are made with and without a batch, which must leave the same
+graph and record changes for the journal that lead to it. The tests with a
+persistent store need the bsddb module (Sleepycat store) and are skipped
+without it.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+import rdflib
+from GraphStore import openGraphStore, isBackendAvailable
+from RDFReader import RDFReader
+
+NAMESPACE = "http://example.org/test"
+ONTOLOGY = """<?xml version="1.0"?>
+<rdf:RDF xmlns="%(ns)s#" xml:base="%(ns)s"
+         xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:owl="http://www.w3.org/2002/07/owl#">
+  <owl:Ontology rdf:about="%(ns)s"/>
+  <owl:Class rdf:about="#Bar"/>
+  <owl:DatatypeProperty rdf:about="#hasSVGElement"/>
+  %(individuals)s
+</rdf:RDF>
+"""
+INDIVIDUAL = ('<owl:NamedIndividual rdf:about="#rect%d">'
+              '<rdf:type rdf:resource="#Bar"/>'
+              '<hasSVGElement>rect%d</hasSVGElement>'
+              '<hasXCoordinate>%d</hasXCoordinate>'
+              '</owl:NamedIndividual>')
+
+
+def editAnnotations(reader):
+    """ Makes changes like those of PickerGUI.savingOperations, including
+        changes undone or redone later on.
+    """
+
+    reader.addInstance("Bar", "new1")
+    reader.addCoordinatesXY("new1", 1.0, 2.0)
+    reader.addLengthAndWidth("new1", 3.0, 4.0)
+    reader.addSVGElementProperty("new1", "path1")
+    reader.addSVGElementProperty("new1", "path1")
+    # Values replaced twice, and values that do not change
+    reader.addCoordinatesXY("rect0", 5.0, 6.0)
+    reader.addCoordinatesXY("rect0", 7.0, 8.0)
+    reader.addCoordinatesXY("rect4", 4, 1.0)
+    # Elements removed and added again, and added and removed again
+    reader.removeSVGElementProperty("rect1", "rect1")
+    reader.addSVGElementProperty("rect1", "rect1")
+    reader.addSVGElementProperty("rect2", "path2")
+    reader.removeSVGElementProperty("rect2", "path2")
+    # Annotations removed after being changed
+    reader.addCoordinatesXY("rect3", 9.0, 9.0)
+    reader.addSVGElementProperty("rect3", "path3")
+    reader.removeInstance("rect3")
+    reader.addInstance("Bar", "new2")
+    reader.addSVGElementProperty("new2", "path4")
+    reader.removeInstance("new2")
+    reader.addObjectProperty("rect0", "has_label", "new1")
+    reader.removeObjectProperty("rect0", "has_label", "new1")
+    reader.addObjectProperty("rect1", "has_label", "new1")
+
+
+class BatchTest(unittest.TestCase):
+
+    store = None
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpDir, "onto.rdf")
+        with open(self.path, "w") as f:
+            f.write(ONTOLOGY % {"ns": NAMESPACE, "individuals": "\n".join(
+                INDIVIDUAL % (i, i, i) for i in xrange(5))})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def openReader(self):
+        if self.store is not None:
+            self.store.invalidate(self.path)
+        reader = RDFReader(self.path, NAMESPACE, store=self.store)
+        reader.graph
+        return reader
+
+    def editedGraph(self, batched):
+        """ Returns the triples of the graph before and after the changes
+            of editAnnotations, and the changes recorded for the journal.
+        """
+
+        reader = self.openReader()
+        before = set(reader.graph)
+        if batched:
+            reader.beginBatch()
+        editAnnotations(reader)
+        if batched:
+            reader.commitBatch()
+        after = set(reader.graph)
+        changes = reader.changes
+        reader.close()
+        return before, after, changes
+
+    def assertReplayed(self, before, after, changes):
+        """ Applying the recorded changes to the graph before the changes
+            gives the graph after them, as when the journal is replayed.
+        """
+
+        self.assertEqual(
+            (before - set(t for t, added in changes.iteritems()
+                          if not added)) |
+            set(t for t, added in changes.iteritems() if added), after)
+
+    def testSameChangesAsPerTriple(self):
+        before, after, changes = self.editedGraph(False)
+        self.assertReplayed(before, after, changes)
+        batchBefore, batchAfter, batchChanges = self.editedGraph(True)
+        self.assertEqual((batchBefore, batchAfter), (before, after))
+        self.assertReplayed(before, after, batchChanges)
+        # Triples added and removed again within the batch are not
+        # recorded
+        self.assertLessEqual(set(batchChanges.iteritems()),
+                             set(changes.iteritems()))
+        self.assertLess(len(batchChanges), len(changes))
+        uri = rdflib.URIRef
+        self.assertIn((uri(NAMESPACE + "#rect0"),
+                       uri(NAMESPACE + "#hasXCoordinate"),
+                       rdflib.Literal(7.0)), after)
+        self.assertFalse([t for t in after
+                          if t[0] == uri(NAMESPACE + "#rect3")])
+        self.assertIn((uri(NAMESPACE + "#rect1"),
+                       uri(NAMESPACE + "#hasSVGElement"),
+                       rdflib.Literal("rect1")), after)
+
+    def testBatchIsSeenByLookups(self):
+        reader = self.openReader()
+        reader.beginBatch()
+        reader.addInstance("Bar", "new1")
+        reader.addSVGElementProperty("new1", "path1")
+        reader.addCoordinatesXY("rect0", 5.0, 6.0)
+        self.assertTrue(reader.hasInstance("Bar", "new1"))
+        self.assertTrue(reader.hasSVGElement("new1", "path1"))
+        self.assertTrue(reader.hasCoordinates("rect0", 5.0))
+        self.assertFalse(reader.hasCoordinates("rect0", 0))
+        # The graph itself is only changed on commit
+        self.assertNotIn((reader.terms.uri("new1"), rdflib.RDF.type,
+                          reader.terms.uri("Bar")), reader.graph)
+        reader.commitBatch()
+        self.assertIn((reader.terms.uri("new1"), rdflib.RDF.type,
+                       reader.terms.uri("Bar")), reader.graph)
+        self.assertFalse(reader.hasCoordinates("rect0", 0))
+        reader.close()
+
+    def testUnchangedValuesAreNotChanges(self):
+        reader = self.openReader()
+        reader.beginBatch()
+        for i in xrange(5):
+            reader.addCoordinatesXY("rect%d" % i, i, 1.0)
+        reader.commitBatch()
+        reader.changes = {}
+        reader.beginBatch()
+        for i in xrange(5):
+            reader.addCoordinatesXY("rect%d" % i, i, 1.0)
+            reader.addSVGElementProperty("rect%d" % i, "rect%d" % i)
+        reader.commitBatch()
+        self.assertEqual(reader.changes, {})
+        reader.close()
+
+    def testEmptyBatch(self):
+        reader = self.openReader()
+        before = set(reader.graph)
+        reader.commitBatch()
+        reader.beginBatch()
+        reader.commitBatch()
+        self.assertEqual(set(reader.graph), before)
+        self.assertEqual(reader.changes, {})
+        reader.close()
+
+
+@unittest.skipUnless(isBackendAvailable("Sleepycat"),
+                     "The Sleepycat store needs the bsddb module")
+class StoreBatchTest(BatchTest):
+
+    def setUp(self):
+        BatchTest.setUp(self)
+        self.store = openGraphStore(os.path.join(self.tmpDir, "stores"),
+                                    "Sleepycat")
+
+
+if __name__ == "__main__":
+    unittest.main()
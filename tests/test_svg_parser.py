@@ -0,0 +1,162 @@
+"""
+Tests of the geometry signatures of SVGParser, and of how the GUI uses them
+to save only the geometry of annotations whose elements were moved. Both
+need the inkex module of Inkscape (and the GUI Tkinter); the tests are
+skipped without them.
+"""
+
+import os
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+from lxml import etree
+from ElementIndex import ElementIndex
+from ElementSet import toElementSets
+try:
+    import SVGParser
+except ImportError:
+    SVGParser = None
+try:
+    import gui
+except ImportError:
+    gui = None
+
+DOCUMENT = """<svg xmlns="http://www.w3.org/2000/svg"
+     xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd">
+  <g id="layer1" transform="translate(10, 0)">
+    <rect id="rect1" x="0" y="0" width="10" height="20"/>
+    <rect id="rect2" x="20" y="0" width="10" height="20"/>
+  </g>
+  <path id="path1" d="M 0 0 L 10 10"/>
+  <path id="path2" sodipodi:cx="5" sodipodi:cy="5" d="M 0 0"/>
+  <text id="text1" x="1" y="2">a</text>
+</svg>
+"""
+IDS = ["rect1", "rect2", "path1", "path2", "text1"]
+
+
+def elementById(root, elementId):
+    return root.xpath("//*[@id=$id]", id=elementId)[0]
+
+
+@unittest.skipIf(SVGParser is None, "SVGParser needs the inkex module")
+class GeometrySignatureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = etree.fromstring(DOCUMENT)
+        self.before = self.signatures()
+
+    def signatures(self):
+        return SVGParser.SVGParser(self.root).geometrySignatures(IDS)
+
+    def assertMoved(self, moved):
+        after = self.signatures()
+        self.assertEqual([elementId for elementId in IDS
+                          if after[elementId] != self.before[elementId]],
+                         moved)
+
+    def testUnchangedDocument(self):
+        self.assertEqual(sorted(self.before), sorted(IDS))
+        self.assertEqual(len(set(self.before.values())), len(IDS))
+        self.assertMoved([])
+        # Attributes the geometry does not depend on are not taken into
+        # account
+        elementById(self.root, "rect1").set("style", "fill:red")
+        self.assertMoved([])
+
+    def testMovedElements(self):
+        elementById(self.root, "rect2").set("x", "25")
+        elementById(self.root, "path1").set("d", "M 0 0 L 10 20")
+        elementById(self.root, "path2").set(
+            "{http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd}cx", "6")
+        self.assertMoved(["rect2", "path1", "path2"])
+
+    def testTransformedGroup(self):
+        elementById(self.root, "layer1").set("transform", "rotate(5)")
+        self.assertMoved(["rect1", "rect2"])
+
+    def testRemovedElement(self):
+        text = elementById(self.root, "text1")
+        text.getparent().remove(text)
+        self.assertIsNone(self.signatures()["text1"])
+        self.assertMoved(["text1"])
+
+    def testUnknownIds(self):
+        signatures = SVGParser.SVGParser(self.root).geometrySignatures(
+            ["rect1", "missing"])
+        self.assertEqual(signatures["rect1"], self.before["rect1"])
+        self.assertIsNone(signatures["missing"])
+
+
+class RecordingReader(object):
+    """ Reader of an ontology that has every entity and instance, and
+        records the instances whose geometry is written.
+    """
+
+    def __init__(self):
+        self.updated = []
+
+    def hasEntity(self, entity):
+        return True
+
+    def hasInstance(self, entity, instance):
+        return True
+
+    def addCoordinatesXY(self, instance, x, y):
+        self.updated.append(instance)
+
+    def addLengthAndWidth(self, instance, h, w):
+        pass
+
+
+class Document(object):
+    """ The part of AnnotationEffect used by the GUI to read the geometry.
+    """
+
+    def __init__(self, root):
+        self.document = root.getroottree()
+
+
+@unittest.skipIf(gui is None, "The GUI needs the inkex and Tkinter modules")
+class MovedAnnotationsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = etree.fromstring(DOCUMENT)
+        # A GUI without windows (PickerGUI is an old-style class)
+        self.gui = types.InstanceType(gui.PickerGUI)
+        self.gui.aEffect = Document(self.root)
+        self.gui.instancesbyClass = toElementSets({
+            "Bar": {"bar1": ["rect1"], "bar2": ["rect2", "path1"]},
+            "Label": {"label1": ["text1"], "label2": ["path2"]}})
+        self.gui.annotationsByElement = ElementIndex(
+            self.gui.instancesbyClass)
+        self.gui.geometrySignatures = SVGParser.SVGParser(
+            self.root).geometrySignatures(
+                self.gui.annotationsByElement.annotations)
+
+    def testMovedAnnotations(self):
+        self.assertEqual(self.gui.movedAnnotations(), set())
+        elementById(self.root, "path1").set("d", "M 1 1 L 10 10")
+        text = elementById(self.root, "text1")
+        text.getparent().remove(text)
+        self.assertEqual(self.gui.movedAnnotations(),
+                         set([("Bar", "bar2"), ("Label", "label1")]))
+
+    def testUpdateGeometryOfSomeAnnotations(self):
+        reader = RecordingReader()
+        # Pairs that are no longer annotations are skipped
+        self.gui.updateGeometry(reader, [("Bar", "bar2"), ("Bar", "gone"),
+                                         ("Axis", "bar1")])
+        self.assertEqual(reader.updated, ["bar2"])
+        reader = RecordingReader()
+        self.gui.updateGeometry(reader)
+        self.assertEqual(sorted(reader.updated),
+                         ["bar1", "bar2", "label1", "label2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
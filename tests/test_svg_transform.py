@@ -0,0 +1,281 @@
+"""
+Tests of SVGTransform. Matrices are compared with a reference that builds
+the 3x3 matrix of every transform function and multiplies them as nested
+lists, and the cumulative matrices of nested groups with a walk over the
+ancestors of every element.
+"""
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+from lxml import etree
+import PathData
+import SVGTransform
+from SVGTransform import IDENTITY, TransformCache
+
+DOCUMENT = """<svg xmlns="http://www.w3.org/2000/svg">
+  <g id="layer1" transform="translate(100, 50)">
+    <rect id="rect1" x="0" y="0" width="10" height="10"/>
+    <g id="g1" transform="rotate(30 5 5)">
+      <g id="g2">
+        <rect id="rect2" transform="scale(2, 3)" x="1" y="2" width="3"
+              height="4"/>
+        <g id="g3" transform="skewX(20) translate(-3)">
+          <path id="path1" transform="matrix(1 0.5 -0.5 1 2 3)"
+                d="M 0 0 A 5 3 30 0 1 10 0"/>
+        </g>
+      </g>
+      <text id="text1" transform="translate(1 2) junk" x="1" y="1">a</text>
+    </g>
+  </g>
+  <g id="layer2" transform="scale(-1, 1)">
+    <ellipse id="ellipse1" transform="rotate(-90)" cx="4" cy="2" rx="1"
+             ry="1"/>
+  </g>
+  <rect id="rect3" x="1" y="1" width="1" height="1"/>
+</svg>
+"""
+
+
+def product(m1, m2):
+    """ Multiplies two 3x3 matrices given as nested lists. """
+    return [[sum(m1[i][k] * m2[k][j] for k in range(3)) for j in range(3)]
+            for i in range(3)]
+
+
+def asTuple(m):
+    return (m[0][0], m[1][0], m[0][1], m[1][1], m[0][2], m[1][2])
+
+
+def asNested(matrix):
+    a, b, c, d, e, f = matrix
+    return [[a, c, e], [b, d, f], [0.0, 0.0, 1.0]]
+
+
+def translation(x, y=0.0):
+    return [[1.0, 0.0, x], [0.0, 1.0, y], [0.0, 0.0, 1.0]]
+
+
+def rotation(angle, cx=0.0, cy=0.0):
+    cos, sin = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    turn = [[cos, -sin, 0.0], [sin, cos, 0.0], [0.0, 0.0, 1.0]]
+    return product(product(translation(cx, cy), turn),
+                   translation(-cx, -cy))
+
+
+def scaling(x, y=None):
+    return [[x, 0.0, 0.0], [0.0, x if y is None else y, 0.0],
+            [0.0, 0.0, 1.0]]
+
+
+def skewing(angleX, angleY):
+    return [[1.0, math.tan(math.radians(angleX)), 0.0],
+            [math.tan(math.radians(angleY)), 1.0, 0.0], [0.0, 0.0, 1.0]]
+
+
+# Key: id of an element of DOCUMENT; Value: the reference matrix of its own
+# transform attribute
+OWN_TRANSFORMS = {
+    "layer1": translation(100, 50),
+    "g1": rotation(30, 5, 5),
+    "rect2": scaling(2, 3),
+    "g3": product(skewing(20, 0), translation(-3)),
+    "path1": asNested((1, 0.5, -0.5, 1, 2, 3)),
+    "layer2": scaling(-1, 1),
+    "ellipse1": rotation(-90),
+}
+
+
+def referenceMatrix(element):
+    """ Returns the cumulative matrix of an element by multiplying the
+        reference matrices of its ancestors, from the root down.
+    """
+
+    matrix = scaling(1.0)
+    for ancestor in reversed([element] + list(element.iterancestors())):
+        own = OWN_TRANSFORMS.get(ancestor.get("id"))
+        if own is not None:
+            matrix = product(matrix, own)
+    return asTuple(matrix)
+
+
+class TransformTest(unittest.TestCase):
+
+    def assertMatrix(self, matrix, expected):
+        self.assertEqual(len(matrix), 6)
+        for value, expectedValue in zip(matrix, expected):
+            self.assertAlmostEqual(value, expectedValue, places=9)
+
+
+class ParseTest(TransformTest):
+
+    def testFunctions(self):
+        cases = [
+            ("translate(10)", translation(10)),
+            ("translate(10, -20.5)", translation(10, -20.5)),
+            ("scale(2)", scaling(2)),
+            ("scale(2 -3)", scaling(2, -3)),
+            ("rotate(90)", rotation(90)),
+            ("rotate(-45, 10, 20)", rotation(-45, 10, 20)),
+            ("skewX(30)", skewing(30, 0)),
+            ("skewY(-10)", skewing(0, -10)),
+            ("matrix(1,2,3,4,5,6)", asNested((1, 2, 3, 4, 5, 6))),
+            ("matrix(1e0 .5-.5 1 +2 3E1)",
+             asNested((1, 0.5, -0.5, 1, 2, 30))),
+        ]
+        for attribute, expected in cases:
+            self.assertMatrix(SVGTransform.parse(attribute),
+                              asTuple(expected))
+
+    def testListsApplyTheLastFunctionFirst(self):
+        expected = product(product(translation(10, 20), rotation(45)),
+                           scaling(2, 3))
+        for attribute in ("translate(10,20) rotate(45) scale(2,3)",
+                          "translate(10 20),rotate(45),scale(2 3)",
+                          "\n translate( 10 , 20 )rotate(45)\tscale(2,3) "):
+            self.assertMatrix(SVGTransform.parse(attribute),
+                              asTuple(expected))
+
+    def testInvalidListsAreIgnored(self):
+        for attribute in ("translate(1,2,3)", "rotate(1, 2)", "matrix(1)",
+                          "scale()", "shear(1)", "translate(a)",
+                          "translate(1) junk", "junk translate(1)",
+                          "translate(1 2", "scale(1; 2)"):
+            self.assertEqual(SVGTransform.parse(attribute), IDENTITY)
+        self.assertEqual(SVGTransform.parse(""), IDENTITY)
+        self.assertEqual(SVGTransform.parse(None), IDENTITY)
+
+    def testMapsPoints(self):
+        a, b, c, d, e, f = SVGTransform.parse("rotate(90, 10, 10)")
+        self.assertAlmostEqual(a * 20 + c * 10 + e, 10)
+        self.assertAlmostEqual(b * 20 + d * 10 + f, 20)
+
+
+class TransformCacheTest(TransformTest):
+
+    def setUp(self):
+        self.root = etree.fromstring(DOCUMENT)
+        self.elements = list(self.root.iter(etree.Element))
+
+    def assertReferenceMatrices(self, elements):
+        cache = TransformCache()
+        for element in elements:
+            self.assertMatrix(cache.matrixOf(element),
+                              referenceMatrix(element))
+
+    def testNestedGroupsTopDown(self):
+        self.assertReferenceMatrices(self.elements)
+
+    def testNestedGroupsBottomUp(self):
+        # The deepest elements are composed first, filling the cache of
+        # their groups
+        self.assertReferenceMatrices(reversed(self.elements))
+
+    def testInvalidTransformIsIgnored(self):
+        text = self.root.find(".//{http://www.w3.org/2000/svg}text")
+        group = text.getparent()
+        cache = TransformCache()
+        self.assertMatrix(cache.matrixOf(text), cache.matrixOf(group))
+
+    def testUntransformedElement(self):
+        rect = self.elements[-1]
+        self.assertEqual(rect.get("id"), "rect3")
+        self.assertEqual(TransformCache().matrixOf(rect), IDENTITY)
+
+
+class TransformArcTest(TransformTest):
+
+    MATRICES = [
+        SVGTransform.parse("rotate(40)"),
+        SVGTransform.parse("scale(2, 0.5)"),
+        SVGTransform.parse("scale(-1, 1)"),
+        SVGTransform.parse("skewX(35) rotate(20)"),
+        SVGTransform.parse("matrix(0.5 1.2 -0.7 0.3 4 5)"),
+        SVGTransform.parse("matrix(0.5 1.2 0.7 -0.3 4 5)"),
+    ]
+    ARCS = [(5, 3, 30), (5, 5, 0), (2, 7, -75), (4, 1, 90)]
+
+    def testImageOfTheEllipse(self):
+        """ Every point of the ellipse mapped by the matrix lies on the
+            ellipse given by the new radii and rotation.
+        """
+
+        for matrix in self.MATRICES:
+            a, b, c, d = matrix[:4]
+            for rx, ry, angle in self.ARCS:
+                newRx, newRy, newAngle, _ = SVGTransform.transformArc(
+                    matrix, rx, ry, angle, 0)
+                phi, newPhi = math.radians(angle), math.radians(newAngle)
+                for i in range(36):
+                    theta = math.radians(10 * i)
+                    x = rx * math.cos(theta)
+                    y = ry * math.sin(theta)
+                    px = math.cos(phi) * x - math.sin(phi) * y
+                    py = math.sin(phi) * x + math.cos(phi) * y
+                    qx, qy = a * px + c * py, b * px + d * py
+                    u = math.cos(newPhi) * qx + math.sin(newPhi) * qy
+                    v = -math.sin(newPhi) * qx + math.cos(newPhi) * qy
+                    self.assertAlmostEqual((u / newRx) ** 2 +
+                                           (v / newRy) ** 2, 1.0, places=9)
+
+    def testReflectionSwapsTheSweep(self):
+        for matrix in self.MATRICES:
+            a, b, c, d = matrix[:4]
+            reflected = a * d - b * c < 0
+            for flags in range(4):
+                newFlags = SVGTransform.transformArc(matrix, 5, 3, 30,
+                                                     flags)[3]
+                # The large-arc flag is kept
+                self.assertEqual(newFlags >= 2, flags >= 2)
+                self.assertEqual(newFlags % 2 != flags % 2, reflected)
+
+    def testTransformSegments(self):
+        kinds, coords = PathData.scan("M 1 2 L 3 4 C 5 6 7 8 9 10 "
+                                      "Q 11 12 13 14 A 5 3 30 1 0 20 20")
+        matrix = self.MATRICES[4]
+        a, b, c, d, e, f = matrix
+        result = SVGTransform.transformSegments(kinds, coords, matrix)
+        for segment, kind in enumerate(kinds):
+            offset = segment * PathData.STRIDE
+            points = (0, 6) if kind == PathData.ARC else (0, 2, 4, 6)
+            for point in points:
+                x, y = coords[offset + point], coords[offset + point + 1]
+                self.assertAlmostEqual(result[offset + point],
+                                       a * x + c * y + e)
+                self.assertAlmostEqual(result[offset + point + 1],
+                                       b * x + d * y + f)
+            if kind == PathData.ARC:
+                self.assertEqual(
+                    tuple(result[offset + 2:offset + 6]),
+                    SVGTransform.transformArc(matrix,
+                                              *coords[offset + 2:offset + 6]))
+
+    @unittest.skipIf(SVGTransform.numpy is None, "NumPy is not installed")
+    def testTransformSegmentsArray(self):
+        numpy = SVGTransform.numpy
+        kinds, coords = PathData.scan("M 1 2 L 3 4 C 5 6 7 8 9 10 "
+                                      "a 5 3 30 1 0 20 20 Q 11 12 13 14 "
+                                      "A 2 7 -75 0 1 0 0")
+        matrices = [self.MATRICES[i % len(self.MATRICES)]
+                    for i in range(len(kinds))]
+        result = SVGTransform.transformSegmentsArray(
+            numpy.frombuffer(kinds, dtype=numpy.int8),
+            numpy.frombuffer(coords, dtype=float).reshape(-1,
+                                                          PathData.STRIDE),
+            numpy.array(matrices))
+        for segment, matrix in enumerate(matrices):
+            expected = SVGTransform.transformSegments(
+                kinds[segment:segment + 1],
+                coords[segment * PathData.STRIDE:
+                       (segment + 1) * PathData.STRIDE], matrix)
+            for value, expectedValue in zip(result[segment], expected):
+                self.assertAlmostEqual(value, expectedValue, places=9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Tests of TripleTable.
+"""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "SAI"))
+
+import TripleTable as TripleTableModule
+from TripleTable import TripleTable
+
+TRIPLES = [["bar1", "has_label", "label1"],
+           ["bar2", "has_label", "label2"],
+           ["label1", "describes", "bar2"],
+           ["bar1", "has_value", "10"],
+           [u"bar\u00e91", "has_value", u"\u00e9"]]
+
+
+class TripleTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = TripleTable(TRIPLES, properties=["unused"])
+
+    def testMembership(self):
+        for triple in TRIPLES:
+            self.assertIn(triple, self.table)
+            self.assertIn(tuple(triple), self.table)
+        self.assertNotIn(["bar1", "has_label", "label2"], self.table)
+        self.assertNotIn(["bar9", "has_label", "label1"], self.table)
+        self.assertNotIn(["bar1", "has_label"], self.table)
+        self.assertEqual(len(self.table), len(TRIPLES))
+        self.assertEqual(list(self.table), TRIPLES)
+
+    def testAddAndRemove(self):
+        self.assertFalse(self.table.add(["bar1", "has_label", "label1"]))
+        self.assertTrue(self.table.add(["bar3", "has_color", "red"]))
+        self.assertTrue(self.table.remove(["bar1", "has_label", "label1"]))
+        self.assertFalse(self.table.remove(["bar1", "has_label", "label1"]))
+        self.assertFalse(self.table.remove(["bar9", "has_label", "x"]))
+        self.assertNotIn(["bar1", "has_label", "label1"], self.table)
+        self.assertEqual(self.table.triples("has_label"),
+                         [["bar2", "has_label", "label2"]])
+        # Properties stay declared without triples
+        self.assertEqual(self.table.properties(),
+                         ["unused", "has_label", "describes", "has_value",
+                          "has_color"])
+        self.assertEqual(self.table.triples("unused"), [])
+        self.assertEqual(self.table.triples("undeclared"), [])
+
+    def testMissing(self):
+        new = [["bar3", "has_label", "label1"],
+               ["bar1", "has_label", "label1"],
+               ["bar3", "has_label", "label1"],
+               ["bar1", "has_label", "label2"],
+               ["unknown", "unknown", "unknown"],
+               ["unknown", "unknown", "unknown"]]
+        self.assertEqual(self.table.missing(new),
+                         [["bar3", "has_label", "label1"],
+                          ["bar1", "has_label", "label2"],
+                          ["unknown", "unknown", "unknown"]])
+        self.assertEqual(self.table.missing(TRIPLES), [])
+        self.assertEqual(self.table.missing([]), [])
+        # Looking up does not add anything
+        self.assertEqual(len(self.table), len(TRIPLES))
+        self.assertNotIn("unknown", self.table.ids)
+
+    def testTriplesOf(self):
+        self.assertEqual(self.table.triplesOf("bar2"),
+                         [["bar2", "has_label", "label2"],
+                          ["label1", "describes", "bar2"]])
+        self.assertEqual(self.table.triplesOf("label1"),
+                         [["bar1", "has_label", "label1"],
+                          ["label1", "describes", "bar2"]])
+        self.assertEqual(self.table.triplesOf("unknown"), [])
+        # The indexes are maintained once built
+        self.table.add(["bar3", "has_label", "bar2"])
+        self.table.remove(["label1", "describes", "bar2"])
+        self.assertEqual(self.table.triplesOf("bar2"),
+                         [["bar2", "has_label", "label2"],
+                          ["bar3", "has_label", "bar2"]])
+
+    def testCompact(self):
+        saved = TripleTableModule.COMPACT_MIN_REMOVED
+        TripleTableModule.COMPACT_MIN_REMOVED = 2
+        try:
+            self.table.triplesOf("bar1")
+            for triple in TRIPLES[:3]:
+                self.table.remove(triple)
+        finally:
+            TripleTableModule.COMPACT_MIN_REMOVED = saved
+        self.assertEqual(len(self.table.columns[0]), 2)
+        self.assertEqual(self.table.removed, 0)
+        self.assertEqual(list(self.table), TRIPLES[3:])
+        self.assertEqual(self.table.triplesOf("bar1"),
+                         [["bar1", "has_value", "10"]])
+
+    def testPackedKeysGrow(self):
+        table = TripleTable()
+        table.keyBits = 2
+        triples = [["s%d" % i, "p", "o%d" % i] for i in xrange(20)]
+        for triple in triples:
+            table.add(triple)
+        self.assertGreater(table.keyBits, 2)
+        for triple in triples:
+            self.assertIn(triple, table)
+        self.assertNotIn(["s1", "p", "o2"], table)
+        self.assertEqual(len(table), 20)
+
+    def assertSameTable(self, table, expected):
+        self.assertEqual(list(table), list(expected))
+        self.assertEqual(table.properties(), expected.properties())
+
+    def testJSONRoundTrip(self):
+        self.table.remove(TRIPLES[1])
+        data = json.loads(json.dumps(self.table.toJSON()))
+        # Only the strings still used are kept
+        self.assertNotIn("label2", data["strings"])
+        table = TripleTable.fromJSON(data)
+        self.assertSameTable(table, self.table)
+        self.assertIn([u"bar\u00e91", "has_value", u"\u00e9"], table)
+
+    def testFromJSONByProperty(self):
+        # viso.json files that kept a dict from properties to triples
+        data = {"has_label": TRIPLES[:2], "describes": [TRIPLES[2]],
+                "unused": []}
+        table = TripleTable.fromJSON(json.loads(json.dumps(data)))
+        self.assertEqual(table.properties(),
+                         ["describes", "has_label", "unused"])
+        self.assertEqual(sorted(table), sorted(TRIPLES[:3]))
+
+    def testFromJSONList(self):
+        # viso.json files that kept a list of triples
+        table = TripleTable.fromJSON(json.loads(json.dumps(TRIPLES)))
+        self.assertSameTable(table, TripleTable(TRIPLES))
+        self.assertEqual(len(TripleTable.fromJSON(None)), 0)
+        self.assertEqual(len(TripleTable.fromJSON([])), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()